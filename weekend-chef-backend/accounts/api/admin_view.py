@@ -1,4 +1,4 @@
-from django.core.mail import send_mail
+from accounts.outbox import queue_user_code
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -15,7 +15,6 @@ from activities.models import AllActivity
 from bank_account.models import BankAccount
 from week_admin.models import WeekendChefAdmin
 from weekend_chef_project.utils import generate_email_token
-from django.core.mail import send_mail
 from django.contrib.auth import get_user_model, authenticate
 
 
@@ -125,37 +124,7 @@ def register_weekend_chef_admin(request):
         user.email_token = email_token
         user.save()
 
-        context = {
-            'email_token': email_token,
-            'email': user.email,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-        }
-#
-        txt_ = get_template("registration/emails/verify.txt").render(context)
-        html_ = get_template("registration/emails/verify.html").render(context)
-#
-        subject = 'EMAIL CONFIRMATION CODE'
-        from_email = settings.DEFAULT_FROM_EMAIL
-        recipient_list = [user.email]
-
-
-
-        # # Use Celery chain to execute tasks in sequence
-        # email_chain = chain(
-        #     send_generic_email.si(subject, txt_, from_email, recipient_list, html_),
-        # )
-        # # Execute the Celery chain asynchronously
-        # email_chain.apply_async()
-
-        send_mail(
-            subject,
-            txt_,
-            from_email,
-            recipient_list,
-            html_message=html_,
-            fail_silently=False,
-        )
+        queue_user_code(user, 'email_token', 'EMAIL CONFIRMATION CODE', "registration/emails/verify")
 
 
 
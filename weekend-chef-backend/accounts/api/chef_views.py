@@ -1,5 +1,5 @@
 import re
-from django.core.mail import send_mail
+from accounts.outbox import queue_user_code
 from django.contrib.auth import get_user_model, authenticate
 
 from django.conf import settings
@@ -151,37 +151,7 @@ def register_chef(request):
         #    ######################
 
 
-        context = {
-            'email_token': email_token,
-            'email': user.email,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-        }
-        # ##
-        txt_ = get_template("registration/emails/verify.txt").render(context)
-        html_ = get_template("registration/emails/verify.html").render(context)
-        # ##
-        subject = 'EMAIL CONFIRMATION CODE'
-        from_email = settings.DEFAULT_FROM_EMAIL
-        recipient_list = [user.email]
-
-
-
-        # # Use Celery chain to execute tasks in sequence
-        # email_chain = chain(
-        #     send_generic_email.si(subject, txt_, from_email, recipient_list, html_),
-        # )
-        # # Execute the Celery chain asynchronously
-        # email_chain.apply_async()
-
-        send_mail(
-            subject,
-            txt_,
-            from_email,
-            recipient_list,
-            html_message=html_,
-            fail_silently=False,
-        )
+        queue_user_code(user, 'email_token', 'EMAIL CONFIRMATION CODE', "registration/emails/verify")
 
 
 
@@ -418,35 +388,7 @@ def resend_chef_email_verification(request):
     #     ######################
 
 
-    context = {
-        'email_token': otp_code,
-        'email': user.email,
-        'first_name': user.first_name,
-        'last_name': user.last_name
-    }
-#
-    txt_ = get_template("registration/emails/verify.txt").render(context)
-    html_ = get_template("registration/emails/verify.html").render(context)
-#
-    subject = 'OTP CODE'
-    from_email = settings.DEFAULT_FROM_EMAIL
-    recipient_list = [user.email]
-
-     # Use Celery chain to execute tasks in sequence
-    # email_chain = chain(
-    #      send_generic_email.si(subject, txt_, from_email, recipient_list, html_),
-    #   )
-    #  # Execute the Celery chain asynchronously
-    # email_chain.apply_async()
-
-    send_mail(
-        subject,
-        txt_,
-        from_email,
-        recipient_list,
-        html_message=html_,
-        fail_silently=False,
-    )
+    queue_user_code(user, 'email_token', 'OTP CODE', "registration/emails/verify")
 
     #data["otp_code"] = otp_code
     data["email"] = user.email
@@ -1,5 +1,6 @@
 import re
-from django.core.mail import EmailMessage, send_mail
+from django.core.mail import EmailMessage
+from accounts.outbox import queue_user_code
 
 from celery import chain
 from django.conf import settings
@@ -63,35 +64,7 @@ class PasswordResetView(generics.GenericAPIView):
         user.otp_code = otp_code
         user.save()
 
-        context = {
-            'otp_code': otp_code,
-            'email': user.email,
-            'first_name': user.first_name,
-            'last_name': user.last_name
-        }
-
-        txt_ = get_template("registration/emails/send_otp.txt").render(context)
-        html_ = get_template("registration/emails/send_otp.html").render(context)
-
-        subject = 'OTP CODE'
-        from_email = settings.DEFAULT_FROM_EMAIL
-        recipient_list = [user.email]
-
-        # # Use Celery chain to execute tasks in sequence
-        # email_chain = chain(
-        #     send_generic_email.si(subject, txt_, from_email, recipient_list, html_),
-        #  )
-        # # Execute the Celery chain asynchronously
-        # email_chain.apply_async()
-
-        send_mail(
-            subject,
-            txt_,
-            from_email,
-            recipient_list,
-            html_message=html_,
-            fail_silently=False,
-        )
+        queue_user_code(user, 'otp_code', 'OTP CODE', "registration/emails/send_otp")
 
        # data["otp_code"] = otp_code
         data["email"] = user.email
@@ -191,35 +164,7 @@ def resend_password_otp(request):
     user.otp_code = otp_code
     user.save()
 
-    context = {
-        'otp_code': otp_code,
-        'email': user.email,
-        'first_name': user.first_name,
-        'last_name': user.last_name
-    }
-
-    txt_ = get_template("registration/emails/send_otp.txt").render(context)
-    html_ = get_template("registration/emails/send_otp.html").render(context)
-
-    subject = 'OTP CODE'
-    from_email = settings.DEFAULT_FROM_EMAIL
-    recipient_list = [user.email]
-
-    # # Use Celery chain to execute tasks in sequence
-    # email_chain = chain(
-    #     send_generic_email.si(subject, txt_, from_email, recipient_list, html_),
-    #  )
-    # # Execute the Celery chain asynchronously
-    # email_chain.apply_async()
-
-    send_mail(
-        subject,
-        txt_,
-        from_email,
-        recipient_list,
-        html_message=html_,
-        fail_silently=False,
-    )
+    queue_user_code(user, 'otp_code', 'OTP CODE', "registration/emails/send_otp")
 
     #data["otp_code"] = otp_code
     data["email"] = user.email
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import uuid
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.template.loader import get_template
+
+from accounts.models import User, VerificationToken
+from outbox.dispatch import enqueue
+from outbox.handlers import register
+
+VERIFICATION_CODE_SEND = "accounts.verification_code"
+USER_CODE_SEND = "accounts.user_code"
+# Code fields on User that the account views email out
+USER_CODE_FIELDS = ("email_token", "otp_code")
+
+# Subject and body per purpose; the code is filled in at delivery so it is never stored in the outbox
+VERIFICATION_EMAILS = {
+    VerificationToken.Purpose.EMAIL: (
+        "Verify your Weekend Chef email",
+        "Your verification code is {code}. It expires in 10 minutes.",
+    ),
+    VerificationToken.Purpose.PASSWORD_RESET: (
+        "Reset your Weekend Chef password",
+        "Enter {code} in the app to continue.",
+    ),
+}
+
+
+@register(VERIFICATION_CODE_SEND)
+def send_verification_code(event) -> None:
+    token = VerificationToken.objects.select_related("user").filter(pk=event.payload["token"]).first()
+    # A superseded, used or expired code is not worth sending
+    if token is None or token.is_consumed or token.is_expired:
+        return
+    subject, message = VERIFICATION_EMAILS[token.purpose]
+    send_mail(
+        subject,
+        message.format(code=token.code),
+        settings.DEFAULT_FROM_EMAIL,
+        [token.destination or token.user.email],
+        fail_silently=False,
+    )
+
+
+def queue_user_code(user: User, field: str, subject: str, template: str) -> None:
+    """
+    Email the code the account views stored in ``user.<field>`` once the current
+    transaction commits. Like ``VERIFICATION_CODE_SEND`` the event holds only a
+    reference: the code is read and ``template`` (.txt and .html) rendered at
+    delivery, so it is never stored in the outbox.
+    """
+    if field not in USER_CODE_FIELDS:
+        raise ValueError(f"Unknown code field {field!r}.")
+    enqueue(
+        USER_CODE_SEND,
+        {"user": user.pk, "field": field, "subject": subject, "template": template},
+        f"{USER_CODE_SEND}:{uuid.uuid4().hex}",
+    )
+
+
+@register(USER_CODE_SEND)
+def send_user_code(event) -> None:
+    payload = event.payload
+    user = User.objects.filter(pk=payload["user"]).first()
+    code = getattr(user, payload["field"], None) if user is not None else None
+    # A code reissued since the event was recorded replaces the old one, so the current one is sent
+    if not code or not user.email:
+        return
+    context = {
+        payload["field"]: code,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+    }
+    send_mail(
+        payload["subject"],
+        get_template(f"{payload['template']}.txt").render(context),
+        settings.DEFAULT_FROM_EMAIL,
+        [user.email],
+        html_message=get_template(f"{payload['template']}.html").render(context),
+        fail_silently=False,
+    )
@@ -6,11 +6,12 @@ import secrets
 import string
 from typing import Optional
 
-from django.conf import settings
-from django.core.mail import send_mail
 from django.utils import timezone
 
+from outbox.dispatch import enqueue
+
 from .models import VerificationToken, User
+from .outbox import VERIFICATION_CODE_SEND, VERIFICATION_EMAILS
 
 logger = logging.getLogger(__name__)
 
@@ -35,26 +36,12 @@ def issue_token(user: User, purpose: VerificationToken.Purpose, *, destination:
 
 
 def _deliver_token(token: VerificationToken) -> None:
-    if token.purpose == VerificationToken.Purpose.EMAIL:
-        subject = "Verify your Weekend Chef email"
-        message = f"Your verification code is {token.code}. It expires in 10 minutes."
-        recipient = token.destination or token.user.email
-        if recipient:
-            try:
-                send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [recipient], fail_silently=True)
-            except Exception:  # pragma: no cover - log but continue
-                logger.exception("Failed to send verification email")
+    if token.purpose in VERIFICATION_EMAILS:
+        # The outbox records only the token; the email is rendered when it is sent
+        if token.destination or token.user.email:
+            enqueue(VERIFICATION_CODE_SEND, {"token": token.pk}, f"{VERIFICATION_CODE_SEND}:{token.pk}")
     elif token.purpose == VerificationToken.Purpose.PHONE:
         logger.info("Dispatching SMS token %s to %s", token.code, token.destination or token.user.phone)
-    elif token.purpose == VerificationToken.Purpose.PASSWORD_RESET:
-        subject = "Reset your Weekend Chef password"
-        message = f"Enter {token.code} in the app to continue."
-        recipient = token.destination or token.user.email
-        if recipient:
-            try:
-                send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [recipient], fail_silently=True)
-            except Exception:  # pragma: no cover
-                logger.exception("Failed to send password reset email")
 
 
 def validate_token(user: User, code: str, purpose: VerificationToken.Purpose) -> VerificationToken:
@@ -9,7 +9,7 @@ from weekend_chef_project.utils import unique_account_id_generator, unique_trans
 class BankAccount(models.Model):
 
     user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='bank_accounts')
-    account_id = models.CharField(max_length=20, unique=True)
+    account_id = models.CharField(max_length=64, unique=True)
     balance = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
 
     created_at = models.DateTimeField(default=timezone.now)
@@ -59,7 +59,7 @@ class Transaction(models.Model):
     ]
 
     bank_account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name='transactions')
-    transaction_id = models.CharField(max_length=20, unique=True)
+    transaction_id = models.CharField(max_length=64, unique=True)
 
     transaction_type = models.CharField(max_length=50, choices=TRANSACTION_TYPES)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -1,43 +1,50 @@
-import json
 from channels.db import database_sync_to_async
-from django.contrib.auth import get_user_model
-
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
-from bookednise_pro.exceptions import ClientError
-from chats.api.serializers import PrivateRoomChatMessageSerializer
+from chats.exceptions import ClientError
+from chats.history import HISTORY_PAGE_SIZE, message_history, remember_message
 from chats.models import PrivateChatRoom, PrivateRoomChatMessage
-from django.contrib.auth.models import AnonymousUser
+from weekend_chef_project.websocket_auth import UNAUTHENTICATED_CLOSE_CODE
 
-User = get_user_model()
 
 class BookingChatConsumers(AsyncJsonWebsocketConsumer):
+    """
+    Room chat over one websocket. The user comes from the connection scope
+    (token or session) and the joined room is resolved and checked once, so a
+    send costs one insert and one group_send. Any ``user_id`` in a payload is
+    ignored.
+    """
 
     async def connect(self):
-        self.user = None
-        self.room_id = None
-        self.room_group_name = None
-        self.user_id = None
+        self.user = self.scope.get("user")
+        self.room = None
+
+        if self.user is None or not self.user.is_authenticated:
+            await self.close(code=UNAUTHENTICATED_CLOSE_CODE)
+            return
 
         await self.accept()
 
     async def receive_json(self, content):
-        print("AdminChatConsumers: receive_json")
         command = content.get("command", None)
-        user_id = content.get("user_id", None)
         room_id = content.get("room_id", None)
-        message = content.get("message", None)
-        images = content.get("images", None)
-        page_number = content.get("page_number", None)
 
         try:
             if command == "join":
+                await self.join_room(room_id)
 
-                self.user = await get_user(user_id)
-                await self.join_room(room_id, user_id, page_number)
+            elif command == "leave":
+                await self.leave_room()
 
             elif command == "send":
-                await self.send_room(content["room_id"], content["user_id"], content["message"], content["images"])
+                await self.send_room(room_id, content.get("message"))
+
+            elif command == "history":
+                self.ensure_joined(room_id)
+                await self.send_history(content.get("before"), content.get("limit", HISTORY_PAGE_SIZE))
+
+            else:
+                raise ClientError("UNKNOWN_COMMAND", "Unknown command.")
 
         except ClientError as e:
             await self.handle_client_error(e)
@@ -46,13 +53,8 @@ class BookingChatConsumers(AsyncJsonWebsocketConsumer):
         """
         Called when the WebSocket closes for any reason.
         """
-        # leave the room
-        print("Admin Chat Consumers: disconnect")
-        try:
-            if self.room_id != None:
-                await self.leave_room(self.room_id)
-        except Exception:
-            pass
+        if getattr(self, "room", None) is not None:
+            await self.leave_room()
 
     async def handle_client_error(self, e):
         """
@@ -63,186 +65,113 @@ class BookingChatConsumers(AsyncJsonWebsocketConsumer):
         errorData['error'] = e.code
         if e.message:
             errorData['message'] = e.message
-            await self.send_json(errorData)
-        return
+        await self.send_json(errorData)
+
+    def ensure_joined(self, room_id):
+        """Check a command targets the joined room, using only connection state."""
+        if self.room is None or (room_id is not None and room_id != self.room.room_id):
+            raise ClientError("NOT_IN_ROOM", "Join the room first.")
 
-    async def join_room(self, room_id, user_id, page_number):
+    async def join_room(self, room_id):
         """
         Called by receive_json when someone sent a join command.
         """
-        print("AdminChatConsumers: join_room")
-        # is_auth = is_authenticated(self.user)
+        room = await get_member_room_or_error(room_id, self.user)
+        if self.room is not None and self.room.pk != room.pk:
+            await self.leave_room()
 
-        try:
-            room = await get_room_or_error(room_id)
-        except ClientError as e:
-            await self.handle_client_error(e)
+        if self.room is None:
+            # Add them to the group so they get room messages
+            await self.channel_layer.group_add(room.group_name, self.channel_name)
+            self.room = room
 
-        # Add them to the group so they get room messages
-        await self.channel_layer.group_add(
-                room.group_name,
-                self.channel_name,
-            )
+        # Only the joining socket needs the backlog; the rest of the room already has it
+        await self.send_history()
 
+    async def leave_room(self):
+        if self.room is None:
+            return
+        await self.channel_layer.group_discard(self.room.group_name, self.channel_name)
+        self.room = None
 
-        ## Store that we're in the room
-        self.room_id = room.room_id
-        payload = await get_room_chat_messages(room)
+    async def send_history(self, before=None, limit=HISTORY_PAGE_SIZE):
+        """
+        Send one page of messages older than message id ``before`` (the newest
+        page when omitted) to this socket only.
+        """
+        try:
+            before = int(before) if before is not None else None
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise ClientError("INVALID_CURSOR", "Invalid history cursor.")
 
-        payload = json.loads(payload)
+        messages, next_before = await get_room_history(self.room, before, limit)
+        await self.send_json(
+            {
+                "type": "history",
+                "messages": messages,
+                "next_before": next_before,
+            },
+        )
+
+    async def send_room(self, room_id, message):
+        """
+        Called by receive_json when someone sends a message to a room.
+        """
+        self.ensure_joined(room_id)
+        if not message or not str(message).strip():
+            raise ClientError("MESSAGE_EMPTY", "Message cannot be empty.")
+
+        message_data = await create_room_chat_message(self.room, self.user, message)
 
+        # Broadcast only the new message; clients append it to what they already have
         await self.channel_layer.group_send(
-            room.group_name,
+            self.room.group_name,
             {
-                "type": "send_messages_payload",
-                "messages": payload,
+                "type": "chat.message",
+                "message": message_data,
             }
         )
 
-    async def send_room(self, room_id, user_id, message, images):
-            """
-            Called by receive_json when someone sends a message to a room.
-            """
-            # Check they are in this room
-            print("Admin Chat: send_room")
-
-            try:
-                room = await get_room_or_error(room_id)
-            except ClientError as e:
-                await self.handle_client_error(e)
-
-            await self.channel_layer.group_add(
-                room.group_name,
-                self.channel_name
-            )
-
-            message_data = await create_public_room_chat_message(room_id, user_id, message, images)
-
-            if message_data != None:
-                payload = json.loads(message_data)
-
-                await self.channel_layer.group_send(
-                    room.group_name,
-                    {
-                        "type": "chat.message",
-                        "messages": payload,
-                    }
-                )
-            else:
-                raise ClientError(204, "Something went wrong retrieving the chatroom messages.")
-
     async def chat_message(self, event):
         """
         Called when someone has messaged our chat.
         """
-        # Send a message down to the client
-        print("AdminChatConsumers: chat_message from user #")
         await self.send_json(
             {
-                "messages": event["messages"],
+                "type": "message",
+                "message": event["message"],
             },
         )
 
-    async def send_messages_payload(self, event):
-        """
-        Send a payload of messages to the ui
-        """
-        print("AdminChatConsumers: send_messages_payload. ")
-
-        await self.send_json(
-            {
-                "messages": event['messages'],
-            },
-        )
 
+def is_room_member(room, user):
+    if user.is_staff or user.pk in (room.client_id, room.shop_id):
+        return True
+    return room.connected_users.filter(pk=user.pk).exists()
 
 
 @database_sync_to_async
-def get_room_or_error(room_id):
+def get_member_room_or_error(room_id, user):
+    """
+    Fetch a room the user may take part in; done once per join.
     """
-	Tries to fetch a room for the user
-	"""
     try:
         room = PrivateChatRoom.objects.get(room_id=room_id)
     except PrivateChatRoom.DoesNotExist:
         raise ClientError("ROOM_INVALID", "Invalid room.")
+    if not is_room_member(room, user):
+        raise ClientError("ROOM_ACCESS_DENIED", "You are not a member of this room.")
     return room
 
 
-
-@database_sync_to_async
-def connect_user(room_id, user_id):
-    try:
-        message_room = PrivateChatRoom.objects.get(room_id=room_id)
-        if message_room != None:
-            message_room.connect_user(user_id)
-            count = len(message_room.connected_users.all())
-            print(count)
-
-
-    except PrivateChatRoom.DoesNotExist:
-        raise ClientError("OBJECT_INVALID", "Invalid object.")
-
-
-
-
-
-@database_sync_to_async
-def get_room_chat_messages(room):
-    try:
-        qs = PrivateRoomChatMessage.objects.by_room(room).order_by('-timestamp')[:20]
-        serializers = PrivateRoomChatMessageSerializer(qs, many=True)
-        if serializers:
-            data = serializers.data
-            return json.dumps(data)
-    except PrivateRoomChatMessage.DoesNotExist:
-        raise ClientError("OBJECT_INVALID", "Invalid object.")
-
-
-
 @database_sync_to_async
-def create_public_room_chat_message(room_id, user_id, message, files):
-    try:
-        user_obj = User.objects.get(user_id=user_id)
-        room_obj = PrivateChatRoom.objects.get(room_id=room_id)
-
-        message = PrivateRoomChatMessage.objects.create(
-            user=user_obj,
-            room=room_obj,
-            message=message
-        )
-        message.save()
-
-        # Fetch the messages for the room
-        qs = PrivateRoomChatMessage.objects.by_room(room_obj).order_by('-timestamp')[:20]
-        serializers = PrivateRoomChatMessageSerializer(qs, many=True)
-        if serializers:
-            data = serializers.data
-            return json.dumps(data)
-
-    except PrivateChatRoom.DoesNotExist:
-        raise ClientError("ROOM_INVALID", "Invalid room.")
-
-    except User.DoesNotExist:
-        raise ClientError("USER_INVALID", "Invalid user.")
-
-    except PrivateRoomChatMessage.DoesNotExist:
-        raise ClientError("OBJECT_INVALID", "Invalid object.")
+def get_room_history(room, before, limit):
+    return message_history(room.pk, before=before, limit=limit)
 
 
 @database_sync_to_async
-def get_user(user_id):
-    try:
-        return User.objects.get(user_id=user_id)
-    except User.DoesNotExist:
-        return AnonymousUser()
-
-
-def is_authenticated(user):
-    print("AUTH USER: ")
-    print(user)
-    if user.is_authenticated:
-        return True
-    return False
-
-
+def create_room_chat_message(room, user, message):
+    chat_message = PrivateRoomChatMessage.objects.create(user=user, room=room, message=message)
+    # Serialized once: the same payload goes to the ring buffer and the group
+    return remember_message(chat_message)
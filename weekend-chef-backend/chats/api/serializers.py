@@ -1,7 +1,7 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
-from chats.models import MessageTemplate, OrderChatThread, OrderMessage, ThreadParticipant
+from chats.models import MessageTemplate, OrderChatThread, OrderMessage, PrivateRoomChatMessage, ThreadParticipant
 
 
 User = get_user_model()
@@ -36,6 +36,14 @@ class OrderMessageSerializer(serializers.ModelSerializer):
         fields = ["id", "body", "created_at", "metadata", "sender", "template"]
 
 
+class PrivateRoomChatMessageSerializer(serializers.ModelSerializer):
+    user = UserSummarySerializer(read_only=True)
+
+    class Meta:
+        model = PrivateRoomChatMessage
+        fields = ["id", "message", "timestamp", "read", "user"]
+
+
 class CreateOrderMessageSerializer(serializers.ModelSerializer):
     template_key = serializers.SlugField(required=False, allow_null=True)
 
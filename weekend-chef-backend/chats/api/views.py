@@ -71,7 +71,9 @@ def post_thread_message_view(request, order_id):
         metadata=serializer.validated_data.get("metadata") or {},
     )
     output = OrderMessageSerializer(message)
-    return Response(output.data, status=status.HTTP_201_CREATED)
+    # Write-behind mode returns the queued message before it has an id
+    response_status = status.HTTP_201_CREATED if message.pk else status.HTTP_202_ACCEPTED
+    return Response(output.data, status=response_status)
 
 
 @api_view(["GET"])
@@ -0,0 +1,7 @@
+class ClientError(Exception):
+    """Error reported back to a websocket client as ``{"error": code, "message": message}``."""
+
+    def __init__(self, code, message=None):
+        super().__init__(code)
+        self.code = code
+        self.message = message
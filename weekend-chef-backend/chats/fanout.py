@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from notifications.fanout import fan_out, wants_notification
+from notifications.models import Notification
+
+from chats.models import OrderMessage, ThreadParticipant
+from orders.realtime import publish
+
+
+def notify_message_participants(message_ids) -> list[Notification]:
+    """
+    Notify every participant of each message's thread except its sender, in a
+    fixed number of queries: the messages, the participants joined to their
+    push preference, and one bulk insert. Active participants' realtime
+    sockets get the message too.
+    """
+    messages = list(
+        OrderMessage.objects.filter(pk__in=message_ids)
+        .select_related("thread__order")
+        .only("id", "body", "sender_id", "created_at", "thread_id", "thread__order__id", "thread__order__order_id")
+        .order_by("created_at", "id")
+    )
+    if not messages:
+        return []
+
+    participants = ThreadParticipant.objects.filter(thread_id__in={message.thread_id for message in messages}).values_list(
+        "thread_id", "user_id", "is_active", "user__notification_preferences__push_updates"
+    )
+    recipients = {}
+    members = {}
+    for thread_id, user_id, is_active, push_updates in participants:
+        if wants_notification(push_updates):
+            recipients.setdefault(thread_id, []).append(user_id)
+        if is_active:
+            members.setdefault(thread_id, []).append(user_id)
+
+    notifications = []
+    for message in messages:
+        order = message.thread.order
+        title = f"New message for order {order.order_id or order.pk}"
+        for user_id in recipients.get(message.thread_id, ()):
+            if user_id != message.sender_id:
+                notifications.append(Notification(user_id=user_id, title=title, subject=message.body))
+        # Live sockets get the message whatever the push preference; the sender's other tabs included
+        publish(
+            members.get(message.thread_id, ()),
+            {
+                "type": "thread.message",
+                "order_id": order.order_id,
+                "message": {
+                    "id": message.pk,
+                    "sender_id": message.sender_id,
+                    "body": message.body,
+                    "created_at": message.created_at.isoformat(),
+                },
+            },
+            staff=False,
+        )
+    return fan_out(notifications)
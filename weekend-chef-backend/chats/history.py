@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+import threading
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:  # pragma: no cover - exercised only where redis-py is installed
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+from chats.api.serializers import PrivateRoomChatMessageSerializer
+from chats.models import PrivateRoomChatMessage
+
+HISTORY_PAGE_SIZE = 20
+MAX_HISTORY_PAGE_SIZE = 100
+
+
+class RedisRecentMessages:
+    """Newest-first capped list per room (LPUSH + LTRIM), expiring once a room goes quiet."""
+
+    key_template = "chat:recent:{room_id}"
+
+    def __init__(self, url: str, size: int, ttl: int):
+        self.client = redis.Redis.from_url(url)
+        self.size = size
+        self.ttl = ttl
+
+    def _key(self, room_id) -> str:
+        return self.key_template.format(room_id=room_id)
+
+    def push(self, room_id, message: dict) -> None:
+        key = self._key(room_id)
+        pipe = self.client.pipeline()
+        pipe.lpush(key, json.dumps(message))
+        pipe.ltrim(key, 0, self.size - 1)
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def prime(self, room_id, messages: list[dict]) -> None:
+        if not messages or self.client.exists(self._key(room_id)):
+            return
+        key = self._key(room_id)
+        pipe = self.client.pipeline()
+        # RPUSH keeps newest-first order and lands behind anything pushed meanwhile
+        pipe.rpush(key, *(json.dumps(message) for message in messages[: self.size]))
+        pipe.ltrim(key, 0, self.size - 1)
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def recent(self, room_id) -> list[dict]:
+        return [json.loads(raw) for raw in self.client.lrange(self._key(room_id), 0, self.size - 1)]
+
+    def clear(self, room_id=None) -> None:
+        if room_id is not None:
+            self.client.delete(self._key(room_id))
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def recent_messages_buffer():
+    """
+    The shared recent-messages buffer, or ``None`` without CHAT_HISTORY_REDIS_URL.
+    A per-process buffer would miss messages sent through other processes, so
+    history is then read from the database.
+    """
+    global _buffer
+    if _buffer is None and settings.CHAT_HISTORY_REDIS_URL:
+        with _buffer_lock:
+            if _buffer is None:
+                if redis is None:
+                    raise ImproperlyConfigured("CHAT_HISTORY_REDIS_URL is set but redis-py is not installed.")
+                _buffer = RedisRecentMessages(settings.CHAT_HISTORY_REDIS_URL, settings.CHAT_RECENT_MESSAGES, settings.CHAT_RECENT_MESSAGES_TTL)
+    return _buffer
+
+
+def serialize_message(message: PrivateRoomChatMessage) -> dict:
+    return dict(PrivateRoomChatMessageSerializer(message).data)
+
+
+def remember_message(message: PrivateRoomChatMessage) -> dict:
+    """Serialize a new message once and append it to its room's buffer; returns the payload to broadcast."""
+    data = serialize_message(message)
+    buffer = recent_messages_buffer()
+    if buffer is not None:
+        buffer.push(message.room_id, data)
+    return data
+
+
+def _from_database(room_pk, before: Optional[int], limit: int) -> list[dict]:
+    queryset = PrivateRoomChatMessage.objects.filter(room_id=room_pk).select_related("user").order_by("-id")
+    if before is not None:
+        queryset = queryset.filter(id__lt=before)
+    return PrivateRoomChatMessageSerializer(queryset[:limit], many=True).data
+
+
+def message_history(room_pk, before: Optional[int] = None, limit: int = HISTORY_PAGE_SIZE) -> tuple[list[dict], Optional[int]]:
+    """
+    Up to ``limit`` messages of a room older than message id ``before`` (or the
+    newest ones), newest first, plus the cursor for the next older page. The
+    ring buffer answers first and only the remainder is read from the database.
+    """
+    limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+    buffer = recent_messages_buffer()
+    if buffer is None:
+        messages = list(_from_database(room_pk, before, limit + 1))
+        next_before = messages[limit - 1]["id"] if len(messages) > limit else None
+        return messages[:limit], next_before
+    cached = buffer.recent(room_pk)
+    if not cached and before is None:
+        fresh = list(_from_database(room_pk, None, buffer.size))
+        buffer.prime(room_pk, fresh)
+        cached = fresh
+
+    # Deduplicate by id in case a prime raced with a push
+    seen = set()
+    messages = []
+    for message in sorted(cached, key=lambda message: message["id"], reverse=True):
+        if message["id"] in seen or (before is not None and message["id"] >= before):
+            continue
+        seen.add(message["id"])
+        messages.append(message)
+    # One row past the page tells whether an older page exists
+    messages = messages[: limit + 1]
+    if len(messages) <= limit:
+        oldest = messages[-1]["id"] if messages else before
+        messages.extend(_from_database(room_pk, oldest, limit + 1 - len(messages)))
+    next_before = messages[limit - 1]["id"] if len(messages) > limit else None
+    return messages[:limit], next_before
@@ -0,0 +1,43 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chats.write_behind import flush_order_messages
+
+
+class Command(BaseCommand):
+    help = "Write queued order chat messages (write-behind mode) to the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--follow", action="store_true", help="Keep flushing until stopped with SIGINT or SIGTERM.")
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--interval", type=float, default=None, help="Seconds between flushes with --follow.")
+
+    def handle(self, *args, **options):
+        if not settings.CHAT_WRITE_BEHIND_REDIS_URL:
+            # A separate process would only see its own, empty, in-process queue
+            raise CommandError("Set CHAT_WRITE_BEHIND_REDIS_URL; there is no shared queue to flush without it.")
+        interval = options["interval"] or settings.CHAT_WRITE_BEHIND_FLUSH_SECONDS
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        if options["follow"]:
+            signal.signal(signal.SIGTERM, stop)
+            signal.signal(signal.SIGINT, stop)
+
+        while True:
+            report = flush_order_messages(batch_size=options["batch_size"])
+            if report.written or report.dropped:
+                self.stdout.write(f"Wrote {report.written} messages in {report.batches} batches, dropped {report.dropped}.")
+            if not options["follow"] or stopping:
+                break
+            time.sleep(interval)
+
+        # One last pass so nothing acknowledged to a client is left behind
+        if stopping:
+            flush_order_messages(batch_size=options["batch_size"])
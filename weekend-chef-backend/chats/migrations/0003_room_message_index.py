@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0002_messagetemplate_orderchatthread_ordermessage_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="privateroomchatmessage",
+            index=models.Index(fields=["room", "-id"], name="chats_room_message_idx"),
+        ),
+    ]
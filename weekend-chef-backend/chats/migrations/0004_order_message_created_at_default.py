@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0003_room_message_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ordermessage",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
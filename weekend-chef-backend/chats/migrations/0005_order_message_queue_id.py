@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0004_order_message_created_at_default"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ordermessage",
+            name="queue_id",
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -2,11 +2,9 @@ import os
 import random
 
 from django.conf import settings
-from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils import timezone
 
-from notifications.models import Notification, NotificationPreference
 
 
 
@@ -93,6 +91,11 @@ class PrivateRoomChatMessage(models.Model):
 
     objects = RoomChatMessageManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["room", "-id"], name="chats_room_message_idx"),
+        ]
+
     def __str__(self):
         return self.message
 
@@ -167,36 +170,17 @@ class OrderChatThread(models.Model):
         return participant
 
     def sync_participants(self):
-        from orders.models import Order
-
-        # Ensure the related order object is refreshed to pick up latest assignments
-        order = Order.objects.select_related(
-            "client__user",
-            "chef__user",
-            "dispatch__user",
-        ).get(pk=self.order.pk)
-
-        participant_map = []
-        if order.client and order.client.user:
-            participant_map.append((order.client.user, OrderChatThread.Role.CLIENT))
-        if order.chef and order.chef.user:
-            participant_map.append((order.chef.user, OrderChatThread.Role.CHEF))
-        if order.dispatch and order.dispatch.user:
-            participant_map.append((order.dispatch.user, OrderChatThread.Role.DISPATCH))
-
-        for user, role in participant_map:
-            self.add_participant(user, role)
-
-        # mark inactive participants who are no longer attached to the order
-        current_user_ids = {user.pk for user, _ in participant_map}
-        ThreadParticipant.objects.filter(thread=self).exclude(user_id__in=current_user_ids).exclude(
-            role=OrderChatThread.Role.ADMIN,
-        ).update(
-            is_active=False,
-            updated_at=timezone.now(),
-        )
+        from chats.participants import sync_order_participants
+
+        sync_order_participants([self.order_id])
 
     def record_message(self, sender, body, template=None, metadata=None):
+        if settings.CHAT_WRITE_BEHIND:
+            from chats.write_behind import enqueue_order_message
+
+            # Acknowledged once queued; a worker writes it (see chats.tasks)
+            return enqueue_order_message(self, sender, body, template=template, metadata=metadata)
+
         message = OrderMessage.objects.create(
             thread=self,
             sender=sender,
@@ -237,7 +221,10 @@ class OrderMessage(models.Model):
     )
     metadata = models.JSONField(default=dict, blank=True)
     read_by = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name="read_order_messages", blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set explicitly by write-behind batches (chats.write_behind) to the time the message was sent
+    created_at = models.DateTimeField(default=timezone.now)
+    # Write-behind queue entry the message came from, so a replayed batch is not written twice
+    queue_id = models.CharField(max_length=64, unique=True, null=True, blank=True)
 
     class Meta:
         ordering = ["created_at"]
@@ -247,21 +234,6 @@ class OrderMessage(models.Model):
         return f"Message by {self.sender.email}: {preview}"
 
     def notify_participants(self):
-        participant_ids = self.thread.participants.exclude(pk=self.sender_id).values_list("id", flat=True)
-        users = get_user_model().objects.filter(id__in=participant_ids)
-        order_reference = self.thread.order.order_id or self.thread.order.pk
-        for user in users:
-            try:
-                preferences = user.notification_preferences
-                if not preferences.push_updates:
-                    continue
-            except NotificationPreference.DoesNotExist:
-                preferences = None
-            Notification.objects.create(
-                user=user,
-                title=f"New message for order {order_reference}",
-                subject=self.body,
-            )
-
-
+        from chats.fanout import notify_message_participants
 
+        return notify_message_participants([self.pk])
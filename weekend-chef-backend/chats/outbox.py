@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from outbox.handlers import register
+
+MESSAGE_POSTED = "chat.message_posted"
+
+
+@register(MESSAGE_POSTED, batch=True)
+def fan_out_posted_messages(events) -> None:
+    from chats.tasks import notify_order_message_participants
+
+    # One notification task per relay batch rather than one per message
+    notify_order_message_participants.delay([event.payload["message"] for event in events])
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from chats.models import OrderChatThread, ThreadParticipant
+from orders.models import Order
+
+
+def sync_order_participants(order_ids) -> None:
+    """
+    Bring the chat threads of ``order_ids`` in line with each order's client,
+    chef and dispatch assignment. Memberships are diffed against the rows that
+    exist, so the cost is a fixed handful of queries however many orders and
+    participants are involved. Admin participants are never deactivated.
+    """
+    order_ids = set(order_ids)
+    if not order_ids:
+        return
+
+    wanted = {}
+    assignments = Order.objects.filter(pk__in=order_ids).values_list(
+        "pk", "client__user_id", "chef__user_id", "dispatch__user_id"
+    )
+    for order_id, client_user_id, chef_user_id, dispatch_user_id in assignments:
+        members = {}
+        # Later roles win when one user holds several, as the per-user sync did
+        for user_id, role in (
+            (client_user_id, OrderChatThread.Role.CLIENT),
+            (chef_user_id, OrderChatThread.Role.CHEF),
+            (dispatch_user_id, OrderChatThread.Role.DISPATCH),
+        ):
+            if user_id is not None:
+                members[user_id] = role
+        wanted[order_id] = members
+    if not wanted:
+        return
+
+    threads = dict(OrderChatThread.objects.filter(order_id__in=wanted).values_list("order_id", "pk"))
+    missing = [order_id for order_id in wanted if order_id not in threads]
+    if missing:
+        OrderChatThread.objects.bulk_create(
+            [OrderChatThread(order_id=order_id) for order_id in missing], ignore_conflicts=True
+        )
+        threads.update(OrderChatThread.objects.filter(order_id__in=missing).values_list("order_id", "pk"))
+    wanted = {threads[order_id]: members for order_id, members in wanted.items()}
+
+    now = timezone.now()
+    changed = []
+    for participant in ThreadParticipant.objects.filter(thread_id__in=wanted).only(
+        "pk", "thread_id", "user_id", "role", "is_active"
+    ):
+        role = wanted[participant.thread_id].pop(participant.user_id, None)
+        if role is not None:
+            if participant.role == role and participant.is_active:
+                continue
+            participant.role = role
+            participant.is_active = True
+        elif participant.is_active and participant.role != OrderChatThread.Role.ADMIN:
+            participant.is_active = False
+        else:
+            continue
+        participant.updated_at = now
+        changed.append(participant)
+
+    # Whatever is left in ``wanted`` has no row yet
+    new = [
+        ThreadParticipant(thread_id=thread_id, user_id=user_id, role=role)
+        for thread_id, members in wanted.items()
+        for user_id, role in members.items()
+    ]
+    with transaction.atomic():
+        if new:
+            ThreadParticipant.objects.bulk_create(new, ignore_conflicts=True)
+        if changed:
+            ThreadParticipant.objects.bulk_update(changed, ["role", "is_active", "updated_at"])
+
+
+# Order ids waiting for the current transaction to commit, per database alias
+_pending_syncs: ContextVar[dict | None] = ContextVar("chat_participant_syncs", default=None)
+
+
+def _run_pending_syncs(using) -> None:
+    pending = _pending_syncs.get()
+    order_ids = pending.pop(using, None) if pending else None
+    if order_ids:
+        sync_order_participants(order_ids)
+
+
+def schedule_participant_sync(order_id, using=None) -> None:
+    """
+    Sync the order's chat participants once the current transaction commits
+    (immediately in autocommit). Orders scheduled within one transaction are
+    collected and synced together by whichever of its callbacks runs first, so
+    several saves of the same order cost one sync. Ids left behind by a rolled
+    back transaction are synced with the next commit, which is harmless.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    pending = _pending_syncs.get()
+    if pending is None:
+        pending = {}
+        _pending_syncs.set(pending)
+    pending.setdefault(using, set()).add(order_id)
+    transaction.on_commit(partial(_run_pending_syncs, using), using=using)
@@ -3,18 +3,31 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from chats.models import OrderChatThread, OrderMessage
+from chats.outbox import MESSAGE_POSTED
+from chats.participants import schedule_participant_sync
+from outbox.dispatch import enqueue
 
 
 @receiver(post_save, sender=OrderMessage)
-def trigger_message_notifications(sender, instance, created, **kwargs):
+def trigger_message_notifications(sender, instance, created, using, **kwargs):
     if created:
-        instance.notify_participants()
+        # Fanned out by the outbox relay once the message is committed, off the request thread
+        enqueue(MESSAGE_POSTED, {"message": instance.pk}, f"{MESSAGE_POSTED}:{instance.pk}", using=using)
 
 
 Order = apps.get_model("orders", "Order")
 
 
 @receiver(post_save, sender=Order)
-def ensure_thread_for_order(sender, instance, **kwargs):
-    thread, _ = OrderChatThread.objects.get_or_create(order=instance)
-    thread.sync_participants()
+def ensure_thread_for_order(sender, instance, created, using, **kwargs):
+    assignment = instance.participant_assignment()
+    # The thread is needed straight away (and recreated if it went missing); its members follow on commit
+    if created:
+        OrderChatThread.objects.create(order=instance)
+    else:
+        OrderChatThread.objects.get_or_create(order=instance)
+    if not created and assignment == getattr(instance, "_synced_participants", None):
+        # Status, payout and other saves leave the membership alone
+        return
+    instance._synced_participants = assignment
+    schedule_participant_sync(instance.pk, using=using)
@@ -0,0 +1,19 @@
+from celery import shared_task
+from celery.signals import worker_shutdown
+
+from chats.fanout import notify_message_participants
+from chats.write_behind import flush_on_shutdown, flush_order_messages
+
+
+@shared_task
+def flush_order_chat_messages():
+    report = flush_order_messages()
+    return report.written
+
+
+@shared_task
+def notify_order_message_participants(message_ids):
+    return len(notify_message_participants(message_ids))
+
+
+worker_shutdown.connect(flush_on_shutdown)
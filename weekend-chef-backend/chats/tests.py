@@ -1,15 +1,31 @@
+from collections import defaultdict
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from chef.models import ChefProfile
-from chats.models import MessageTemplate
+from chats.api.consumers import UNAUTHENTICATED_CLOSE_CODE, BookingChatConsumers
+from chats.history import message_history, recent_messages_buffer, remember_message
+from chats.fanout import notify_message_participants
+from chats.models import MessageTemplate, OrderChatThread, OrderMessage, PrivateChatRoom, PrivateRoomChatMessage
+from chats.write_behind import FlushReport, _write_batch, flush_order_messages, message_queue
 from clients.models import Client
 from dispatch.models import DispatchDriver
-from notifications.models import Notification
+from notifications.models import Notification, NotificationPreference
 from orders.models import Order
+from weekend_chef_project.websocket_auth import TokenAuthMiddlewareStack
 
 
 User = get_user_model()
@@ -49,14 +65,15 @@ class OrderChatThreadTests(TestCase):
         self.chef_profile = ChefProfile.objects.create(user=self.chef_user)
         self.dispatch_profile = DispatchDriver.objects.create(user=self.dispatch_user)
 
-        self.order = Order.objects.create(
-            client=self.client_profile,
-            chef=self.chef_profile,
-            total_price=0,
-            grocery_advance_amount=0,
-            final_payout_amount=0,
-            platform_fee_amount=0,
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order = Order.objects.create(
+                client=self.client_profile,
+                chef=self.chef_profile,
+                total_price=0,
+                grocery_advance_amount=0,
+                final_payout_amount=0,
+                platform_fee_amount=0,
+            )
 
     def authenticate(self, user):
         token = user.auth_token.key
@@ -76,14 +93,64 @@ class OrderChatThreadTests(TestCase):
             thread.thread_participants.filter(user=self.dispatch_user).exists()
         )
 
-        self.order.dispatch = self.dispatch_profile
-        self.order.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.dispatch = self.dispatch_profile
+            self.order.save()
 
         thread.refresh_from_db()
         self.assertTrue(
             thread.thread_participants.filter(user=self.dispatch_user, role=thread.Role.DISPATCH, is_active=True).exists()
         )
 
+    def test_saving_an_order_recreates_a_missing_thread(self):
+        OrderChatThread.objects.filter(order=self.order).delete()
+        order = Order.objects.get(pk=self.order.pk)
+        order.status = Order.Status.ACCEPTED
+        order.save(update_fields=["status"])
+        self.assertTrue(OrderChatThread.objects.filter(order=order).exists())
+
+    def test_participant_sync_runs_once_per_transaction_and_only_on_reassignment(self):
+        order = Order.objects.get(pk=self.order.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            order.status = Order.Status.ACCEPTED
+            order.save(update_fields=["status"])
+            order.final_payout_amount = 10
+            order.save()
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            order.dispatch = self.dispatch_profile
+            order.save(update_fields=["dispatch"])
+            order.status = Order.Status.COOKING
+            order.save()
+            order.dispatch = None
+            order.save(update_fields=["dispatch"])
+            order.dispatch = self.dispatch_profile
+            order.save(update_fields=["dispatch"])
+        self.assertEqual(len(callbacks), 3)
+
+        # One read each of assignments, threads and members, then one insert in a savepoint
+        with self.assertNumQueries(6):
+            callbacks[0]()
+        # The rest find the transaction's orders already synced
+        with self.assertNumQueries(0):
+            for callback in callbacks[1:]:
+                callback()
+        thread = order.chat_thread
+        self.assertEqual(
+            set(thread.thread_participants.filter(is_active=True).values_list("user_id", "role")),
+            {
+                (self.client_user.pk, OrderChatThread.Role.CLIENT),
+                (self.chef_user.pk, OrderChatThread.Role.CHEF),
+                (self.dispatch_user.pk, OrderChatThread.Role.DISPATCH),
+            },
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.dispatch = None
+            order.save(update_fields=["dispatch"])
+        self.assertFalse(thread.thread_participants.get(user=self.dispatch_user).is_active)
+
     def test_post_message_notifies_other_participants(self):
         template = MessageTemplate.objects.create(
             key="status-update",
@@ -97,7 +164,10 @@ class OrderChatThreadTests(TestCase):
 
         url = reverse("chats_api:send_order_thread_message", args=[self.order.order_id or self.order.pk])
         payload = {"body": "Driver is on the way", "template_key": template.key}
-        response = self.api_client.post(url, payload, format="json")
+        # Notifications are fanned out by a task once the message commits
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api_client.post(url, payload, format="json")
+            self.assertFalse(Notification.objects.exists())
         self.assertEqual(response.status_code, 201)
 
         chef_notifications = Notification.objects.filter(user=self.chef_user).count()
@@ -105,6 +175,29 @@ class OrderChatThreadTests(TestCase):
         dispatch_notifications = Notification.objects.filter(user=self.dispatch_user).count()
         self.assertEqual(dispatch_notifications, 0)
 
+    def test_fan_out_respects_preferences_in_constant_queries(self):
+        thread = self.order.chat_thread
+        NotificationPreference.objects.create(user=self.chef_user, push_updates=False)
+        admins = [
+            User.objects.create_user(email=f"admin{index}@example.com", password="password123")
+            for index in range(5)
+        ]
+        for admin in admins[:1]:
+            thread.add_participant(admin, OrderChatThread.Role.ADMIN)
+        first = OrderMessage.objects.create(thread=thread, sender=self.client_user, body="First")
+        with CaptureQueriesContext(connection) as few:
+            notify_message_participants([first.pk])
+
+        for admin in admins[1:]:
+            thread.add_participant(admin, OrderChatThread.Role.ADMIN)
+        second = OrderMessage.objects.create(thread=thread, sender=self.client_user, body="Second")
+        with CaptureQueriesContext(connection) as many:
+            created = notify_message_participants([second.pk])
+
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+        self.assertCountEqual([notification.user_id for notification in created], [admin.pk for admin in admins])
+        self.assertFalse(Notification.objects.filter(user=self.chef_user).exists())
+
     def test_thread_access_restricted_to_participants(self):
         outsider = User.objects.create_user(
             email="outsider@example.com",
@@ -120,3 +213,237 @@ class OrderChatThreadTests(TestCase):
         self.authenticate(self.chef_user)
         response = self.api_client.get(url)
         self.assertEqual(response.status_code, 200)
+
+
+@override_settings(CHAT_WRITE_BEHIND=True)
+class OrderMessageWriteBehindTests(TestCase):
+    def setUp(self):
+        flush_order_messages()
+        self.api_client = APIClient()
+        self.client_user = User.objects.create_user(email="wb-client@example.com", password="password123")
+        self.chef_user = User.objects.create_user(email="wb-chef@example.com", password="password123")
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(
+                client=Client.objects.create(user=self.client_user),
+                chef=ChefProfile.objects.create(user=self.chef_user),
+            )
+        self.thread = order.chat_thread
+        self.url = reverse("chats_api:send_order_thread_message", args=[order.order_id])
+
+    def test_messages_are_acknowledged_then_written_in_order(self):
+        self.api_client.credentials(HTTP_AUTHORIZATION=f"Token {self.client_user.auth_token.key}")
+        for body in ("one", "two", "three", "four", "five"):
+            response = self.api_client.post(self.url, {"body": body}, format="json")
+            self.assertEqual(response.status_code, 202)
+            self.assertIsNone(response.data["id"])
+        self.assertFalse(OrderMessage.objects.exists())
+
+        report = flush_order_messages(batch_size=2)
+        self.assertEqual((report.written, report.batches), (5, 3))
+        messages = list(self.thread.messages.all())
+        self.assertEqual([message.body for message in messages], ["one", "two", "three", "four", "five"])
+        self.assertEqual(sorted(messages, key=lambda message: message.pk), messages)
+
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.updated_at, messages[-1].created_at)
+        self.assertEqual(Notification.objects.filter(user=self.chef_user).count(), 5)
+
+    def test_a_batch_is_one_insert_and_one_bump_per_thread(self):
+        for body in ("a", "b", "c"):
+            self.thread.record_message(sender=self.client_user, body=body)
+        other = self.thread.record_message(sender=self.chef_user, body="gone")
+        # Notifications are not under test here
+        Notification.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            write_batch = message_queue().read(10)
+            _write_batch(write_batch, FlushReport())
+            message_queue().ack([entry_id for entry_id, _ in write_batch])
+        writes = [query["sql"] for query in queries.captured_queries if query["sql"].startswith(("INSERT", "UPDATE"))]
+        self.assertEqual(len(writes), 2)
+        self.assertEqual(OrderMessage.objects.count(), 4)
+        self.assertIsNone(other.pk)
+
+    def test_a_batch_replayed_after_commit_is_not_written_or_notified_twice(self):
+        for body in ("one", "two"):
+            self.thread.record_message(sender=self.client_user, body=body)
+        # The batch commits, then the worker dies before acknowledging it
+        _write_batch(message_queue().read(10), FlushReport())
+        self.thread.record_message(sender=self.client_user, body="three")
+
+        report = flush_order_messages()
+        self.assertEqual((report.written, report.replayed), (1, 2))
+        self.assertEqual(list(self.thread.messages.values_list("body", flat=True)), ["one", "two", "three"])
+        self.assertEqual(Notification.objects.filter(user=self.chef_user).count(), 1)
+        self.assertEqual(len(message_queue()), 0)
+
+    def test_the_local_queue_cannot_be_flushed_from_another_process(self):
+        with self.assertRaises(CommandError):
+            call_command("flush_chat_messages")
+
+    def test_messages_for_deleted_threads_are_dropped(self):
+        self.thread.record_message(sender=self.client_user, body="kept")
+        message_queue().add({
+            "thread_id": 999999,
+            "sender_id": self.client_user.pk,
+            "body": "lost",
+            "template_id": None,
+            "metadata": {},
+            "created_at": "2026-01-01T00:00:00+00:00",
+        })
+        with self.assertLogs("chats.write_behind", "WARNING"):
+            report = flush_order_messages()
+        self.assertEqual((report.written, report.dropped), (1, 1))
+        self.assertEqual(len(message_queue()), 0)
+
+
+IN_MEMORY_CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+class ListRecentMessages:
+    """Stands in for the redis list behind CHAT_HISTORY_REDIS_URL."""
+
+    size = 50
+
+    def __init__(self):
+        self.rooms = defaultdict(list)
+
+    def push(self, room_id, message):
+        self.rooms[room_id] = [message, *self.rooms[room_id]][: self.size]
+
+    def prime(self, room_id, messages):
+        if not self.rooms[room_id]:
+            self.rooms[room_id] = list(messages[: self.size])
+
+    def recent(self, room_id):
+        return list(self.rooms[room_id])
+
+    def clear(self, room_id=None):
+        self.rooms.clear()
+
+
+class RoomChatHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="room-user@example.com", password="password123", first_name="Room")
+        self.room = PrivateChatRoom.objects.create(room_id="ROOM-1", client=self.user)
+
+    def _post(self, count):
+        for index in range(count):
+            remember_message(PrivateRoomChatMessage.objects.create(user=self.user, room=self.room, message=f"Message {index}"))
+
+    def test_without_a_shared_buffer_history_is_read_from_the_database(self):
+        self._post(25)
+        # Written by another process, so never pushed to this one
+        PrivateRoomChatMessage.objects.create(user=self.user, room=self.room, message="Elsewhere")
+        newest_id = PrivateRoomChatMessage.objects.latest("id").id
+
+        with self.assertNumQueries(1):
+            page, next_before = message_history(self.room.pk, limit=20)
+        self.assertEqual(page[0]["message"], "Elsewhere")
+        self.assertEqual([message["id"] for message in page], list(range(newest_id, newest_id - 20, -1)))
+        self.assertEqual(next_before, newest_id - 19)
+
+        page, next_before = message_history(self.room.pk, before=next_before, limit=20)
+        self.assertEqual(len(page), 6)
+        self.assertIsNone(next_before)
+
+    @override_settings(CHAT_HISTORY_REDIS_URL="redis://example.invalid:6379/0")
+    def test_redis_url_without_redis_py_is_refused(self):
+        with mock.patch("chats.history.redis", None), mock.patch("chats.history._buffer", None):
+            with self.assertRaises(ImproperlyConfigured):
+                recent_messages_buffer()
+
+    @mock.patch("chats.history._buffer", new_callable=ListRecentMessages)
+    def test_history_pages_by_cursor_from_the_ring_buffer(self, buffer):
+        self._post(30)
+        newest_id = PrivateRoomChatMessage.objects.latest("id").id
+
+        with self.assertNumQueries(0):
+            page, next_before = message_history(self.room.pk, limit=20)
+        self.assertEqual([message["id"] for message in page], list(range(newest_id, newest_id - 20, -1)))
+        self.assertEqual(next_before, newest_id - 19)
+
+        # A short page may just mean the buffer ends here, so the table confirms it
+        with self.assertNumQueries(1):
+            page, next_before = message_history(self.room.pk, before=next_before, limit=20)
+        self.assertEqual(len(page), 10)
+        self.assertIsNone(next_before)
+
+    @mock.patch("chats.history._buffer", new_callable=ListRecentMessages)
+    def test_cold_rooms_are_loaded_once_and_older_pages_fall_back_to_the_database(self, buffer):
+        self._post(60)
+        buffer.clear()
+        oldest_id = PrivateRoomChatMessage.objects.earliest("id").id
+
+        page, _ = message_history(self.room.pk, limit=5)
+        self.assertEqual(page[0]["message"], "Message 59")
+        with self.assertNumQueries(0):
+            message_history(self.room.pk, limit=5)
+
+        # The buffer keeps the newest 50 messages; anything older is read from the table
+        page, next_before = message_history(self.room.pk, before=oldest_id + 12, limit=20)
+        self.assertEqual([message["id"] for message in page], list(range(oldest_id + 11, oldest_id - 1, -1)))
+        self.assertIsNone(next_before)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class RoomChatConsumerTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="socket-user@example.com", password="password123", first_name="Socket")
+        self.shop = User.objects.create_user(email="socket-shop@example.com", password="password123", first_name="Shop")
+        self.outsider = User.objects.create_user(email="socket-outsider@example.com", password="password123")
+        self.room = PrivateChatRoom.objects.create(room_id="ROOM-2", client=self.user, shop=self.shop)
+        PrivateRoomChatMessage.objects.create(user=self.user, room=self.room, message="Earlier")
+
+    def _communicator(self, user=None, token=None):
+        if token is not None:
+            return WebsocketCommunicator(TokenAuthMiddlewareStack(BookingChatConsumers.as_asgi()), f"/ws/chat-rooms/?token={token}")
+        communicator = WebsocketCommunicator(BookingChatConsumers.as_asgi(), "/ws/chat-rooms/")
+        if user is not None:
+            communicator.scope["user"] = user
+        return communicator
+
+    def test_join_sends_history_and_send_broadcasts_only_the_new_message(self):
+        token = Token.objects.get(user=self.user).key
+
+        async def scenario():
+            first = self._communicator(token=token)
+            second = self._communicator(user=self.shop)
+            for communicator in (first, second):
+                connected, _ = await communicator.connect()
+                self.assertTrue(connected)
+                await communicator.send_json_to({"command": "join", "room_id": "ROOM-2"})
+                history = await communicator.receive_json_from()
+                self.assertEqual(history["type"], "history")
+                self.assertEqual([message["message"] for message in history["messages"]], ["Earlier"])
+
+            # A spoofed user_id is ignored; the sender is the authenticated user
+            await first.send_json_to({"command": "send", "room_id": "ROOM-2", "user_id": self.shop.user_id, "message": "Hello"})
+            for communicator in (first, second):
+                event = await communicator.receive_json_from()
+                self.assertEqual(event["type"], "message")
+                self.assertEqual(event["message"]["message"], "Hello")
+                self.assertEqual(event["message"]["user"]["user_id"], self.user.user_id)
+                self.assertTrue(await communicator.receive_nothing())
+                await communicator.disconnect()
+
+        async_to_sync(scenario)()
+        self.assertEqual(PrivateRoomChatMessage.objects.latest("id").message, "Hello")
+
+    def test_unauthenticated_and_non_member_sockets_are_rejected(self):
+        async def scenario():
+            anonymous = self._communicator(token="not-a-token")
+            connected, code = await anonymous.connect()
+            self.assertFalse(connected)
+            self.assertEqual(code, UNAUTHENTICATED_CLOSE_CODE)
+
+            outsider = self._communicator(user=self.outsider)
+            await outsider.connect()
+            await outsider.send_json_to({"command": "send", "room_id": "ROOM-2", "message": "Hi"})
+            self.assertEqual((await outsider.receive_json_from())["error"], "NOT_IN_ROOM")
+            await outsider.send_json_to({"command": "join", "room_id": "ROOM-2"})
+            self.assertEqual((await outsider.receive_json_from())["error"], "ROOM_ACCESS_DENIED")
+            await outsider.disconnect()
+
+        async_to_sync(scenario)()
+        self.assertEqual(PrivateRoomChatMessage.objects.count(), 1)
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+try:  # pragma: no cover - exercised only where redis-py is installed
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+from chats.fanout import notify_message_participants
+from chats.models import OrderChatThread, OrderMessage
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "chat:order_messages"
+CONSUMER_GROUP = "chat-message-writers"
+# Entries a crashed worker read but never acknowledged are taken over after this long
+RECLAIM_IDLE_MS = 60_000
+
+
+class LocalMessageQueue:
+    """
+    In-process stand-in for the Redis stream, used by the test suite. Entries
+    are lost with the process, so outside tests CHAT_WRITE_BEHIND requires
+    CHAT_WRITE_BEHIND_REDIS_URL (see settings).
+    """
+
+    def __init__(self):
+        self._entries = deque()
+        self._in_flight = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, payload: dict) -> str:
+        # Unique across processes and restarts, as it is stored on the written message
+        entry_id = uuid.uuid4().hex
+        with self._lock:
+            self._entries.append((entry_id, payload))
+        return entry_id
+
+    def read(self, count: int) -> list[tuple[str, dict]]:
+        with self._lock:
+            # Unacknowledged entries go out again first, keeping their order
+            batch = list(self._in_flight.items())[:count]
+            while len(batch) < count and self._entries:
+                entry_id, payload = self._entries.popleft()
+                self._in_flight[entry_id] = payload
+                batch.append((entry_id, payload))
+            return batch
+
+    def ack(self, entry_ids) -> None:
+        with self._lock:
+            for entry_id in entry_ids:
+                self._in_flight.pop(entry_id, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries) + len(self._in_flight)
+
+
+class RedisMessageQueue:
+    """Redis stream read through a consumer group; entries are deleted once written."""
+
+    def __init__(self, url: str):
+        self.client = redis.Redis.from_url(url)
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        try:
+            self.client.xgroup_create(STREAM_KEY, CONSUMER_GROUP, id="0", mkstream=True)
+        except redis.ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    def add(self, payload: dict) -> str:
+        entry_id = self.client.xadd(STREAM_KEY, {"payload": json.dumps(payload)})
+        return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+
+    def _decode(self, entries) -> list[tuple[str, dict]]:
+        batch = []
+        for entry_id, fields in entries:
+            entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+            batch.append((entry_id, json.loads(fields[b"payload"])))
+        return batch
+
+    def read(self, count: int) -> list[tuple[str, dict]]:
+        # Our own pending entries first, then anything abandoned by a dead worker, then new ones
+        pending = self.client.xreadgroup(CONSUMER_GROUP, self.consumer, {STREAM_KEY: "0"}, count=count)
+        batch = self._decode(pending[0][1]) if pending else []
+        if len(batch) < count:
+            _, claimed, *_ = self.client.xautoclaim(
+                STREAM_KEY, CONSUMER_GROUP, self.consumer, RECLAIM_IDLE_MS, count=count - len(batch)
+            )
+            batch.extend(self._decode(claimed))
+        if len(batch) < count:
+            fresh = self.client.xreadgroup(CONSUMER_GROUP, self.consumer, {STREAM_KEY: ">"}, count=count - len(batch))
+            if fresh:
+                batch.extend(self._decode(fresh[0][1]))
+        return batch
+
+    def ack(self, entry_ids) -> None:
+        if not entry_ids:
+            return
+        pipe = self.client.pipeline()
+        pipe.xack(STREAM_KEY, CONSUMER_GROUP, *entry_ids)
+        pipe.xdel(STREAM_KEY, *entry_ids)
+        pipe.execute()
+
+    def __len__(self):
+        return self.client.xlen(STREAM_KEY)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+# One flush at a time per process, whether from a task, a command or shutdown
+_flush_lock = threading.Lock()
+
+
+def message_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                if settings.CHAT_WRITE_BEHIND_REDIS_URL:
+                    if redis is None:
+                        raise ImproperlyConfigured("CHAT_WRITE_BEHIND_REDIS_URL is set but redis-py is not installed.")
+                    _queue = RedisMessageQueue(settings.CHAT_WRITE_BEHIND_REDIS_URL)
+                else:
+                    _queue = LocalMessageQueue()
+    return _queue
+
+
+def enqueue_order_message(thread, sender, body, template=None, metadata=None) -> OrderMessage:
+    """
+    Put a message on the durable queue and return it unsaved (``pk`` is None).
+    ``created_at`` is fixed here so the thread keeps the order messages were sent in.
+    """
+    message = OrderMessage(
+        thread=thread,
+        sender=sender,
+        body=body,
+        template=template,
+        metadata=metadata or {},
+        created_at=timezone.now(),
+    )
+    message.queue_id = message_queue().add(
+        {
+            "thread_id": thread.pk,
+            "sender_id": sender.pk,
+            "body": body,
+            "template_id": template.pk if template else None,
+            "metadata": message.metadata,
+            "created_at": message.created_at.isoformat(),
+        }
+    )
+    return message
+
+
+@dataclass
+class FlushReport:
+    written: int = 0
+    dropped: int = 0
+    # Entries already in the table from a batch that was not acknowledged
+    replayed: int = 0
+    batches: int = 0
+
+
+def _build_message(entry_id: str, payload: dict) -> OrderMessage:
+    return OrderMessage(
+        queue_id=entry_id,
+        thread_id=payload["thread_id"],
+        sender_id=payload["sender_id"],
+        body=payload["body"],
+        template_id=payload["template_id"],
+        metadata=payload["metadata"],
+        created_at=parse_datetime(payload["created_at"]),
+    )
+
+
+def _write_batch(batch: list[tuple[str, dict]], report: FlushReport) -> list[OrderMessage]:
+    messages = [_build_message(entry_id, payload) for entry_id, payload in batch]
+    # Entries written by a batch that committed but was never acknowledged
+    written = set(OrderMessage.objects.filter(queue_id__in=[message.queue_id for message in messages]).values_list("queue_id", flat=True))
+    report.replayed += len(written)
+    messages = [message for message in messages if message.queue_id not in written]
+    # Threads go away with their order; messages queued for them have nowhere to land
+    live_threads = set(
+        OrderChatThread.objects.filter(pk__in={message.thread_id for message in messages}).values_list("pk", flat=True)
+    )
+    for message in messages:
+        if message.thread_id not in live_threads:
+            report.dropped += 1
+            logger.warning("Dropping queued chat message for missing thread %s", message.thread_id)
+    messages = [message for message in messages if message.thread_id in live_threads]
+
+    # Conflicts on queue_id mean another flush wrote the entry meanwhile
+    try:
+        with transaction.atomic():
+            OrderMessage.objects.bulk_create(messages, ignore_conflicts=True)
+    except IntegrityError:
+        # A sender or template disappeared since the message was queued; keep the rest
+        for message in messages:
+            try:
+                with transaction.atomic():
+                    OrderMessage.objects.bulk_create([message], ignore_conflicts=True)
+            except IntegrityError:
+                report.dropped += 1
+                logger.warning("Dropping queued chat message from missing sender %s", message.sender_id)
+    # Conflict-ignoring inserts return no primary keys
+    created = list(OrderMessage.objects.filter(queue_id__in=[message.queue_id for message in messages]).order_by("created_at", "pk"))
+
+    latest = {}
+    for message in created:
+        latest[message.thread_id] = max(latest.get(message.thread_id, message.created_at), message.created_at)
+    for thread_id, updated_at in latest.items():
+        OrderChatThread.objects.filter(pk=thread_id).update(updated_at=updated_at)
+    return created
+
+
+def flush_order_messages(batch_size: int | None = None, max_batches: int | None = None) -> FlushReport:
+    """
+    Write queued messages in stream order with ``bulk_create`` and bump each
+    thread's ``updated_at`` once per batch. Entries are acknowledged only after
+    their batch is committed, so a crash replays rather than loses them; each
+    message stores its entry id, so a replayed entry is neither written nor
+    notified twice.
+    """
+    batch_size = batch_size or settings.CHAT_WRITE_BEHIND_BATCH_SIZE
+    queue = message_queue()
+    report = FlushReport()
+    with _flush_lock:
+        while max_batches is None or report.batches < max_batches:
+            batch = queue.read(batch_size)
+            if not batch:
+                break
+            created = _write_batch(batch, report)
+            queue.ack([entry_id for entry_id, _ in batch])
+            report.written += len(created)
+            report.batches += 1
+            # Off the request path already: one fan-out for the whole batch
+            notify_message_participants([message.pk for message in created])
+    return report
+
+
+def flush_on_shutdown(**kwargs) -> None:
+    """Drain the queue before a Celery worker exits (worker_shutdown)."""
+    if _queue is None or not len(_queue):
+        return
+    try:
+        report = flush_order_messages()
+        logger.info("Flushed %s queued chat messages on shutdown", report.written)
+    except Exception:  # pragma: no cover - nothing left to report to at exit
+        logger.exception("Could not flush queued chat messages on shutdown")
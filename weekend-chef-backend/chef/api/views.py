@@ -1,6 +1,5 @@
 
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 from rest_framework import status
 from rest_framework.authentication import TokenAuthentication
@@ -16,6 +15,7 @@ from clients.api.serializers import AllClientsSerializer, ClientDetailsSerialize
 
 from clients.models import Client, ClientComplaint
 from food.models import FoodCategory
+from weekend_chef_project.pagination import KeysetPaginator
 
 User = get_user_model()
 
@@ -117,8 +117,6 @@ def get_parent_categories_for_dish_and_chef(request):
     dish_id = request.query_params.get('dish_id', None)
     chef_id = request.query_params.get('chef_id', None)
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
 
     # Ensure dish_id and chef_id are provided
     if not dish_id or not chef_id:
@@ -154,25 +152,20 @@ def get_parent_categories_for_dish_and_chef(request):
     parent_categories = parent_categories.filter(dishes__dish_id__in=chef_dishes)
 
     # Step 4: Paginate the results
-    paginator = Paginator(parent_categories, page_size)
-    try:
-        paginated_parent_categories = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_parent_categories = paginator.page(1)
-    except EmptyPage:
-        paginated_parent_categories = paginator.page(paginator.num_pages)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+
+    paginated_parent_categories = paginator.paginate(parent_categories)
 
     # Step 5: Serialize the parent categories
     parent_categories_serializer = AllFoodCategorysSerializer(paginated_parent_categories, many=True)
 
     # Prepare response data
     data['parent_categories'] = parent_categories_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_parent_categories.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_parent_categories.next_page_number() if paginated_parent_categories.has_next() else None,
-        'previous': paginated_parent_categories.previous_page_number() if paginated_parent_categories.has_previous() else None,
-    }
+    data['pagination'] = paginated_parent_categories.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -192,8 +185,6 @@ def get_sub_categories_for_category_and_chef(request):
     category_id = request.query_params.get('category_id', None)
     chef_id = request.query_params.get('chef_id', None)
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
 
     # Ensure category_id and chef_id are provided
     if not category_id or not chef_id:
@@ -223,25 +214,20 @@ def get_sub_categories_for_category_and_chef(request):
         )
 
     # Step 4: Paginate the results
-    paginator = Paginator(sub_categories, page_size)
-    try:
-        paginated_sub_categories = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_sub_categories = paginator.page(1)
-    except EmptyPage:
-        paginated_sub_categories = paginator.page(paginator.num_pages)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+
+    paginated_sub_categories = paginator.paginate(sub_categories)
 
     # Step 5: Serialize the subcategories
     sub_categories_serializer = AllFoodCategorysSerializer(paginated_sub_categories, many=True)
 
     # Prepare response data
     data['sub_categories'] = sub_categories_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_sub_categories.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_sub_categories.next_page_number() if paginated_sub_categories.has_next() else None,
-        'previous': paginated_sub_categories.previous_page_number() if paginated_sub_categories.has_previous() else None,
-    }
+    data['pagination'] = paginated_sub_categories.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -262,8 +248,6 @@ def get_dishes_by_category_and_chef(request):
     category_id = request.query_params.get('category_id', None)
     chef_id = request.query_params.get('chef_id', None)
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
 
     # Ensure category_id and chef_id are provided
     if not category_id or not chef_id:
@@ -298,25 +282,20 @@ def get_dishes_by_category_and_chef(request):
     dishes = dishes.filter(dish_id__in=dish_ids_for_chef)
 
     # Step 5: Paginate the results
-    paginator = Paginator(dishes, page_size)
-    try:
-        paginated_dishes = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_dishes = paginator.page(1)
-    except EmptyPage:
-        paginated_dishes = paginator.page(paginator.num_pages)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+
+    paginated_dishes = paginator.paginate(dishes)
 
     # Step 6: Serialize the dishes
     dishes_serializer = DishSerializer(paginated_dishes, many=True)
 
     # Prepare response data
     data['dishes'] = dishes_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_dishes.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_dishes.next_page_number() if paginated_dishes.has_next() else None,
-        'previous': paginated_dishes.previous_page_number() if paginated_dishes.has_previous() else None,
-    }
+    data['pagination'] = paginated_dishes.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+from typing import Optional
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cast, Cos, Least, Power, Radians, Sin, Sqrt
+
+from weekend_chef_project.utils import EARTH_RADIUS_KM
+
+GEOHASH_PRECISION = 9
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+@dataclass
+class NearbyChef:
+    chef_id: int
+    distance: float
+
+
+def encode_geohash(lat, lng, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode a coordinate pair into a geohash string of the given precision."""
+    lat, lng = float(lat), float(lng)
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(geohash) < precision:
+        target, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (target[0] + target[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            target[0] = mid
+        else:
+            bits = bits << 1
+            target[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(geohash)
+
+
+def cell_size(precision: int) -> tuple[float, float]:
+    """Return the (lat, lng) span in degrees of a geohash cell."""
+    total_bits = precision * 5
+    lng_bits = math.ceil(total_bits / 2)
+    lat_bits = total_bits // 2
+    return 180 / (2 ** lat_bits), 360 / (2 ** lng_bits)
+
+
+def search_precision(lat, radius_km: float) -> Optional[int]:
+    """
+    Pick the finest precision whose cells are at least ``radius_km`` on each side,
+    so the 3x3 block around the origin cell covers the whole search circle.
+    Returns None when even a single-character cell is too small to prune.
+    """
+    radius_deg = radius_km / KM_PER_DEGREE
+    # Use the latitude furthest from the equator that the circle reaches, where cells are narrowest.
+    widest_lat = min(abs(float(lat)) + radius_deg, 90.0)
+    lng_scale = math.cos(math.radians(widest_lat))
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_span, lng_span = cell_size(precision)
+        if lat_span * KM_PER_DEGREE >= radius_km and lng_span * KM_PER_DEGREE * lng_scale >= radius_km:
+            return precision
+    return None
+
+
+def covering_cells(lat, lng, radius_km: float) -> Optional[set[str]]:
+    """Return the geohash prefixes touching the search circle, or None for no pruning."""
+    precision = search_precision(lat, radius_km)
+    if precision is None:
+        return None
+    lat, lng = float(lat), float(lng)
+    lat_span, lng_span = cell_size(precision)
+    cells = set()
+    for lat_step in (-1, 0, 1):
+        for lng_step in (-1, 0, 1):
+            cell_lat = min(max(lat + lat_step * lat_span, -90.0), 90.0)
+            cell_lng = (lng + lng_step * lng_span + 180) % 360 - 180
+            cells.add(encode_geohash(cell_lat, cell_lng, precision))
+    return cells
+
+
+def candidate_chefs(lat, lng, radius_km: float):
+    """Queryset of servable chefs whose geohash cell touches the search radius."""
+    from chef.models import ChefProfile
+
+    queryset = ChefProfile.objects.filter(
+        active=True,
+        review_status=ChefProfile.ReviewStatus.APPROVED,
+    ).exclude(geohash="")
+    cells = covering_cells(lat, lng, radius_km)
+    if cells is not None:
+        queryset = queryset.filter(reduce(or_, (Q(geohash__startswith=cell) for cell in cells)))
+    return queryset
+
+
+def distance_from(lat, lng):
+    """
+    SQL expression for the great-circle distance in km from the origin to a chef's
+    coordinates, the same formula as ``weekend_chef_project.utils.haversine``.
+    """
+    lat1, lng1 = math.radians(float(lat)), math.radians(float(lng))
+    lat2 = Radians(Cast("lat", FloatField()))
+    lng2 = Radians(Cast("lng", FloatField()))
+    a = Power(Sin((lat2 - lat1) / 2), 2) + math.cos(lat1) * Cos(lat2) * Power(Sin((lng2 - lng1) / 2), 2)
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(Least(a, Value(1.0))))
+
+
+def _matching_chefs(lat, lng, radius_km: float):
+    return (
+        candidate_chefs(lat, lng, radius_km)
+        .annotate(distance=distance_from(lat, lng))
+        .filter(distance__lte=radius_km)
+        .filter(distance__lte=F("service_radius"))
+        .order_by("distance", "pk")
+    )
+
+
+def nearby_chefs(lat, lng, radius_km: float) -> list[NearbyChef]:
+    """
+    Return chefs within ``radius_km`` of the origin who also cover the origin with
+    their own ``service_radius``, closest first (ties broken by chef pk).
+    """
+    return [NearbyChef(*row) for row in _matching_chefs(lat, lng, radius_km).values_list("pk", "distance")]
+
+
+def nearby_chefs_page(lat, lng, radius_km: float, limit: int, after: Optional[tuple] = None):
+    """
+    One keyset page of ``nearby_chefs`` ordered by (distance, chef_id), starting
+    strictly after the ``after`` position. Returns ``(page, has_next)``. The
+    distance, the cursor and the page size are all applied in SQL, so only the
+    page (plus one row to detect a next page) is loaded.
+    """
+    matches = _matching_chefs(lat, lng, radius_km)
+    if after is not None:
+        distance, chef_pk = after
+        matches = matches.filter(Q(distance__gt=distance) | Q(distance=distance, pk__gt=chef_pk))
+    page = [NearbyChef(*row) for row in matches.values_list("pk", "distance")[: limit + 1]]
+    return page[:limit], len(page) > limit
+
+
+def geohash_for(lat, lng) -> str:
+    if lat is None or lng is None:
+        return ""
+    return encode_geohash(lat, lng)
+
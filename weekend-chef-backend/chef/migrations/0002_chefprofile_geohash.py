@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+from chef.geo import geohash_for
+
+
+def backfill_geohash(apps, schema_editor):
+    ChefProfile = apps.get_model("chef", "ChefProfile")
+    profiles = list(ChefProfile.objects.only("pk", "lat", "lng"))
+    for profile in profiles:
+        profile.geohash = geohash_for(profile.lat, profile.lng)
+    ChefProfile.objects.bulk_update(profiles, ["geohash"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chef", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chefprofile",
+            name="geohash",
+            field=models.CharField(
+                blank=True, db_index=True, default="", max_length=12
+            ),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -11,8 +11,9 @@ from decimal import Decimal
 
 from django.core.exceptions import ValidationError
 
+from chef.geo import geohash_for
 from food.models import Dish
-from weekend_chef_project.utils import unique_chef_id_generator
+from weekend_chef_project.utils import unique_chef_id_generator, unique_review_id_generator
 
 
 User = get_user_model()
@@ -89,6 +90,7 @@ class ChefProfile(models.Model):
     kitchen_location = models.CharField(max_length=5000, null=True, blank=True)
     lat = models.DecimalField(default=0.0, max_digits=50, decimal_places=20, null=True, blank=True)
     lng = models.DecimalField(default=0.0, max_digits=50, decimal_places=20, null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default="", db_index=True)
 
     service_radius = models.IntegerField(default=10)  # km
     availability = models.CharField(max_length=100, choices=CHEF_AVAILABILITY, null=True, blank=True)
@@ -113,6 +115,11 @@ class ChefProfile(models.Model):
     def save(self, *args, **kwargs):
         if self.review_status != self.ReviewStatus.PENDING and self.reviewed_at is None:
             self.reviewed_at = timezone.now()
+        # Keep the geo index cell in step with the kitchen coordinates
+        self.geohash = geohash_for(self.lat, self.lng)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"lat", "lng"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
         super().save(*args, **kwargs)
 
 
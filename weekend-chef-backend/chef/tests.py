@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework import status
@@ -6,7 +8,9 @@ from rest_framework.test import APITestCase
 
 from accounts.models import User
 from food.models import FoodCategory, Dish, DishIngredient, CustomizationOption, FoodCustomization
+from weekend_chef_project.utils import haversine
 
+from chef.geo import KM_PER_DEGREE, covering_cells, encode_geohash, nearby_chefs, nearby_chefs_page
 from chef.models import ChefDocument, ChefProfile
 
 
@@ -96,3 +100,56 @@ class ChefProfileAPITests(APITestCase):
         response = self.client.get(detail_url)
         self.assertEqual(response.data["menu_version"], 2)
         self.assertEqual(len(response.data["versions"]), 2)
+
+
+class ChefGeoIndexTests(APITestCase):
+    def _chef(self, email, lat, lng, **kwargs):
+        user = User.objects.create_user(email=email, password="secret", first_name="Geo", last_name="Chef")
+        defaults = {"active": True, "review_status": ChefProfile.ReviewStatus.APPROVED, "service_radius": 25}
+        defaults.update(kwargs)
+        return ChefProfile.objects.create(user=user, lat=lat, lng=lng, **defaults)
+
+    def test_geohash_follows_coordinates(self):
+        chef = self._chef("geo-a@test.com", "5.6037", "-0.1870")
+        self.assertEqual(chef.geohash, encode_geohash(5.6037, -0.1870))
+        chef.lat, chef.lng = "6.6885", "-1.6244"
+        chef.save(update_fields=["lat", "lng"])
+        chef.refresh_from_db()
+        self.assertEqual(chef.geohash, encode_geohash(6.6885, -1.6244))
+
+    def test_nearby_chefs_prunes_and_honours_profile_flags(self):
+        close = self._chef("geo-close@test.com", "5.6100", "-0.1900")
+        farther = self._chef("geo-farther@test.com", "5.6500", "-0.2300")
+        self._chef("geo-kumasi@test.com", "6.6885", "-1.6244")
+        self._chef("geo-inactive@test.com", "5.6040", "-0.1880", active=False)
+        self._chef("geo-pending@test.com", "5.6040", "-0.1880", review_status=ChefProfile.ReviewStatus.PENDING)
+        self._chef("geo-small-radius@test.com", "5.6500", "-0.2300", service_radius=1)
+
+        matches = nearby_chefs(Decimal("5.6037"), Decimal("-0.1870"), 20)
+        self.assertEqual([match.chef_id for match in matches], [close.pk, farther.pk])
+        self.assertLess(matches[0].distance, matches[1].distance)
+
+    def test_pages_are_cut_in_sql_and_break_distance_ties_by_pk(self):
+        first = self._chef("geo-tie-a@test.com", "5.6100", "-0.1900")
+        second = self._chef("geo-tie-b@test.com", "5.6100", "-0.1900")
+        third = self._chef("geo-tie-c@test.com", "5.6500", "-0.2300")
+
+        with self.assertNumQueries(1):
+            page, has_next = nearby_chefs_page(Decimal("5.6037"), Decimal("-0.1870"), 20, limit=1)
+        self.assertEqual([match.chef_id for match in page], [first.pk])
+        self.assertTrue(has_next)
+        self.assertAlmostEqual(page[0].distance, haversine(-0.1870, 5.6037, -0.1900, 5.6100), places=6)
+
+        page, has_next = nearby_chefs_page(Decimal("5.6037"), Decimal("-0.1870"), 20, limit=1, after=(page[0].distance, page[0].chef_id))
+        self.assertEqual([match.chef_id for match in page], [second.pk])
+        page, has_next = nearby_chefs_page(Decimal("5.6037"), Decimal("-0.1870"), 20, limit=5, after=(page[0].distance, page[0].chef_id))
+        self.assertEqual([match.chef_id for match in page], [third.pk])
+        self.assertFalse(has_next)
+
+    def test_covering_cells_include_neighbours_across_cell_edges(self):
+        lat, lng = 5.6037, -0.1870
+        for radius in (1, 5, 20, 150):
+            cells = covering_cells(lat, lng, radius)
+            offset = (radius * 0.99) / KM_PER_DEGREE
+            for point in ((lat + offset, lng), (lat - offset, lng), (lat, lng + offset), (lat, lng - offset)):
+                self.assertTrue(any(encode_geohash(*point).startswith(cell) for cell in cells))
@@ -8,11 +8,14 @@ from rest_framework.response import Response
 
 from chef.models import ChefProfile
 from clients.api.serializers import ChefProfileSerializer, ClientDishesSerializer, ClientFoodCategorysSerializer, DishDetailsSerializer, DishIngredientSerializer, FoodCustomizationSerializer, FoodItemSerializer, FoodPairingSerializer
+from food.category_tree import dishes_under_category
 from food.models import Dish, DishGallery, DishIngredient, FoodCategory, FoodCustomization, FoodPairing
+from food.popularity import UNRANKED
+from weekend_chef_project.pagination import KeysetPaginator
 
 
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
-from django.db.models import Q
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce
 
 User = get_user_model()
 
@@ -127,9 +130,9 @@ def get_all_client_dishes_view(request):
 
     # Get query parameters
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
     category_id = request.query_params.get('category_id', '')  
-    page_size = 10
+    include_subcategories = request.query_params.get('include_subcategories', '') in ('1', 'true', 'True')
+    sort = request.query_params.get('sort', '')
 
 
 
@@ -140,13 +143,15 @@ def get_all_client_dishes_view(request):
 
     # Start with all dishes, excluding archived ones
     all_dishs = Dish.objects.filter(is_archived=False)
-    print(all_dishs)
 
 
 
     try:
-        all_dishs = all_dishs.filter(category__id=category_id)
-        print(all_dishs)
+        if include_subcategories:
+            # Resolve the whole subtree from the cached category tree instead of walking it
+            all_dishs = dishes_under_category(int(category_id), all_dishs)
+        else:
+            all_dishs = all_dishs.filter(category__id=category_id)
     except:
         errors['category_id'] = ["Invalid categories format."]
         return Response({"error": errors}, status=status.HTTP_400_BAD_REQUEST)
@@ -155,29 +160,30 @@ def get_all_client_dishes_view(request):
     if search_query:
         all_dishs = all_dishs.filter(Q(name__icontains=search_query)).distinct()
 
+    ordering = ('-pk',)
+    if sort == 'popular':
+        # Precomputed ranking from food.popularity; dishes not ranked yet go last.
+        # The missing rank is filled in so the cursor never has to compare NULLs.
+        all_dishs = all_dishs.annotate(popularity_rank=Coalesce('popularity__rank', Value(UNRANKED)))
+        ordering = ('popularity_rank', '-pk')
+
 
 
     # Paginate the result
-    paginator = Paginator(all_dishs, page_size)
+    paginator = KeysetPaginator(request, ordering=ordering)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_dishs = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_dishs = paginator.page(1)
-    except EmptyPage:
-        paginated_dishs = paginator.page(paginator.num_pages)
+    paginated_dishs = paginator.paginate(all_dishs)
 
     # Serialize the paginated dishes
     all_dishs_serializer = ClientDishesSerializer(paginated_dishs, many=True)
 
     # Prepare the response data
     data['dishes'] = all_dishs_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_dishs.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_dishs.next_page_number() if paginated_dishs.has_next() else None,
-        'previous': paginated_dishs.previous_page_number() if paginated_dishs.has_previous() else None,
-    }
+    data['pagination'] = paginated_dishs.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -196,8 +202,6 @@ def get_all_client_food_categories(request):
 
     # Get query parameters
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
 
     # Filter categories: only those without a parent (main categories)
     all_food_categories = FoodCategory.objects.filter(is_archived=False, parent__isnull=True)
@@ -209,26 +213,20 @@ def get_all_client_food_categories(request):
         )
 
     # Pagination
-    paginator = Paginator(all_food_categories, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_food_categories = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_food_categories = paginator.page(1)
-    except EmptyPage:
-        paginated_food_categories = paginator.page(paginator.num_pages)
+    paginated_food_categories = paginator.paginate(all_food_categories)
 
     # Serialize food categories
     all_food_categories_serializer = ClientFoodCategorysSerializer(paginated_food_categories, many=True)
 
     # Prepare pagination data
     data['food_categories'] = all_food_categories_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_food_categories.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_food_categories.next_page_number() if paginated_food_categories.has_next() else None,
-        'previous': paginated_food_categories.previous_page_number() if paginated_food_categories.has_previous() else None,
-    }
+    data['pagination'] = paginated_food_categories.envelope()
 
     # Return successful response
     payload['message'] = "Successful"
@@ -248,8 +246,6 @@ def get_all_client_food_sub_categories(request):
 
     search_query = request.query_params.get('search', '')
     category_id = request.query_params.get('category_id', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
 
     # Ensure category_id is provided and valid
     if not category_id:
@@ -275,26 +271,20 @@ def get_all_client_food_sub_categories(request):
         all_subcategories = all_subcategories.filter(Q(name__icontains=search_query))
 
     # Paginate the results
-    paginator = Paginator(all_subcategories, page_size)
-    
-    try:
-        paginated_subcategories = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_subcategories = paginator.page(1)
-    except EmptyPage:
-        paginated_subcategories = paginator.page(paginator.num_pages)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+
+    paginated_subcategories = paginator.paginate(all_subcategories)
 
     # Serialize the data
     subcategories_serializer = ClientFoodCategorysSerializer(paginated_subcategories, many=True)
 
     # Prepare the response data
     data['food_categories'] = subcategories_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_subcategories.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_subcategories.next_page_number() if paginated_subcategories.has_next() else None,
-        'previous': paginated_subcategories.previous_page_number() if paginated_subcategories.has_previous() else None,
-    }
+    data['pagination'] = paginated_subcategories.envelope()
 
     payload['message'] = 'Successful'
     payload['data'] = data
@@ -4,6 +4,7 @@ from rest_framework import serializers
 from chef.models import ChefProfile
 from clients.models import Client
 from complaints.models import ClientComplaint
+from food.category_tree import parent_category_names
 from food.models import CustomizationOption, Dish, DishGallery, DishIngredient, FoodCategory, FoodCustomization, FoodPairing
 
 User = get_user_model()
@@ -97,17 +98,8 @@ class DishDetailsSerializer(serializers.ModelSerializer):
         return obj.category.name if obj.category else None
 
     def get_parent_category_names(self, obj):
-        # Initialize a list to store the parent category names
-        parent_categories = []
-        current_category = obj.category
-        
-        # Traverse the category hierarchy upwards to get the parent categories
-        while current_category and current_category.parent:
-            parent_categories.append(current_category.parent.name)
-            current_category = current_category.parent
-        
-        # Return the parent categories (if any), reversed to show the hierarchy from top to bottom
-        return parent_categories[::-1]
+        # Parent categories from the top of the hierarchy down, read from the cached category tree
+        return parent_category_names(obj.category_id)
 
 
         
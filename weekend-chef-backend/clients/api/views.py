@@ -1,6 +1,5 @@
 
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 from rest_framework import status
 from rest_framework.authentication import TokenAuthentication
@@ -15,6 +14,7 @@ from clients.api.serializers import AllClientsSerializer, ClientDetailsSerialize
     ClientComplaintDetailSerializer
 
 from clients.models import Client, ClientHomeLocation
+from weekend_chef_project.pagination import KeysetPaginator
 
 User = get_user_model()
 
@@ -138,8 +138,6 @@ def get_all_clients_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
 
     all_clients = Client.objects.all().filter(user__is_archived=False)
 
@@ -160,25 +158,19 @@ def get_all_clients_view(request):
         )
 
 
-    paginator = Paginator(all_clients, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_clients = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_clients = paginator.page(1)
-    except EmptyPage:
-        paginated_clients = paginator.page(paginator.num_pages)
+    paginated_clients = paginator.paginate(all_clients)
 
     all_clients_serializer = AllClientsSerializer(paginated_clients, many=True)
 
 
     data['clients'] = all_clients_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_clients.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_clients.next_page_number() if paginated_clients.has_next() else None,
-        'previous': paginated_clients.previous_page_number() if paginated_clients.has_previous() else None,
-    }
+    data['pagination'] = paginated_clients.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -525,8 +517,6 @@ def get_all_archived_clients_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
 
     all_clients = Client.objects.all().filter(user__is_archived=True)
 
@@ -547,25 +537,19 @@ def get_all_archived_clients_view(request):
         )
 
 
-    paginator = Paginator(all_clients, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_clients = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_clients = paginator.page(1)
-    except EmptyPage:
-        paginated_clients = paginator.page(paginator.num_pages)
+    paginated_clients = paginator.paginate(all_clients)
 
     all_clients_serializer = AllClientsSerializer(paginated_clients, many=True)
 
 
     data['clients'] = all_clients_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_clients.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_clients.next_page_number() if paginated_clients.has_next() else None,
-        'previous': paginated_clients.previous_page_number() if paginated_clients.has_previous() else None,
-    }
+    data['pagination'] = paginated_clients.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -743,8 +727,6 @@ def get_all_client_complaints_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
 
     all_client_complaints = ClientComplaint.objects.all().filter(is_archived=False)
 
@@ -757,25 +739,19 @@ def get_all_client_complaints_view(request):
         )
 
 
-    paginator = Paginator(all_client_complaints, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_client_complaints = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_client_complaints = paginator.page(1)
-    except EmptyPage:
-        paginated_client_complaints = paginator.page(paginator.num_pages)
+    paginated_client_complaints = paginator.paginate(all_client_complaints)
 
     all_client_complaints_serializer = AllClientComplaintsSerializer(paginated_client_complaints, many=True)
 
 
     data['complaints'] = all_client_complaints_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_client_complaints.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_client_complaints.next_page_number() if paginated_client_complaints.has_next() else None,
-        'previous': paginated_client_complaints.previous_page_number() if paginated_client_complaints.has_previous() else None,
-    }
+    data['pagination'] = paginated_client_complaints.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -934,8 +910,6 @@ def get_all_archived_client_complaints_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
 
     all_client_complaints = ClientComplaint.objects.all().filter(is_archived=True)
 
@@ -948,25 +922,19 @@ def get_all_archived_client_complaints_view(request):
         )
 
 
-    paginator = Paginator(all_client_complaints, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_client_complaints = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_client_complaints = paginator.page(1)
-    except EmptyPage:
-        paginated_client_complaints = paginator.page(paginator.num_pages)
+    paginated_client_complaints = paginator.paginate(all_client_complaints)
 
     all_client_complaints_serializer = AllClientComplaintsSerializer(paginated_client_complaints, many=True)
 
 
     data['complaints'] = all_client_complaints_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_client_complaints.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_client_complaints.next_page_number() if paginated_client_complaints.has_next() else None,
-        'previous': paginated_client_complaints.previous_page_number() if paginated_client_complaints.has_previous() else None,
-    }
+    data['pagination'] = paginated_client_complaints.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
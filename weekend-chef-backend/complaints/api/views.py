@@ -1,6 +1,5 @@
 
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 from rest_framework import status
 from rest_framework.authentication import TokenAuthentication
@@ -15,6 +14,7 @@ from clients.api.serializers import AllClientsSerializer, ClientDetailsSerialize
     ClientComplaintDetailSerializer
 
 from clients.models import Client, ClientComplaint
+from weekend_chef_project.pagination import KeysetPaginator
 
 User = get_user_model()
 
@@ -187,8 +187,6 @@ def get_all_client_complaints_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
 
     all_client_complaints = ClientComplaint.objects.all().filter(is_archived=False)
 
@@ -201,25 +199,19 @@ def get_all_client_complaints_view(request):
         )
 
 
-    paginator = Paginator(all_client_complaints, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_client_complaints = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_client_complaints = paginator.page(1)
-    except EmptyPage:
-        paginated_client_complaints = paginator.page(paginator.num_pages)
+    paginated_client_complaints = paginator.paginate(all_client_complaints)
 
     all_client_complaints_serializer = AllClientComplaintsSerializer(paginated_client_complaints, many=True)
 
 
     data['complaints'] = all_client_complaints_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_client_complaints.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_client_complaints.next_page_number() if paginated_client_complaints.has_next() else None,
-        'previous': paginated_client_complaints.previous_page_number() if paginated_client_complaints.has_previous() else None,
-    }
+    data['pagination'] = paginated_client_complaints.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -378,8 +370,6 @@ def get_all_archived_client_complaints_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
 
     all_client_complaints = ClientComplaint.objects.all().filter(is_archived=True)
 
@@ -392,25 +382,19 @@ def get_all_archived_client_complaints_view(request):
         )
 
 
-    paginator = Paginator(all_client_complaints, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_client_complaints = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_client_complaints = paginator.page(1)
-    except EmptyPage:
-        paginated_client_complaints = paginator.page(paginator.num_pages)
+    paginated_client_complaints = paginator.paginate(all_client_complaints)
 
     all_client_complaints_serializer = AllClientComplaintsSerializer(paginated_client_complaints, many=True)
 
 
     data['complaints'] = all_client_complaints_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_client_complaints.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_client_complaints.next_page_number() if paginated_client_complaints.has_next() else None,
-        'previous': paginated_client_complaints.previous_page_number() if paginated_client_complaints.has_previous() else None,
-    }
+    data['pagination'] = paginated_client_complaints.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -1,6 +1,5 @@
 
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
@@ -12,6 +11,7 @@ from rest_framework.authentication import TokenAuthentication
 from activities.models import AllActivity
 from food.api.serializers import AllDishGallerySerializer, DishDetailsSerializer, DishGalleryDetailsSerializer
 from food.models import Dish, DishGallery
+from weekend_chef_project.pagination import KeysetPaginator
 
 User = get_user_model()
 
@@ -76,9 +76,7 @@ def get_all_dish_gallerys_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
     dish = request.query_params.get('dish', '')
-    page_size = 10
 
     all_dish_gallerys = DishGallery.objects.all().filter(is_archived=False)
 
@@ -95,25 +93,19 @@ def get_all_dish_gallerys_view(request):
             dish__caption__icontains=dish
         ).distinct()
 
-    paginator = Paginator(all_dish_gallerys, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_dish_gallerys = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_dish_gallerys = paginator.page(1)
-    except EmptyPage:
-        paginated_dish_gallerys = paginator.page(paginator.num_pages)
+    paginated_dish_gallerys = paginator.paginate(all_dish_gallerys)
 
     all_dish_gallerys_serializer = AllDishGallerySerializer(paginated_dish_gallerys, many=True)
 
 
     data['dish_gallery'] = all_dish_gallerys_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_dish_gallerys.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_dish_gallerys.next_page_number() if paginated_dish_gallerys.has_next() else None,
-        'previous': paginated_dish_gallerys.previous_page_number() if paginated_dish_gallerys.has_previous() else None,
-    }
+    data['pagination'] = paginated_dish_gallerys.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -313,9 +305,7 @@ def get_all_archived_dish_gallerys_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
     dish = request.query_params.get('dish', '')
-    page_size = 10
 
     all_dish_gallerys = DishGallery.objects.all().filter(is_archived=True)
 
@@ -332,25 +322,19 @@ def get_all_archived_dish_gallerys_view(request):
             dish__caption__icontains=dish
         ).distinct()
 
-    paginator = Paginator(all_dish_gallerys, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_dish_gallerys = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_dish_gallerys = paginator.page(1)
-    except EmptyPage:
-        paginated_dish_gallerys = paginator.page(paginator.num_pages)
+    paginated_dish_gallerys = paginator.paginate(all_dish_gallerys)
 
     all_dish_gallerys_serializer = AllDishGallerySerializer(paginated_dish_gallerys, many=True)
 
 
     data['dish_gallery'] = all_dish_gallerys_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_dish_gallerys.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_dish_gallerys.next_page_number() if paginated_dish_gallerys.has_next() else None,
-        'previous': paginated_dish_gallerys.previous_page_number() if paginated_dish_gallerys.has_previous() else None,
-    }
+    data['pagination'] = paginated_dish_gallerys.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -1,7 +1,6 @@
 
 import json
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
@@ -15,6 +14,7 @@ from chef.models import ChefProfile
 from clients.api.serializers import ChefProfileSerializer, FoodCustomizationSerializer, FoodItemSerializer
 from food.api.serializers import AllDishsSerializer, DishDetailIngredientSerializer, DishDetailsSerializer
 from food.models import CustomizationOption, Dish, DishIngredient, FoodCategory, FoodCustomization, FoodPairing
+from weekend_chef_project.pagination import KeysetPaginator
 
 User = get_user_model()
 
@@ -132,10 +132,8 @@ def get_all_dishs_view(request):
 
     # Get query parameters
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
     categories = request.query_params.get('categories', '')  # categories is expected as a JSON string
     price_value = request.query_params.get('price', '')  # Assuming price filter exists
-    page_size = 10
 
     # Start with all dishes, excluding archived ones
     all_dishs = Dish.objects.filter(is_archived=False)
@@ -172,26 +170,20 @@ def get_all_dishs_view(request):
     #        return Response({"error": errors}, status=status.HTTP_400_BAD_REQUEST)
 
     # Paginate the result
-    paginator = Paginator(all_dishs, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_dishs = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_dishs = paginator.page(1)
-    except EmptyPage:
-        paginated_dishs = paginator.page(paginator.num_pages)
+    paginated_dishs = paginator.paginate(all_dishs)
 
     # Serialize the paginated dishes
     all_dishs_serializer = AllDishsSerializer(paginated_dishs, many=True)
 
     # Prepare the response data
     data['dishes'] = all_dishs_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_dishs.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_dishs.next_page_number() if paginated_dishs.has_next() else None,
-        'previous': paginated_dishs.previous_page_number() if paginated_dishs.has_previous() else None,
-    }
+    data['pagination'] = paginated_dishs.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -447,9 +439,7 @@ def get_all_archived_dishs_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
     category = request.query_params.get('category', '')
-    page_size = 10
 
     all_dishs = Dish.objects.all().filter(is_archived=True)
 
@@ -466,25 +456,19 @@ def get_all_archived_dishs_view(request):
             category__name__icontains=category
         )
 
-    paginator = Paginator(all_dishs, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_dishs = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_dishs = paginator.page(1)
-    except EmptyPage:
-        paginated_dishs = paginator.page(paginator.num_pages)
+    paginated_dishs = paginator.paginate(all_dishs)
 
     all_dishs_serializer = AllDishsSerializer(paginated_dishs, many=True)
 
 
     data['dishes'] = all_dishs_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_dishs.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_dishs.next_page_number() if paginated_dishs.has_next() else None,
-        'previous': paginated_dishs.previous_page_number() if paginated_dishs.has_previous() else None,
-    }
+    data['pagination'] = paginated_dishs.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -1,6 +1,5 @@
 
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
@@ -12,6 +11,7 @@ from rest_framework.authentication import TokenAuthentication
 from activities.models import AllActivity
 from food.api.serializers import AllFoodCategorysSerializer
 from food.models import FoodCategory
+from weekend_chef_project.pagination import KeysetPaginator
 
 User = get_user_model()
 
@@ -86,8 +86,6 @@ def get_all_food_categorys_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
 
     all_food_categorys = FoodCategory.objects.all().filter(is_archived=False).filter(parent__isnull=True) 
 
@@ -99,25 +97,19 @@ def get_all_food_categorys_view(request):
         )
 
 
-    paginator = Paginator(all_food_categorys, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_food_categorys = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_food_categorys = paginator.page(1)
-    except EmptyPage:
-        paginated_food_categorys = paginator.page(paginator.num_pages)
+    paginated_food_categorys = paginator.paginate(all_food_categorys)
 
     all_food_categorys_serializer = AllFoodCategorysSerializer(paginated_food_categorys, many=True)
 
 
     data['food_categories'] = all_food_categorys_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_food_categorys.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_food_categorys.next_page_number() if paginated_food_categorys.has_next() else None,
-        'previous': paginated_food_categorys.previous_page_number() if paginated_food_categorys.has_previous() else None,
-    }
+    data['pagination'] = paginated_food_categorys.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -316,8 +308,6 @@ def get_all_archived_food_categorys_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
 
     all_food_categorys = FoodCategory.objects.all().filter(is_archived=True)
 
@@ -329,25 +319,19 @@ def get_all_archived_food_categorys_view(request):
         )
 
 
-    paginator = Paginator(all_food_categorys, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_food_categorys = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_food_categorys = paginator.page(1)
-    except EmptyPage:
-        paginated_food_categorys = paginator.page(paginator.num_pages)
+    paginated_food_categorys = paginator.paginate(all_food_categorys)
 
     all_food_categorys_serializer = AllFoodCategorysSerializer(paginated_food_categorys, many=True)
 
 
     data['food_categories'] = all_food_categorys_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_food_categorys.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_food_categorys.next_page_number() if paginated_food_categorys.has_next() else None,
-        'previous': paginated_food_categorys.previous_page_number() if paginated_food_categorys.has_previous() else None,
-    }
+    data['pagination'] = paginated_food_categorys.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -1,6 +1,5 @@
 
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
@@ -12,6 +11,7 @@ from rest_framework.authentication import TokenAuthentication
 from activities.models import AllActivity
 from food.api.serializers import AllIngredientSerializer, DishDetailsSerializer, DishIngredientDetailsSerializer
 from food.models import Dish, DishIngredient
+from weekend_chef_project.pagination import KeysetPaginator
 
 User = get_user_model()
 
@@ -103,9 +103,7 @@ def get_all_ingredients_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
     dish = request.query_params.get('dish', '')
-    page_size = 10
 
     all_ingredients = DishIngredient.objects.all().filter(is_archived=False)
 
@@ -122,25 +120,19 @@ def get_all_ingredients_view(request):
             dish__name__icontains=dish
         ).distinct()
 
-    paginator = Paginator(all_ingredients, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_ingredients = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_ingredients = paginator.page(1)
-    except EmptyPage:
-        paginated_ingredients = paginator.page(paginator.num_pages)
+    paginated_ingredients = paginator.paginate(all_ingredients)
 
     all_ingredients_serializer = AllIngredientSerializer(paginated_ingredients, many=True)
 
 
     data['ingredients'] = all_ingredients_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_ingredients.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_ingredients.next_page_number() if paginated_ingredients.has_next() else None,
-        'previous': paginated_ingredients.previous_page_number() if paginated_ingredients.has_previous() else None,
-    }
+    data['pagination'] = paginated_ingredients.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -368,9 +360,7 @@ def get_all_unarchived_ingredient_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
     dish = request.query_params.get('dish', '')
-    page_size = 10
 
     all_ingredients = DishIngredient.objects.all().filter(is_archived=True)
 
@@ -387,25 +377,19 @@ def get_all_unarchived_ingredient_view(request):
             dish__name__icontains=dish
         ).distinct()
 
-    paginator = Paginator(all_ingredients, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_ingredients = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_ingredients = paginator.page(1)
-    except EmptyPage:
-        paginated_ingredients = paginator.page(paginator.num_pages)
+    paginated_ingredients = paginator.paginate(all_ingredients)
 
     all_ingredients_serializer = AllIngredientSerializer(paginated_ingredients, many=True)
 
 
     data['ingredients'] = all_ingredients_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_ingredients.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_ingredients.next_page_number() if paginated_ingredients.has_next() else None,
-        'previous': paginated_ingredients.previous_page_number() if paginated_ingredients.has_previous() else None,
-    }
+    data['pagination'] = paginated_ingredients.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -0,0 +1,118 @@
+"""
+Process-local cache of the FoodCategory tree.
+
+The whole tree is loaded with one query and kept in memory per process. A version
+token in the Django cache is bumped whenever a category is saved or deleted, so every
+process notices the change on its next lookup and reloads. With a per-process cache
+the bump stays in the process that made it, so there the token expires after
+``LOCAL_CACHE_MAX_AGE`` and other processes reload at least that often.
+"""
+from __future__ import annotations
+
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional
+
+from django.core.cache import cache
+
+from food.models import Dish, FoodCategory
+from weekend_chef_project.caching import invalidated_timeout
+
+VERSION_CACHE_KEY = "food:category_tree:version"
+
+_lock = threading.Lock()
+_local = {"version": None, "tree": None}
+
+
+@dataclass
+class CategoryNode:
+    id: int
+    name: str
+    parent_id: Optional[int]
+    path: str
+    is_archived: bool
+    active: bool
+    children: list[int] = field(default_factory=list)
+
+
+class CategoryTree:
+    def __init__(self, rows):
+        self.nodes = {row[0]: CategoryNode(*row) for row in rows}
+        for node in sorted(self.nodes.values(), key=lambda node: node.name):
+            if node.parent_id in self.nodes:
+                self.nodes[node.parent_id].children.append(node.id)
+
+    def get(self, category_id) -> Optional[CategoryNode]:
+        return self.nodes.get(category_id)
+
+    def ancestors(self, category_id) -> list[CategoryNode]:
+        """Ancestors of a category from the root down, excluding the category itself."""
+        ancestors = []
+        node = self.nodes.get(category_id)
+        seen = set()
+        while node is not None and node.parent_id in self.nodes and node.parent_id not in seen:
+            seen.add(node.parent_id)
+            node = self.nodes[node.parent_id]
+            ancestors.append(node)
+        return ancestors[::-1]
+
+    def parent_names(self, category_id) -> list[str]:
+        return [node.name for node in self.ancestors(category_id)]
+
+    def subcategories(self, category_id, include_archived=False) -> list[CategoryNode]:
+        node = self.nodes.get(category_id)
+        if node is None:
+            return []
+        children = [self.nodes[child_id] for child_id in node.children]
+        if include_archived:
+            return children
+        return [child for child in children if not child.is_archived]
+
+    def descendant_ids(self, category_id, include_self=True) -> list[int]:
+        if category_id not in self.nodes:
+            return []
+        ids = [category_id] if include_self else []
+        stack = list(self.nodes[category_id].children)
+        while stack:
+            child_id = stack.pop()
+            ids.append(child_id)
+            stack.extend(self.nodes[child_id].children)
+        return ids
+
+
+def _current_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, invalidated_timeout(None))
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def get_category_tree() -> CategoryTree:
+    version = _current_version()
+    tree = _local["tree"]
+    if tree is not None and _local["version"] == version:
+        return tree
+    with _lock:
+        if _local["tree"] is None or _local["version"] != version:
+            rows = FoodCategory.objects.values_list("id", "name", "parent_id", "path", "is_archived", "active")
+            _local["tree"] = CategoryTree(rows)
+            _local["version"] = version
+        return _local["tree"]
+
+
+def invalidate_category_tree():
+    _local["tree"] = None
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, invalidated_timeout(None))
+
+
+def parent_category_names(category_id) -> list[str]:
+    return get_category_tree().parent_names(category_id)
+
+
+def dishes_under_category(category_id, queryset=None):
+    """Dishes in a category or any of its subcategories."""
+    queryset = Dish.objects.all() if queryset is None else queryset
+    return queryset.filter(category_id__in=get_category_tree().descendant_ids(category_id))
+
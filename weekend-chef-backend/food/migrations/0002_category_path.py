@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:18
+
+from django.db import migrations, models
+
+
+def backfill_paths(apps, schema_editor):
+    FoodCategory = apps.get_model("food", "FoodCategory")
+    categories = list(FoodCategory.objects.only("pk", "parent_id"))
+    parents = {category.pk: category.parent_id for category in categories}
+
+    def path_ids(pk):
+        ids = []
+        while pk is not None and pk not in ids:
+            ids.append(pk)
+            pk = parents.get(pk)
+        return ids[::-1]
+
+    for category in categories:
+        ids = path_ids(category.pk)
+        category.path = "/" + "".join(f"{pk}/" for pk in ids)
+        category.depth = len(ids) - 1
+    FoodCategory.objects.bulk_update(categories, ["path", "depth"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("food", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="foodcategory",
+            name="depth",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="foodcategory",
+            name="path",
+            field=models.CharField(
+                blank=True, db_index=True, default="", max_length=255
+            ),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("food", "0002_category_path"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DishPopularity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField(default=0)),
+                ("order_volume", models.FloatField(default=0)),
+                ("cart_volume", models.FloatField(default=0)),
+                ("rating_average", models.FloatField(blank=True, null=True)),
+                ("rating_count", models.PositiveIntegerField(default=0)),
+                ("rank", models.PositiveIntegerField()),
+                ("category_rank", models.PositiveIntegerField()),
+                ("computed_at", models.DateTimeField()),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dish_popularity",
+                        to="food.foodcategory",
+                    ),
+                ),
+                (
+                    "dish",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="popularity",
+                        to="food.dish",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["rank"],
+                "indexes": [
+                    models.Index(fields=["rank"], name="food_popularity_rank_idx"),
+                    models.Index(
+                        fields=["category", "category_rank"],
+                        name="food_popularity_cat_rank_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models.signals import post_save, pre_save
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
+from django.db.models.signals import post_delete, post_save, pre_save
 
 from weekend_chef_project.utils import unique_custom_option_id_generator, unique_dish_gallery_id_generator, unique_dish_id_generator, unique_ingredient_id_generator
 
@@ -16,9 +18,37 @@ class FoodCategory(models.Model):
     # Parent field to create a hierarchical structure for subcategories
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='subcategories')
 
+    # Materialized ancestry, e.g. "/3/8/21/" for category 21 under 8 under 3
+    path = models.CharField(max_length=255, default='', blank=True, db_index=True)
+    depth = models.PositiveSmallIntegerField(default=0)
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        parent_path = '/'
+        if self.parent_id:
+            parent_path = FoodCategory.objects.values_list('path', flat=True).get(pk=self.parent_id) or '/'
+            if self.pk and f"/{self.pk}/" in parent_path:
+                raise ValidationError("A category cannot be moved under one of its own subcategories.")
+        super().save(*args, **kwargs)
+
+        old_path = self.path
+        new_path = f"{parent_path}{self.pk}/"
+        if new_path == old_path:
+            return
+        new_depth = new_path.count('/') - 2
+        FoodCategory.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+        if old_path:
+            # Re-root the whole subtree in one statement
+            FoodCategory.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (new_depth - self.depth),
+            )
+        self.path = new_path
+        self.depth = new_depth
+
+
 class Dish(models.Model):
     dish_id = models.CharField(max_length=255, blank=True, null=True, unique=True)
     name = models.CharField(max_length=200)
@@ -175,3 +205,29 @@ def pre_save_dish_gallery_id_receiver(sender, instance, *args, **kwargs):
 
 pre_save.connect(pre_save_dish_gallery_id_receiver, sender=DishGallery)
 
+
+
+class DishPopularity(models.Model):
+    """Precomputed popularity ranking, rebuilt periodically by ``food.tasks.refresh_dish_popularity``."""
+    dish = models.OneToOneField(Dish, on_delete=models.CASCADE, related_name='popularity')
+    category = models.ForeignKey(FoodCategory, on_delete=models.CASCADE, related_name='dish_popularity')
+
+    score = models.FloatField(default=0)
+    order_volume = models.FloatField(default=0)
+    cart_volume = models.FloatField(default=0)
+    rating_average = models.FloatField(null=True, blank=True)
+    rating_count = models.PositiveIntegerField(default=0)
+
+    rank = models.PositiveIntegerField()
+    category_rank = models.PositiveIntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['rank']
+        indexes = [
+            models.Index(fields=['rank'], name='food_popularity_rank_idx'),
+            models.Index(fields=['category', 'category_rank'], name='food_popularity_cat_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dish} (#{self.rank})"
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.dispatch import Signal
+from django.utils import timezone
+
+from food.models import Dish, DishPopularity
+
+# Unpurchased cart adds show interest but weigh less than an order
+CART_WEIGHT = 0.25
+# Unrated dishes are treated as if they had a few average ratings
+RATING_PRIOR_MEAN = 3.0
+RATING_PRIOR_WEIGHT = 5
+# Sort position for dishes without a ranking yet, after every ranked one
+UNRANKED = 2 ** 31 - 1
+
+# Sent after the ranking table is rebuilt so cached listings can be dropped
+popularity_refreshed = Signal()
+
+
+@dataclass
+class PopularityReport:
+    ranked: int
+    computed_at: object
+
+
+def decay_weight(day, today, half_life_days: float) -> float:
+    """Weight of activity on ``day``; it halves every ``half_life_days``."""
+    age = max((today - day).days, 0)
+    return 0.5 ** (age / half_life_days)
+
+
+def _decayed_volume(rows, today, half_life_days: float) -> dict[int, float]:
+    volume = defaultdict(float)
+    for row in rows:
+        volume[row["dish_id"]] += row["quantity"] * decay_weight(row["day"], today, half_life_days)
+    return volume
+
+
+def order_volume(since, today, half_life_days: float) -> dict[int, float]:
+    """Ordered quantity per dish, summed per day in the database and decayed here."""
+    from orders.models import Order, OrderItem
+
+    rows = (
+        OrderItem.objects.filter(order__created_at__gte=since)
+        .exclude(order__status=Order.Status.CANCELLED)
+        .annotate(dish_id=F("cart_item__dish_id"), day=TruncDate("order__created_at"))
+        .values("dish_id", "day")
+        .annotate(quantity=Sum("quantity"))
+    )
+    return _decayed_volume(rows, today, half_life_days)
+
+
+def cart_volume(since, today, half_life_days: float) -> dict[int, float]:
+    """Quantity sitting in open carts per dish; purchased carts are already counted as orders."""
+    from orders.models import CartItem
+
+    rows = (
+        CartItem.objects.filter(created_at__gte=since, cart__purchased=False, is_archived=False)
+        .annotate(day=TruncDate("created_at"))
+        .values("dish_id", "day")
+        .annotate(quantity=Sum("quantity"))
+    )
+    return _decayed_volume(rows, today, half_life_days)
+
+
+def dish_ratings(since) -> dict[int, tuple[float, int]]:
+    """Average order rating and number of rated orders per dish."""
+    from orders.models import OrderRating
+
+    rows = (
+        OrderRating.objects.filter(active=True, created_at__gte=since)
+        .values(dish_id=F("order__items__cart_item__dish_id"))
+        .annotate(average=Avg("rating"), count=Count("order", distinct=True))
+    )
+    return {row["dish_id"]: (row["average"], row["count"]) for row in rows if row["dish_id"] is not None}
+
+
+def rating_factor(average: Optional[float], count: int) -> float:
+    """Bayesian average rating relative to the prior, so a single review cannot dominate."""
+    total = (average or 0) * count + RATING_PRIOR_MEAN * RATING_PRIOR_WEIGHT
+    return total / (count + RATING_PRIOR_WEIGHT) / RATING_PRIOR_MEAN
+
+
+def compute_dish_popularity(now=None) -> PopularityReport:
+    """
+    Rebuild the ``DishPopularity`` table from recent order, cart and rating
+    activity. Every live dish gets an overall and a per-category rank.
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    half_life_days = settings.POPULARITY_HALF_LIFE_DAYS
+    since = now - timedelta(days=settings.POPULARITY_WINDOW_DAYS)
+
+    orders = order_volume(since, today, half_life_days)
+    carts = cart_volume(since, today, half_life_days)
+    ratings = dish_ratings(since)
+
+    rows = []
+    for dish_id, category_id in Dish.objects.filter(is_archived=False).values_list("pk", "category_id"):
+        average, count = ratings.get(dish_id, (None, 0))
+        volume = orders.get(dish_id, 0.0) + CART_WEIGHT * carts.get(dish_id, 0.0)
+        rows.append(
+            DishPopularity(
+                dish_id=dish_id,
+                category_id=category_id,
+                score=volume * rating_factor(average, count),
+                order_volume=orders.get(dish_id, 0.0),
+                cart_volume=carts.get(dish_id, 0.0),
+                rating_average=average,
+                rating_count=count,
+                computed_at=now,
+            )
+        )
+
+    # Highest score first; newer dishes win ties
+    rows.sort(key=lambda row: (-row.score, -row.dish_id))
+    category_ranks = defaultdict(int)
+    for rank, row in enumerate(rows, start=1):
+        category_ranks[row.category_id] += 1
+        row.rank = rank
+        row.category_rank = category_ranks[row.category_id]
+
+    with transaction.atomic():
+        DishPopularity.objects.all().delete()
+        DishPopularity.objects.bulk_create(rows, batch_size=500)
+        transaction.on_commit(lambda: popularity_refreshed.send(sender=DishPopularity))
+
+    return PopularityReport(ranked=len(rows), computed_at=now)
+
+
+def popular_dishes(limit: int, category_id=None) -> list[Dish]:
+    """
+    Top ``limit`` dishes from the precomputed ranking, optionally within one
+    category. Falls back to the unranked catalog until the first refresh.
+    """
+    dishes = Dish.objects.filter(is_archived=False, popularity__isnull=False)
+    if category_id is not None:
+        dishes = dishes.filter(popularity__category_id=category_id).order_by("popularity__category_rank")
+    else:
+        dishes = dishes.order_by("popularity__rank")
+    ranked = list(dishes[:limit])
+    if ranked:
+        return ranked
+
+    fallback = Dish.objects.filter(is_archived=False)
+    if category_id is not None:
+        fallback = fallback.filter(category_id=category_id)
+    return list(fallback[:limit])
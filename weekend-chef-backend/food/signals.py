@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from food.category_tree import invalidate_category_tree
+from food.models import FoodCategory
+
+
+@receiver(post_save, sender=FoodCategory)
+@receiver(post_delete, sender=FoodCategory)
+def invalidate_category_tree_on_change(sender, instance, **kwargs):
+    invalidate_category_tree()
+    # Bump again once committed, in case another process reloaded the uncommitted state meanwhile
+    transaction.on_commit(invalidate_category_tree)
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from food.popularity import compute_dish_popularity
+
+
+@shared_task
+def refresh_dish_popularity():
+    report = compute_dish_popularity()
+    return report.ranked
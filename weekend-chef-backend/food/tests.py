@@ -1,3 +1,120 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from food.category_tree import dishes_under_category, get_category_tree, invalidate_category_tree, parent_category_names
+from food.models import Dish, DishPopularity, FoodCategory
+from food.popularity import compute_dish_popularity, popular_dishes
+
+
+class CategoryTreeTests(TestCase):
+    def setUp(self):
+        self.meals = FoodCategory.objects.create(name="Meals")
+        self.local = FoodCategory.objects.create(name="Local dishes", parent=self.meals)
+        self.soups = FoodCategory.objects.create(name="Soups", parent=self.local)
+        self.drinks = FoodCategory.objects.create(name="Drinks")
+
+    def test_paths_are_materialized_and_follow_moves(self):
+        self.soups.refresh_from_db()
+        self.assertEqual(self.soups.path, f"/{self.meals.pk}/{self.local.pk}/{self.soups.pk}/")
+        self.assertEqual(self.soups.depth, 2)
+
+        self.local.parent = self.drinks
+        self.local.save()
+        self.soups.refresh_from_db()
+        self.assertEqual(self.soups.path, f"/{self.drinks.pk}/{self.local.pk}/{self.soups.pk}/")
+        self.assertEqual(self.soups.depth, 2)
+
+        self.meals.parent = self.soups
+        self.meals.save()
+        self.drinks.parent = self.soups
+        with self.assertRaises(ValidationError):
+            self.drinks.save()
+
+    def test_tree_lookups_do_not_query_after_load(self):
+        get_category_tree()
+        with self.assertNumQueries(0):
+            self.assertEqual(parent_category_names(self.soups.pk), ["Meals", "Local dishes"])
+            self.assertEqual([node.name for node in get_category_tree().subcategories(self.meals.pk)], ["Local dishes"])
+            self.assertCountEqual(get_category_tree().descendant_ids(self.meals.pk), [self.meals.pk, self.local.pk, self.soups.pk])
+
+    def test_tree_is_invalidated_on_save_and_delete(self):
+        self.assertEqual(parent_category_names(self.soups.pk), ["Meals", "Local dishes"])
+        self.local.name = "Ghanaian dishes"
+        self.local.save()
+        self.assertEqual(parent_category_names(self.soups.pk), ["Meals", "Ghanaian dishes"])
+        self.local.delete()
+        self.assertIsNone(get_category_tree().get(self.soups.pk))
+
+    @override_settings(LOCAL_CACHE_MAX_AGE=15)
+    def test_version_token_expires_when_the_cache_is_per_process(self):
+        # Another process never sees this bump in a LocMem cache, so the token must not live forever
+        with mock.patch("food.category_tree.cache") as cache:
+            invalidate_category_tree()
+        self.assertEqual(cache.set.call_args.args[2], 15)
+
+        with mock.patch("weekend_chef_project.caching.cache_is_shared", return_value=True), mock.patch("food.category_tree.cache") as cache:
+            invalidate_category_tree()
+        self.assertIsNone(cache.set.call_args.args[2])
+
+    def test_dishes_under_category_include_subcategories(self):
+        light_soup = Dish.objects.create(name="Light Soup", category=self.soups, description="")
+        jollof = Dish.objects.create(name="Jollof", category=self.local, description="")
+        Dish.objects.create(name="Sobolo", category=self.drinks, description="")
+        self.assertCountEqual(dishes_under_category(self.meals.pk), [light_soup, jollof])
+
+
+class DishPopularityTests(TestCase):
+    def setUp(self):
+        from accounts.models import User
+        from chef.models import ChefProfile
+        from clients.models import Client
+
+        self.rice = FoodCategory.objects.create(name="Rice")
+        self.soups = FoodCategory.objects.create(name="Soups")
+        self.jollof = Dish.objects.create(name="Jollof", category=self.rice, description="")
+        self.waakye = Dish.objects.create(name="Waakye", category=self.rice, description="")
+        self.light_soup = Dish.objects.create(name="Light Soup", category=self.soups, description="")
+
+        client_user = User.objects.create_user(email="popular-client@test.com", password="secret")
+        chef_user = User.objects.create_user(email="popular-chef@test.com", password="secret")
+        self.client_profile = Client.objects.create(user=client_user)
+        self.chef = ChefProfile.objects.create(user=chef_user)
+
+    def _order(self, dish, quantity, days_ago=0, rating=None):
+        from orders.models import Cart, CartItem, Order, OrderItem, OrderRating
+
+        cart = Cart.objects.create(client=self.client_profile, purchased=True)
+        item = CartItem.objects.create(cart=cart, dish=dish, quantity=quantity, value="Large", package="Large", package_price=10)
+        order = Order.objects.create(client=self.client_profile, chef=self.chef, cart=cart)
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        OrderItem.objects.create(order=order, cart_item=item, quantity=quantity)
+        if rating is not None:
+            OrderRating.objects.create(order=order, rating=rating)
+        return order
+
+    def test_ranking_uses_decayed_volume_and_ratings(self):
+        self._order(self.jollof, 4)
+        self._order(self.waakye, 6, days_ago=60)
+        self._order(self.light_soup, 4, rating=1)
+
+        report = compute_dish_popularity()
+        self.assertEqual(report.ranked, 3)
+
+        ranking = list(DishPopularity.objects.values_list("dish__name", "rank", "category_rank"))
+        self.assertEqual(ranking, [("Jollof", 1, 1), ("Light Soup", 2, 1), ("Waakye", 3, 2)])
+        self.assertLess(DishPopularity.objects.get(dish=self.light_soup).score, 4)
+
+    def test_popular_dishes_read_the_ranking_in_one_query(self):
+        self.assertEqual([dish.name for dish in popular_dishes(2)], ["Jollof", "Waakye"])
+
+        self._order(self.light_soup, 2)
+        self._order(self.waakye, 1)
+        compute_dish_popularity()
+        with self.assertNumQueries(1):
+            self.assertEqual([dish.name for dish in popular_dishes(2)], ["Light Soup", "Waakye"])
+        with self.assertNumQueries(1):
+            self.assertEqual([dish.name for dish in popular_dishes(5, category_id=self.rice.pk)], ["Waakye", "Jollof"])
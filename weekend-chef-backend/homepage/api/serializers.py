@@ -2,6 +2,7 @@
 from rest_framework import serializers
 
 from food.models import Dish, FoodCategory
+from orders.models import Order, OrderItem
 
 
 class HomeDishsSerializer(serializers.ModelSerializer):
@@ -16,3 +17,24 @@ class HomeFoodCategorysSerializer(serializers.ModelSerializer):
     class Meta:
         model = FoodCategory
         fields = ['id', 'name', 'photo']
+
+
+class HomePendingOrderItemSerializer(serializers.ModelSerializer):
+    dish_name = serializers.CharField(source='cart_item.dish.name', read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = ['dish_name', 'quantity', 'item_total_price']
+
+
+class HomePendingOrderSerializer(serializers.ModelSerializer):
+    client_name = serializers.SerializerMethodField()
+    items = HomePendingOrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['order_id', 'client_name', 'total_price', 'fast_order', 'delivery_window_start', 'delivery_window_end', 'created_at', 'items']
+
+    def get_client_name(self, obj):
+        user = obj.client.user
+        return " ".join(filter(None, [user.first_name, user.last_name]))
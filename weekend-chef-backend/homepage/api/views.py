@@ -1,5 +1,4 @@
 
-from django.contrib.auth import get_user_model
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 from rest_framework import status
@@ -8,9 +7,12 @@ from rest_framework.decorators import api_view, permission_classes, authenticati
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from chef.models import ChefProfile
 from food.api.serializers import AllFoodCategorysSerializer
 from food.models import Dish, FoodCategory
 from homepage.api.serializers import HomeDishsSerializer, HomeFoodCategorysSerializer
+from homepage.metrics import admin_dashboard_metrics, chef_dashboard_metrics
+from homepage.services import chef_pending_orders, global_sections, homepage_users
 from orders.models import Cart, Order
 
 
@@ -32,7 +34,8 @@ def get_homepage_data_view(request):
         errors['user_id'] = "User ID is required"
 
     try:
-        user = get_user_model().objects.get(user_id=user_id)
+        # One query for the user, the item count stored on their open cart and their unread count
+        user = homepage_users().get(user_id=user_id)
     except:
         errors['user_id'] = ['User does not exist.']    
         
@@ -42,20 +45,12 @@ def get_homepage_data_view(request):
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
     
 
-    categories = FoodCategory.objects.filter(is_archived=False, parent__isnull=True)
-    category_serializer = HomeFoodCategorysSerializer(categories, many=True)
-    if category_serializer:
-        dish_categories = category_serializer.data
+    # Categories and popular dishes are shared by all clients and cached until the catalog changes
+    sections = global_sections()
+    dish_categories = sections['dish_categories']
 
-    notifications = user.notifications.all().filter(read=False)
-    notification_count = notifications.count()
-
-    # Safely handle cart
-    cart = Cart.objects.filter(client__user=user).first()
-    cart_item_count = cart.items.all().count() if cart else 0
-
-    all_dishs = Dish.objects.filter(is_archived=False)[:10]
-    all_dishs_serializer = HomeDishsSerializer(all_dishs, many=True)
+    notification_count = user.unread_notification_count
+    cart_item_count = user.cart_item_count or 0
 
 
 
@@ -68,7 +63,7 @@ def get_homepage_data_view(request):
     data['notification_count'] = notification_count
     data['dish_categories'] = dish_categories
     data['cart_item_count'] = cart_item_count
-    data['popular'] = all_dishs_serializer.data
+    data['popular'] = sections['popular']
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -107,19 +102,8 @@ def get_admin_dashboard_data_view(request):
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
     
-    orders = Order.objects.all()
-    order_count = orders.count()
-    print(order_count)
-    data['orders_count'] = order_count
-
-    data['total_sales'] = total_sales
-    data['total_customers'] = total_customers
-    data['total_chefs'] = total_chefs
-
-    data['pending_orders'] = pending_orders
-    data['accepted_orders'] = accepted_orders
-    data['preparation_orders'] = preparation_orders
-    data['delivery_orders'] = delivery_orders
+    # Counters are maintained on writes (homepage.metrics), so this is a single lookup
+    data.update(admin_dashboard_metrics())
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -150,7 +134,7 @@ def get_chef_homepage_data_view(request):
         errors['user_id'] = "User ID is required"
 
     try:
-        user = get_user_model().objects.get(user_id=user_id)
+        user = homepage_users().get(user_id=user_id)
     except:
         errors['user_id'] = ['User does not exist.']    
         
@@ -160,10 +144,15 @@ def get_chef_homepage_data_view(request):
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
     
 
-    notifications = user.notifications.all().filter(read=False)
-    notification_count = notifications.count()
-
+    notification_count = user.unread_notification_count
 
+    chef_id = ChefProfile.objects.filter(user=user).values_list('pk', flat=True).first()
+    if chef_id is not None:
+        metrics = chef_dashboard_metrics(chef_id)
+        total_sales = metrics['total_sales']
+        pending_order_count = metrics['pending_order_count']
+        total_order_count = metrics['total_order_count']
+        pending_orders_list = chef_pending_orders(chef_id)
 
     user_data['user_id'] = user.user_id
     user_data['first_name'] = user.first_name
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from homepage.metrics import rebuild_metrics
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard metric counters from orders, clients and chefs."
+
+    def handle(self, *args, **options):
+        written = rebuild_metrics()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} metric counters."))
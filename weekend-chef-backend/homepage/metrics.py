@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from homepage.models import DailyMetricCounter, MetricCounter
+
+GLOBAL_SCOPE = "all"
+
+ORDERS_TOTAL = "orders.total"
+ORDERS_PLACED = "orders.placed"
+SALES_TOTAL = "orders.sales"
+CUSTOMERS_TOTAL = "customers.total"
+CHEFS_TOTAL = "chefs.total"
+
+# Statuses in which an order's total counts towards sales
+SALE_STATUSES = ("delivered", "completed")
+
+
+def chef_scope(chef_id) -> str:
+    return f"chef:{chef_id}"
+
+
+def status_counter(status: str) -> str:
+    return f"orders.status.{status}"
+
+
+@dataclass
+class MetricChanges:
+    """Counter deltas collected for one event and written together."""
+    totals: dict = field(default_factory=lambda: defaultdict(Decimal))
+    daily: dict = field(default_factory=lambda: defaultdict(Decimal))
+
+    def add(self, scopes, name: str, amount, day=None):
+        for scope in scopes:
+            if day is None:
+                self.totals[(scope, name)] += Decimal(amount)
+            else:
+                self.daily[(scope, name, day)] += Decimal(amount)
+
+
+def _increment(model, deltas: list[tuple[dict, Decimal]]) -> None:
+    """
+    Add each amount to its counter row with two statements whatever the number
+    of rows: create missing rows at zero, then one conditional UPDATE.
+    """
+    deltas = [(lookup, amount) for lookup, amount in deltas if amount]
+    if not deltas:
+        return
+    model.objects.bulk_create([model(value=0, **lookup) for lookup, _ in deltas], ignore_conflicts=True)
+    amount_for_row = Case(
+        *(When(Q(**lookup), then=Value(amount)) for lookup, amount in deltas),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    matching = reduce(or_, (Q(**lookup) for lookup, _ in deltas))
+    model.objects.filter(matching).update(value=F("value") + amount_for_row)
+
+
+def apply_changes(changes: MetricChanges) -> None:
+    with transaction.atomic():
+        _increment(MetricCounter, [
+            ({"scope": scope, "name": name}, amount) for (scope, name), amount in changes.totals.items()
+        ])
+        _increment(DailyMetricCounter, [
+            ({"scope": scope, "name": name, "day": day}, amount) for (scope, name, day), amount in changes.daily.items()
+        ])
+
+
+def _order_scopes(order):
+    return (GLOBAL_SCOPE, chef_scope(order.chef_id))
+
+
+def record_order_placed(order) -> None:
+    scopes = _order_scopes(order)
+    changes = MetricChanges()
+    changes.add(scopes, ORDERS_TOTAL, 1)
+    changes.add(scopes, status_counter(order.status), 1)
+    changes.add(scopes, ORDERS_PLACED, 1, day=timezone.localdate(order.created_at))
+    if order.status in SALE_STATUSES:
+        changes.add(scopes, SALES_TOTAL, order.total_price)
+    apply_changes(changes)
+
+
+def record_order_removed(order) -> None:
+    scopes = _order_scopes(order)
+    changes = MetricChanges()
+    changes.add(scopes, ORDERS_TOTAL, -1)
+    changes.add(scopes, status_counter(order.status), -1)
+    if order.status in SALE_STATUSES:
+        changes.add(scopes, SALES_TOTAL, -order.total_price)
+    apply_changes(changes)
+
+
+def record_status_change(order, old_status: str, new_status: str) -> None:
+    """Move the order between status counters and book (or reverse) its sale."""
+    scopes = _order_scopes(order)
+    today = timezone.localdate()
+    changes = MetricChanges()
+    changes.add(scopes, status_counter(old_status), -1)
+    changes.add(scopes, status_counter(new_status), 1)
+    changes.add(scopes, status_counter(new_status), 1, day=today)
+
+    sold_before = old_status in SALE_STATUSES
+    sold_now = new_status in SALE_STATUSES
+    if sold_now != sold_before:
+        amount = order.total_price if sold_now else -order.total_price
+        changes.add(scopes, SALES_TOTAL, amount)
+        changes.add(scopes, SALES_TOTAL, amount, day=today)
+    apply_changes(changes)
+
+
+def record_profile_count(name: str, amount: int) -> None:
+    changes = MetricChanges()
+    changes.add((GLOBAL_SCOPE,), name, amount)
+    apply_changes(changes)
+
+
+def read_counters(scope: str) -> dict[str, Decimal]:
+    """All running totals of a scope in one indexed query."""
+    return dict(MetricCounter.objects.filter(scope=scope).values_list("name", "value"))
+
+
+def daily_series(scope: str, name: str, since) -> list[tuple]:
+    return list(
+        DailyMetricCounter.objects.filter(scope=scope, name=name, day__gte=since).values_list("day", "value")
+    )
+
+
+def _count(counters, name) -> int:
+    return int(counters.get(name, 0))
+
+
+def admin_dashboard_metrics() -> dict:
+    counters = read_counters(GLOBAL_SCOPE)
+    return {
+        "orders_count": _count(counters, ORDERS_TOTAL),
+        "total_sales": counters.get(SALES_TOTAL, Decimal("0")),
+        "total_customers": _count(counters, CUSTOMERS_TOTAL),
+        "total_chefs": _count(counters, CHEFS_TOTAL),
+        "pending_orders": _count(counters, status_counter("pending")),
+        "accepted_orders": _count(counters, status_counter("accepted")),
+        "preparation_orders": _count(counters, status_counter("cooking")) + _count(counters, status_counter("ready")),
+        "delivery_orders": _count(counters, status_counter("dispatched")),
+    }
+
+
+def chef_dashboard_metrics(chef_id) -> dict:
+    counters = read_counters(chef_scope(chef_id))
+    return {
+        "total_sales": counters.get(SALES_TOTAL, Decimal("0")),
+        "pending_order_count": _count(counters, status_counter("pending")),
+        "total_order_count": _count(counters, ORDERS_TOTAL),
+    }
+
+
+def rebuild_metrics() -> int:
+    """
+    Recompute every counter from the source tables. Used to backfill existing
+    data and to repair drift; returns the number of counter rows written.
+    """
+    from chef.models import ChefProfile
+    from clients.models import Client
+    from orders.models import Order, OrderStatusTransition
+
+    changes = MetricChanges()
+    for row in Order.objects.values("chef_id", "status").annotate(count=Count("id"), sales=Sum("total_price")):
+        scopes = (GLOBAL_SCOPE, chef_scope(row["chef_id"]))
+        changes.add(scopes, ORDERS_TOTAL, row["count"])
+        changes.add(scopes, status_counter(row["status"]), row["count"])
+        if row["status"] in SALE_STATUSES:
+            changes.add(scopes, SALES_TOTAL, row["sales"] or 0)
+
+    placed = Order.objects.values("chef_id", day=TruncDate("created_at")).annotate(count=Count("id"))
+    for row in placed:
+        changes.add((GLOBAL_SCOPE, chef_scope(row["chef_id"])), ORDERS_PLACED, row["count"], day=row["day"])
+
+    transitions = OrderStatusTransition.objects.values(
+        "status", chef_id=F("order__chef_id"), day=TruncDate("changed_at")
+    ).annotate(count=Count("id"))
+    for row in transitions:
+        changes.add((GLOBAL_SCOPE, chef_scope(row["chef_id"])), status_counter(row["status"]), row["count"], day=row["day"])
+
+    # Sales are booked on the day the order first reached a sale status
+    first_sale = (
+        OrderStatusTransition.objects.filter(order=OuterRef("pk"), status__in=SALE_STATUSES)
+        .order_by("changed_at")
+        .values("changed_at")[:1]
+    )
+    sold = (
+        Order.objects.filter(status__in=SALE_STATUSES)
+        .annotate(sold_at=Coalesce(Subquery(first_sale), "status_updated_at"))
+        .values("chef_id", day=TruncDate("sold_at"))
+        .annotate(sales=Sum("total_price"))
+    )
+    for row in sold:
+        changes.add((GLOBAL_SCOPE, chef_scope(row["chef_id"])), SALES_TOTAL, row["sales"] or 0, day=row["day"])
+
+    changes.add((GLOBAL_SCOPE,), CUSTOMERS_TOTAL, Client.objects.count())
+    changes.add((GLOBAL_SCOPE,), CHEFS_TOTAL, ChefProfile.objects.count())
+
+    totals = [MetricCounter(scope=scope, name=name, value=value) for (scope, name), value in changes.totals.items()]
+    daily = [
+        DailyMetricCounter(scope=scope, name=name, day=day, value=value)
+        for (scope, name, day), value in changes.daily.items()
+    ]
+    with transaction.atomic():
+        MetricCounter.objects.all().delete()
+        DailyMetricCounter.objects.all().delete()
+        MetricCounter.objects.bulk_create(totals, batch_size=500)
+        DailyMetricCounter.objects.bulk_create(daily, batch_size=500)
+    return len(totals) + len(daily)
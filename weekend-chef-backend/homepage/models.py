@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class MetricCounter(models.Model):
+    """Running total for a dashboard figure, kept in step by ``homepage.metrics``."""
+    scope = models.CharField(max_length=50)
+    name = models.CharField(max_length=100)
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'name'], name='homepage_metric_counter_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.name}={self.value}"
+
+
+class DailyMetricCounter(models.Model):
+    """Per-day bucket of a dashboard figure (orders placed, status changes, sales)."""
+    scope = models.CharField(max_length=50)
+    name = models.CharField(max_length=100)
+    day = models.DateField()
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'name', 'day'], name='homepage_daily_metric_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.name} {self.day}={self.value}"
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import OuterRef, Prefetch, Subquery
+
+from food.models import FoodCategory
+from food.popularity import popular_dishes
+from homepage.api.serializers import HomeDishsSerializer, HomeFoodCategorysSerializer, HomePendingOrderSerializer
+from notifications.counters import unread_count_subquery
+from orders.models import Cart, Order, OrderItem
+from weekend_chef_project.caching import invalidated_timeout
+
+GLOBAL_SECTIONS_CACHE_KEY = "homepage:global_sections"
+POPULAR_DISHES_LIMIT = 10
+CHEF_PENDING_ORDERS_LIMIT = 10
+
+
+def build_global_sections() -> dict:
+    categories = FoodCategory.objects.filter(is_archived=False, parent__isnull=True)
+    dishes = popular_dishes(POPULAR_DISHES_LIMIT)
+    return {
+        "dish_categories": HomeFoodCategorysSerializer(categories, many=True).data,
+        "popular": HomeDishsSerializer(dishes, many=True).data,
+    }
+
+
+def global_sections() -> dict:
+    """
+    Sections shared by every client (categories, popular dishes), cached until
+    the catalog changes. Popularity is refreshed in a worker, whose
+    invalidation only reaches a shared cache; with a per-process one the
+    sections expire after ``LOCAL_CACHE_MAX_AGE`` instead.
+    """
+    sections = cache.get(GLOBAL_SECTIONS_CACHE_KEY)
+    if sections is None:
+        sections = build_global_sections()
+        cache.set(GLOBAL_SECTIONS_CACHE_KEY, sections, invalidated_timeout(settings.HOMEPAGE_CACHE_TIMEOUT))
+    return sections
+
+
+def invalidate_global_sections() -> None:
+    cache.delete(GLOBAL_SECTIONS_CACHE_KEY)
+
+
+def homepage_users():
+    """
+    Users annotated with the item count of their open cart and their unread
+    notification count, both read from denormalized rows in the user query.
+    """
+    open_cart = Cart.objects.filter(client__user=OuterRef("pk"), purchased=False).order_by("-created_at")
+    return get_user_model().objects.annotate(
+        cart_item_count=Subquery(open_cart.values("item_count")[:1]),
+        unread_notification_count=unread_count_subquery(),
+    )
+
+
+def chef_pending_orders(chef_id, limit: int = CHEF_PENDING_ORDERS_LIMIT) -> list:
+    """Newest pending orders of a chef with their items, in a fixed number of queries."""
+    orders = (
+        Order.objects.filter(chef_id=chef_id, status=Order.Status.PENDING)
+        .select_related("client__user")
+        .prefetch_related(Prefetch("items", queryset=OrderItem.objects.select_related("cart_item__dish")))
+        .order_by("-created_at")[:limit]
+    )
+    return HomePendingOrderSerializer(orders, many=True).data
@@ -0,0 +1,66 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from chef.models import ChefProfile
+from clients.models import Client
+from food.models import Dish, DishPopularity, FoodCategory
+from food.popularity import popularity_refreshed
+from homepage.metrics import CHEFS_TOTAL, CUSTOMERS_TOTAL, record_order_placed, record_order_removed, record_profile_count, record_status_change
+from homepage.services import invalidate_global_sections
+from orders.models import Order
+
+
+@receiver(post_save, sender=Dish)
+@receiver(post_delete, sender=Dish)
+@receiver(post_save, sender=FoodCategory)
+@receiver(post_delete, sender=FoodCategory)
+def invalidate_homepage_catalog(sender, instance, **kwargs):
+    invalidate_global_sections()
+    transaction.on_commit(invalidate_global_sections)
+
+
+@receiver(popularity_refreshed, sender=DishPopularity)
+def refresh_homepage_popular(sender, **kwargs):
+    invalidate_global_sections()
+
+
+@receiver(pre_save, sender=Order)
+def read_stored_order_status(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    instance._stored_status = None
+    if raw or instance.pk is None or (update_fields is not None and "status" not in update_fields):
+        return
+    stored = Order.objects.using(using).filter(pk=instance.pk)
+    if not transaction.get_autocommit(using):
+        # Locked until commit, so a concurrent change of the same order waits and then sees this one
+        stored = stored.select_for_update()
+    instance._stored_status = stored.values_list("status", flat=True).first()
+
+
+@receiver(post_save, sender=Order)
+def count_order_status(sender, instance, created, raw=False, **kwargs):
+    # Every save is compared with the stored row, so admin edits and plain saves count too
+    if raw:
+        return
+    if created:
+        record_order_placed(instance)
+    elif instance._stored_status not in (None, instance.status):
+        record_status_change(instance, instance._stored_status, instance.status)
+
+
+@receiver(post_delete, sender=Order)
+def count_removed_order(sender, instance, **kwargs):
+    record_order_removed(instance)
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=ChefProfile)
+def count_new_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_profile_count(CUSTOMERS_TOTAL if sender is Client else CHEFS_TOTAL, 1)
+
+
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=ChefProfile)
+def count_removed_profile(sender, instance, **kwargs):
+    record_profile_count(CUSTOMERS_TOTAL if sender is Client else CHEFS_TOTAL, -1)
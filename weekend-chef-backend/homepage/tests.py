@@ -1,3 +1,166 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from chef.models import ChefProfile
+from clients.models import Client
+from food.models import Dish, FoodCategory
+from homepage.metrics import rebuild_metrics
+from homepage.models import DailyMetricCounter, MetricCounter
+from homepage.services import CHEF_PENDING_ORDERS_LIMIT, GLOBAL_SECTIONS_CACHE_KEY, global_sections
+from notifications.models import Notification
+from orders.models import Cart, CartItem, Order, OrderItem
+from orders.services import transition_order
+
+
+class ClientHomepageCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = FoodCategory.objects.create(name="Rice")
+        self.dish = Dish.objects.create(name="Fried Rice", category=self.category, description="")
+
+        self.user = User.objects.create_user(email="home@test.com", password="secret", first_name="Home", last_name="User")
+        self.client_profile = Client.objects.create(user=self.user)
+        self.token = Token.objects.get(user=self.user)
+        self.cart = Cart.objects.create(client=self.client_profile)
+        CartItem.objects.create(cart=self.cart, dish=self.dish, quantity=3, value="Large", package="Large", package_price=40)
+
+        self.url = reverse("homepage_api:get_homepage_data_view")
+
+    def _get(self):
+        return self.client.get(self.url, {"user_id": self.user.user_id}, HTTP_AUTHORIZATION=f"Token {self.token}")
+
+    def test_warm_homepage_only_queries_the_requesting_user(self):
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        data = response.data["data"]
+        self.assertEqual(data["cart_item_count"], 1)
+        self.assertEqual(data["notification_count"], 0)
+        self.assertEqual([dish["name"] for dish in data["popular"]], ["Fried Rice"])
+
+        # Token lookup and the annotated user row
+        with self.assertNumQueries(2):
+            response = self._get()
+        self.assertEqual(response.data["data"]["cart_item_count"], 1)
+
+    def test_catalog_changes_invalidate_the_cache_and_notifications_are_counted(self):
+        self._get()
+        Dish.objects.create(name="Waakye", category=self.category, description="")
+        FoodCategory.objects.create(name="Soups")
+        Notification.objects.create(user=self.user, title="Order ready")
+
+        data = self._get().data["data"]
+        self.assertCountEqual([dish["name"] for dish in data["popular"]], ["Fried Rice", "Waakye"])
+        self.assertCountEqual([category["name"] for category in data["dish_categories"]], ["Rice", "Soups"])
+        self.assertEqual(data["notification_count"], 1)
+
+
+    @override_settings(HOMEPAGE_CACHE_TIMEOUT=600, LOCAL_CACHE_MAX_AGE=15)
+    def test_sections_expire_quickly_when_worker_invalidations_cannot_reach_them(self):
+        with mock.patch("homepage.services.cache") as fake:
+            fake.get.return_value = None
+            global_sections()
+        self.assertEqual(fake.set.call_args.args[0], GLOBAL_SECTIONS_CACHE_KEY)
+        self.assertEqual(fake.set.call_args.args[2], 15)
+
+        with mock.patch("weekend_chef_project.caching.cache_is_shared", return_value=True), mock.patch("homepage.services.cache") as fake:
+            fake.get.return_value = None
+            global_sections()
+        self.assertEqual(fake.set.call_args.args[2], 600)
+
+
+class DashboardMetricsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create_user(email="metrics-admin@test.com", password="secret")
+        self.token = Token.objects.get(user=self.admin_user)
+
+        self.client_profile = Client.objects.create(user=User.objects.create_user(email="metrics-client@test.com", password="secret"))
+        self.chef_user = User.objects.create_user(email="metrics-chef@test.com", password="secret")
+        self.chef = ChefProfile.objects.create(user=self.chef_user)
+        other_chef = ChefProfile.objects.create(user=User.objects.create_user(email="metrics-other@test.com", password="secret"))
+
+        self.delivered = Order.objects.create(client=self.client_profile, chef=self.chef, total_price=Decimal("120.00"))
+        self.cooking = Order.objects.create(client=self.client_profile, chef=self.chef, total_price=Decimal("45.00"))
+        Order.objects.create(client=self.client_profile, chef=other_chef, total_price=Decimal("30.00"))
+        for new_status in (Order.Status.ACCEPTED, Order.Status.COOKING, Order.Status.DISPATCHED, Order.Status.DELIVERED):
+            transition_order(self.delivered, new_status)
+        transition_order(self.cooking, Order.Status.COOKING)
+
+    def _get(self, name, **params):
+        return self.client.get(reverse(f"homepage_api:{name}"), params, HTTP_AUTHORIZATION=f"Token {self.token}")
+
+    def test_admin_dashboard_serves_maintained_counters(self):
+        with self.assertNumQueries(2):
+            data = self._get("get_admin_dashboard_data_view").data["data"]
+        self.assertEqual(data["orders_count"], 3)
+        self.assertEqual(data["total_sales"], Decimal("120.00"))
+        self.assertEqual(data["total_customers"], 1)
+        self.assertEqual(data["total_chefs"], 2)
+        self.assertEqual(data["pending_orders"], 1)
+        self.assertEqual(data["preparation_orders"], 1)
+        self.assertEqual(data["delivery_orders"], 0)
+
+        transition_order(self.delivered, Order.Status.CANCELLED)
+        self.assertEqual(self._get("get_admin_dashboard_data_view").data["data"]["total_sales"], Decimal("0"))
+
+    def test_chef_homepage_and_rebuild_agree_with_live_counters(self):
+        data = self._get("get_chef_homepage_data_view", user_id=self.chef_user.user_id).data["data"]
+        self.assertEqual(data["total_sales"], Decimal("120.00"))
+        self.assertEqual(data["total_order_count"], 2)
+        self.assertEqual(data["pending_order_count"], 0)
+
+        def counters():
+            return {(scope, name): value for scope, name, value in MetricCounter.objects.values_list("scope", "name", "value") if value}
+
+        live = counters()
+        rebuild_metrics()
+        self.assertEqual(counters(), live)
+        self.assertEqual(
+            DailyMetricCounter.objects.get(scope="all", name="orders.sales").value,
+            Decimal("120.00"),
+        )
+
+    def test_status_saves_outside_transition_order_are_counted_once(self):
+        stale = Order.objects.get(pk=self.cooking.pk)
+        self.cooking.status = Order.Status.READY
+        self.cooking.save()
+        # A second copy loaded before that change saves the same status: nothing moved
+        stale.status = Order.Status.READY
+        stale.save()
+
+        def status_count(status):
+            return MetricCounter.objects.get(scope="all", name=f"orders.status.{status}").value
+
+        self.assertEqual((status_count("cooking"), status_count("ready")), (0, 1))
+
+    def test_chef_pending_orders_list_is_bounded_and_prefetched(self):
+        dish = Dish.objects.create(name="Banku", category=FoodCategory.objects.create(name="Swallows"), description="")
+
+        def add_pending_order():
+            cart = Cart.objects.create(client=self.client_profile, purchased=True)
+            item = CartItem.objects.create(cart=cart, dish=dish, quantity=2, value="Large", package="Large", package_price=40)
+            order = Order.objects.create(client=self.client_profile, chef=self.chef, cart=cart, total_price=Decimal("80.00"))
+            OrderItem.objects.create(order=order, cart_item=item, quantity=2, item_total_price=Decimal("80.00"))
+
+        add_pending_order()
+        with CaptureQueriesContext(connection) as one:
+            data = self._get("get_chef_homepage_data_view", user_id=self.chef_user.user_id).data["data"]
+        self.assertEqual(data["pending_order_count"], 1)
+        self.assertEqual(data["pending_orders_list"][0]["items"][0]["dish_name"], "Banku")
+
+        for _ in range(CHEF_PENDING_ORDERS_LIMIT + 2):
+            add_pending_order()
+        with CaptureQueriesContext(connection) as many:
+            data = self._get("get_chef_homepage_data_view", user_id=self.chef_user.user_id).data["data"]
+        self.assertEqual(data["pending_order_count"], CHEF_PENDING_ORDERS_LIMIT + 3)
+        self.assertEqual(len(data["pending_orders_list"]), CHEF_PENDING_ORDERS_LIMIT)
+        self.assertEqual(len(one.captured_queries), len(many.captured_queries))
@@ -1,11 +1,12 @@
 from django.urls import include, path
 
-from notifications.api.views import set_notification_to_read, get_all_notifications, delete_notification
+from notifications.api.views import set_notification_to_read, get_all_notifications, delete_notification, mark_notifications_read_view
 
 app_name = 'notifications'
 
 urlpatterns = [
     path('set-to-read/', set_notification_to_read, name="set_notification_to_read"),
+    path('mark-read/', mark_notifications_read_view, name="mark_notifications_read"),
     path('get-all-notifications/', get_all_notifications, name="get_all_notifications"),
     path('delete-notification/', delete_notification, name="delete_notification"),
     path('v2/', include(('notifications.api.v2.urls', 'v2'), namespace='v2')),
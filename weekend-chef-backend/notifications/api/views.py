@@ -1,13 +1,15 @@
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q
 from rest_framework import status
 from rest_framework.decorators import permission_classes, api_view, authentication_classes
+from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from accounts.api.custom_jwt import CustomJWTAuthentication
 from notifications.api.serializers import AllNotificationsSerializer
+from notifications.counters import mark_notifications_read, unread_count
+from notifications.feed import FEED_ORDERING, notification_feed
 from notifications.models import Notification
+from weekend_chef_project.pagination import KeysetPaginator
 
 
 @api_view(['POST', ])
@@ -53,52 +55,65 @@ def set_notification_to_read(request):
 
 
 
-@api_view(['GET', ])
+@api_view(['POST', ])
 @permission_classes([IsAuthenticated, ])
-@authentication_classes([CustomJWTAuthentication, ])
-def get_all_notifications(request):
+@authentication_classes([CustomJWTAuthentication, TokenAuthentication, ])
+def mark_notifications_read_view(request):
+    """Mark all of the user's notifications read, or only ``notification_ids``, in one UPDATE."""
     payload = {}
     data = {}
     errors = {}
 
-    search_query = request.query_params.get('search', '')
-    filter_department = request.query_params.get('filter_department', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
+    notification_ids = request.data.get('notification_ids', None)
 
-    all_notification = Notification.objects.all().order_by('-created_at')
+    if notification_ids is not None:
+        try:
+            if not isinstance(notification_ids, list):
+                raise TypeError
+            notification_ids = [int(notification_id) for notification_id in notification_ids]
+        except (TypeError, ValueError):
+            errors['notification_ids'] = ['Notification IDs must be a list of integers.']
 
+    if errors:
+        payload['message'] = "Errors"
+        payload['errors'] = errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    if search_query:
-        all_notification = all_notification.filter(
-            Q(department__icontains=search_query)
-        )
+    data['marked_read'] = mark_notifications_read(request.user, notification_ids)
+    data['unread_count'] = unread_count(request.user.pk)
 
-    if filter_department:
-        all_notification = all_notification.filter(
-            department__icontains=filter_department
-        )
+    payload['message'] = "Successful"
+    payload['data'] = data
+
+    return Response(payload, status=status.HTTP_200_OK)
 
 
-    paginator = Paginator(all_notification, page_size)
 
-    try:
-        paginated_notification = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_notification = paginator.page(1)
-    except EmptyPage:
-        paginated_notification = paginator.page(paginator.num_pages)
+@api_view(['GET', ])
+@permission_classes([IsAuthenticated, ])
+@authentication_classes([CustomJWTAuthentication, TokenAuthentication, ])
+def get_all_notifications(request):
+    payload = {}
+    data = {}
+    errors = {}
+
+    search_query = request.query_params.get('search', '')
+    unread_only = request.query_params.get('unread', '').lower() in ('1', 'true', 'yes')
+
+    paginator = KeysetPaginator(request, ordering=FEED_ORDERING)
+    errors.update(paginator.errors)
 
-    all_notifications_serializer = AllNotificationsSerializer(paginated_notification, many=True)
+    if errors:
+        payload['message'] = "Errors"
+        payload['errors'] = errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
+    ## Only the requesting user's notifications, newest first, one index range per page
+    notifications = paginator.paginate(notification_feed(request.user, unread_only=unread_only, search=search_query))
 
-    data['notifications'] = all_notifications_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_notification.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_notification.next_page_number() if paginated_notification.has_next() else None,
-        'previous': paginated_notification.previous_page_number() if paginated_notification.has_previous() else None,
-    }
+    data['notifications'] = AllNotificationsSerializer(notifications, many=True).data
+    data['unread_count'] = unread_count(request.user.pk)
+    data['pagination'] = notifications.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from notifications.models import Notification, UnreadNotificationCounter
+
+
+def adjust_unread(deltas: dict) -> None:
+    """
+    Add ``{user_id: delta}`` to the users' unread counters with at most two
+    statements: create missing rows for users gaining notifications, then one
+    conditional UPDATE. A user without a row has nothing unread, so decrements
+    never create one.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    gaining = [user_id for user_id, delta in deltas.items() if delta > 0]
+    if gaining:
+        UnreadNotificationCounter.objects.bulk_create(
+            [UnreadNotificationCounter(user_id=user_id) for user_id in gaining], ignore_conflicts=True
+        )
+    delta_for_row = Case(
+        *(When(user_id=user_id, then=Value(delta)) for user_id, delta in deltas.items()),
+        output_field=IntegerField(),
+    )
+    UnreadNotificationCounter.objects.filter(user_id__in=deltas).update(
+        count=F("count") + delta_for_row, updated_at=timezone.now()
+    )
+
+
+def record_created(notifications) -> None:
+    adjust_unread(Counter(notification.user_id for notification in notifications if not notification.read))
+
+
+def unread_count(user_id) -> int:
+    count = UnreadNotificationCounter.objects.filter(user_id=user_id).values_list("count", flat=True).first()
+    return max(count or 0, 0)
+
+
+def unread_count_subquery(user_ref: str = "pk"):
+    """Annotation reading a user's counter inside the query that loads the user."""
+    counter = UnreadNotificationCounter.objects.filter(user_id=OuterRef(user_ref)).values("count")[:1]
+    return Coalesce(Subquery(counter), 0)
+
+
+def mark_notifications_read(user, notification_ids=None) -> int:
+    """
+    Mark the user's unread notifications read (all of them, or those in
+    ``notification_ids``) with one UPDATE and take the number of rows it
+    changed off their counter. Returns that number.
+    """
+    unread = Notification.objects.filter(user=user, read=False)
+    if notification_ids is not None:
+        unread = unread.filter(pk__in=notification_ids)
+    with transaction.atomic():
+        updated = unread.update(read=True, updated_at=timezone.now())
+        adjust_unread({user.pk: -updated})
+    return updated
+
+
+def recount_unread(user_ids=None) -> int:
+    """Rebuild counters from the notifications table to repair drift; returns the rows written."""
+    notifications = Notification.objects.filter(read=False)
+    counters = UnreadNotificationCounter.objects.all()
+    if user_ids is not None:
+        notifications = notifications.filter(user_id__in=user_ids)
+        counters = counters.filter(user_id__in=user_ids)
+    rows = [
+        UnreadNotificationCounter(user_id=row["user_id"], count=row["count"])
+        for row in notifications.values("user_id").annotate(count=Count("id"))
+    ]
+    with transaction.atomic():
+        counters.delete()
+        UnreadNotificationCounter.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from django.db import transaction
+
+from notifications.counters import record_created
+from notifications.models import Notification
+
+FAN_OUT_BATCH_SIZE = 500
+
+
+def wants_notification(preference_value) -> bool:
+    """
+    A user without a NotificationPreference row reads as ``None`` through a left
+    join and gets the model default, which is opted in.
+    """
+    return preference_value is not False
+
+
+def fan_out(notifications: list[Notification], batch_size: int = FAN_OUT_BATCH_SIZE) -> list[Notification]:
+    """Insert notifications in bulk and bump the recipients' unread counters."""
+    if not notifications:
+        return []
+    with transaction.atomic():
+        created = Notification.objects.bulk_create(notifications, batch_size=batch_size)
+        record_created(created)
+    return created
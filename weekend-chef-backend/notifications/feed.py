@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from django.db.models import Q
+
+from notifications.models import Notification
+
+# Newest first; matches the (user, -created_at, -id) index
+FEED_ORDERING = ("-created_at", "-pk")
+
+
+def notification_feed(user, unread_only: bool = False, search: str = ""):
+    """The user's notifications, to be paged by (created_at, id) keyset cursors."""
+    notifications = Notification.objects.filter(user=user)
+    if unread_only:
+        notifications = notifications.filter(read=False)
+    if search:
+        notifications = notifications.filter(Q(title__icontains=search) | Q(subject__icontains=search))
+    return notifications
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_unread_counts(apps, schema_editor):
+    Notification = apps.get_model("notifications", "Notification")
+    UnreadNotificationCounter = apps.get_model("notifications", "UnreadNotificationCounter")
+    unread = Notification.objects.filter(read=False).values("user_id").annotate(count=Count("id"))
+    UnreadNotificationCounter.objects.bulk_create(
+        [UnreadNotificationCounter(user_id=row["user_id"], count=row["count"]) for row in unread],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("notifications", "0002_notificationpreference_consent_source_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UnreadNotificationCounter",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="unread_notification_counter",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("count", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "read", "created_at"],
+                name="notif_user_read_created_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
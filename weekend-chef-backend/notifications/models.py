@@ -17,6 +17,28 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "read", "created_at"], name="notif_user_read_created_idx"),
+            models.Index(fields=["user", "-created_at", "-id"], name="notif_user_feed_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Saves compare against this to keep the unread counter in step
+        instance._loaded_read = instance.__dict__.get("read")
+        return instance
+
+
+class UnreadNotificationCounter(models.Model):
+    """Denormalized unread count per user, adjusted in the same transaction as the notifications."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="unread_notification_counter")
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.count} unread for {self.user_id}"
 
 
 class NotificationPreference(models.Model):
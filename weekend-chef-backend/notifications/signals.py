@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from notifications.counters import adjust_unread
+from notifications.models import Notification
+
+
+@receiver(post_save, sender=Notification)
+def count_saved_notification(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        delta = 0 if instance.read else 1
+    else:
+        was_read = getattr(instance, "_loaded_read", None)
+        if was_read is None or was_read == instance.read:
+            delta = 0
+        else:
+            delta = -1 if instance.read else 1
+    instance._loaded_read = instance.read
+    adjust_unread({instance.user_id: delta})
+
+
+@receiver(post_delete, sender=Notification)
+def count_deleted_notification(sender, instance, **kwargs):
+    if not instance.read:
+        adjust_unread({instance.user_id: -1})
@@ -1,9 +1,15 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 
 from accounts.models import User
+from notifications.counters import mark_notifications_read, recount_unread, unread_count
+from notifications.fanout import fan_out
+from notifications.models import Notification
+from weekend_chef_project.pagination import encode_cursor
 
 
 class NotificationPreferenceTests(APITestCase):
@@ -34,3 +40,100 @@ class NotificationPreferenceTests(APITestCase):
         self.assertEqual(response.data["consent_source"], "mobile-app")
         self.assertEqual(response.data["consent_version"], "2024-privacy")
         self.assertNotEqual(response.data["consent_updated_at"], initial_timestamp)
+
+
+class UnreadNotificationCounterTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="unread@test.com", password="secret")
+        self.other = User.objects.create_user(email="unread-other@test.com", password="secret")
+        self.token = Token.objects.get(user=self.user)
+        self.url = reverse("notifications:mark_notifications_read")
+
+    def test_counter_follows_creates_reads_and_deletes(self):
+        first = Notification.objects.create(user=self.user, title="One")
+        Notification.objects.create(user=self.user, title="Seen", read=True)
+        fan_out([Notification(user=self.user, title="Two"), Notification(user=self.other, title="Three")])
+        self.assertEqual((unread_count(self.user.pk), unread_count(self.other.pk)), (2, 1))
+
+        first = Notification.objects.get(pk=first.pk)
+        first.read = True
+        first.save()
+        first.save()
+        self.assertEqual(unread_count(self.user.pk), 1)
+
+        Notification.objects.filter(user=self.other).get().delete()
+        self.assertEqual(unread_count(self.other.pk), 0)
+
+        recount_unread()
+        self.assertEqual((unread_count(self.user.pk), unread_count(self.other.pk)), (1, 0))
+
+    def test_bulk_mark_read_is_one_update_for_any_number_of_notifications(self):
+        notifications = fan_out([Notification(user=self.user, title=str(i)) for i in range(5)])
+        fan_out([Notification(user=self.other, title="Not yours")])
+        auth = {"HTTP_AUTHORIZATION": f"Token {self.token.key}"}
+
+        ids = [notification.pk for notification in notifications[:2]] + [Notification.objects.get(user=self.other).pk]
+        response = self.client.post(self.url, {"notification_ids": ids}, format="json", **auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"], {"marked_read": 2, "unread_count": 3})
+        self.assertEqual(unread_count(self.other.pk), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {}, format="json", **auth)
+        self.assertEqual(response.data["data"], {"marked_read": 3, "unread_count": 0})
+        updates = [query["sql"] for query in queries.captured_queries if query["sql"].startswith('UPDATE "notifications_notification"')]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(Notification.objects.filter(user=self.user, read=False).exists())
+
+        response = self.client.post(self.url, {"notification_ids": "abc"}, format="json", **auth)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class NotificationFeedTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="feed@test.com", password="secret")
+        self.token = Token.objects.get(user=self.user)
+        self.url = reverse("notifications:get_all_notifications")
+        other = User.objects.create_user(email="feed-other@test.com", password="secret")
+        fan_out([Notification(user=other, title="Not yours")])
+        # One bulk insert gives several rows the same created_at; the id breaks the tie
+        self.notifications = fan_out([Notification(user=self.user, title=f"Note {i}") for i in range(7)])
+        mark_notifications_read(self.user, [self.notifications[0].pk])
+
+    def _get(self, **params):
+        return self.client.get(self.url, params, HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_feed_pages_through_own_notifications_by_cursor_without_counting(self):
+        seen = []
+        cursor = None
+        page_queries = []
+        while True:
+            params = {"page_size": 3}
+            if cursor:
+                params["cursor"] = cursor
+            with CaptureQueriesContext(connection) as queries:
+                response = self._get(**params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.data["data"]
+            seen.extend(notification["id"] for notification in data["notifications"])
+            page_queries.append(len(queries.captured_queries))
+            self.assertFalse(any("COUNT(" in query["sql"] for query in queries.captured_queries))
+            cursor = data["pagination"]["next"]
+            if cursor is None:
+                break
+
+        expected = [notification.pk for notification in sorted(self.notifications, key=lambda n: (n.created_at, n.pk), reverse=True)]
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(set(page_queries)), 1)
+        self.assertEqual(data["unread_count"], 6)
+
+        unread = self._get(unread="true", page_size=50).data["data"]["notifications"]
+        self.assertEqual(len(unread), 6)
+        self.assertEqual(self._get(cursor="not-a-cursor").status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_tampered_cursors_are_rejected_as_cursor_errors(self):
+        for position in (["abc", 1], [None, 1], [{}, 1], ["2026-01-01T00:00:00+00:00", "abc"], ["abc"]):
+            with self.subTest(position):
+                response = self._get(cursor=encode_cursor(position))
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(response.data["errors"], {"cursor": ["Invalid cursor."]})
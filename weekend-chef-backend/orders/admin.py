@@ -11,6 +11,8 @@ from orders.models import (
     OrderPayment,
     OrderRating,
     OrderStatusTransition,
+    PayoutBatch,
+    PayoutBatchItem,
     ShoppingList,
 )
 
@@ -25,4 +27,6 @@ admin.site.register(OrderPayment)
 admin.site.register(OrderRating)
 admin.site.register(ShoppingList)
 admin.site.register(EscrowLedgerEntry)
+admin.site.register(PayoutBatch)
+admin.site.register(PayoutBatchItem)
 admin.site.register(DeliveryProof)
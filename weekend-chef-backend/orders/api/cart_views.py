@@ -1,6 +1,6 @@
 
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
+from django.db import transaction
 from django.db.models import Q
 from django.forms import ValidationError
 from rest_framework import status
@@ -11,13 +11,16 @@ from rest_framework.authentication import TokenAuthentication
 
 
 from activities.models import AllActivity
+from chef.geo import nearby_chefs_page
 from chef.models import ChefProfile
 from clients.models import Client, ClientHomeLocation
 from food.api.serializers import AllFoodCategorysSerializer
+from food.category_tree import parent_category_names
 from food.models import Dish, FoodCategory
 from orders.api.serializers import AllClosestChefSerializer
 from orders.models import Cart, CartItem, CustomizationOption, CustomizationValue, Order
-from weekend_chef_project.utils import haversine
+from orders.services import CartMutationError, apply_cart_mutations, positive_int
+from weekend_chef_project.pagination import KeysetPaginator, decode_cursor, encode_cursor, parse_page_size
 
 User = get_user_model()
 
@@ -37,7 +40,7 @@ def add_cart_item(request):
         # Extract fields from the request body
         user_id = request.data.get('user_id')
         dish_id = request.data.get('dish_id')
-        quantity = request.data.get('quantity')
+        quantity = positive_int(request.data.get('quantity'))
         package = request.data.get('package')
         package_price = request.data.get('package_price')
         value = request.data.get('value')
@@ -60,7 +63,7 @@ def add_cart_item(request):
         if not value:
             errors['value'] = ['Value is required.']
 
-        if not quantity or quantity <= 0:
+        if quantity is None:
             errors['quantity'] = ['Quantity must be greater than 0.']
 
         if not isinstance(is_custom, bool):
@@ -112,10 +115,10 @@ def add_cart_item(request):
                 for customization in customizations:
                     # Extract customization details
                     custom_option_id = customization.get('custom_option_id')
-                    custom_quantity = customization.get('quantity', 1)  # Default to 1 if no quantity is provided
+                    custom_quantity = positive_int(customization.get('quantity', 1))  # Default to 1 if no quantity is provided
 
                     # Ensure customization quantity is valid
-                    if custom_quantity <= 0:
+                    if custom_quantity is None:
                         raise ValidationError("Customization quantity must be greater than 0.")
 
                     # Fetch the CustomizationOption object
@@ -157,8 +160,7 @@ def add_cart_item(request):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
 
-        cart_item.item_total_price = cart_item.total_price()
-        cart_item.save()
+        # item_total_price and the cart totals were updated as the item and its customizations were saved
 
         # Prepare response data
         data = {
@@ -184,6 +186,94 @@ def add_cart_item(request):
 
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@authentication_classes([TokenAuthentication])
+def batch_cart_mutation_view(request):
+    """
+    Apply several cart changes in one request, e.g. when a mobile client syncs an offline cart:
+    - add: [{dish_id, quantity, package, package_price, value, special_notes, customizations: [{custom_option_id, quantity}]}]
+    - update: [{id, quantity, special_notes, customizations}] (customizations replace the current ones)
+    - remove: [cart item ids]
+    Either every change is applied or none is. Returns the recomputed cart.
+    """
+    payload = {}
+    errors = {}
+
+    if not isinstance(request.data, dict):
+        payload['message'] = "Validation Errors"
+        payload['errors'] = {'body': ['Request body must be an object.']}
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+
+    add = request.data.get('add', [])
+    update = request.data.get('update', [])
+    remove = request.data.get('remove', [])
+
+    for field, value in (('add', add), ('update', update), ('remove', remove)):
+        if not isinstance(value, list):
+            errors[field] = [f'{field.capitalize()} must be a list.']
+        elif field != 'remove' and not all(isinstance(entry, dict) for entry in value):
+            errors[field] = [f'Each {field} entry must be an object.']
+
+    try:
+        client = Client.objects.get(user=request.user)
+    except Client.DoesNotExist:
+        errors['user'] = ['Client does not exist.']
+
+    if errors:
+        payload['message'] = "Validation Errors"
+        payload['errors'] = errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        # A cart created for a rejected batch is rolled back with it
+        with transaction.atomic():
+            cart = Cart.objects.filter(client=client, purchased=False).order_by('-created_at').first()
+            if cart is None:
+                cart = Cart.objects.create(client=client)
+            cart = apply_cart_mutations(cart, add=add, update=update, remove=remove)
+    except CartMutationError as e:
+        payload['message'] = "Validation Errors"
+        payload['errors'] = e.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+
+    data = {
+        'cart_id': cart.id,
+        'total_price': cart.total_price,
+        'item_count': cart.item_count,
+        'cart_items': [
+            {
+                'id': item.id,
+                'dish_id': item.dish.dish_id,
+                'dish': item.dish.name,
+                'quantity': item.quantity,
+                'package': item.package,
+                'package_price': item.package_price,
+                'value': item.value,
+                'is_custom': item.is_custom,
+                'special_notes': item.special_notes,
+                'customizations': [
+                    {
+                        'custom_option_id': cv.customization_option.custom_option_id,
+                        'customization': cv.customization_option.name,
+                        'price': cv.customization_option.price,
+                        'quantity': cv.quantity,
+                    }
+                    for cv in item.customizations.all()
+                ],
+                'item_total_price': item.item_total_price,
+            }
+            for item in cart.items.all()
+        ],
+    }
+
+    payload['message'] = "Cart updated successfully."
+    payload['data'] = data
+    return Response(payload, status=status.HTTP_200_OK)
+
+
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @authentication_classes([TokenAuthentication])
@@ -198,8 +288,6 @@ def get_all_carts_view(request):
     # Get search, client_id, and pagination parameters from query parameters
     search_query = request.query_params.get('search', '')
     user_id = request.query_params.get('user_id', None)
-    page_number = request.query_params.get('page', 1)
-    page_size = 10  # You can adjust the page size as needed
 
     # Start with all carts, if no client filter is provided
     carts = Cart.objects.all()
@@ -223,33 +311,21 @@ def get_all_carts_view(request):
         ).distinct()
 
     # Pagination
-    paginator = Paginator(carts, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_carts = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_carts = paginator.page(1)
-    except EmptyPage:
-        paginated_carts = paginator.page(paginator.num_pages)
+    paginated_carts = paginator.paginate(carts)
 
     # Prepare data for response
     cart_data = []
     for cart in paginated_carts:
-        cart_items = CartItem.objects.filter(cart=cart).order_by('-created_at')
+        cart_items = CartItem.objects.filter(cart=cart).select_related('dish__category').order_by('-created_at')
 
         cart_item_data = []
         for item in cart_items:
-
-            parent_categories = []
-            current_category = item.dish.category
-        
-            # Traverse the category hierarchy upwards to get the parent categories
-            while current_category and current_category.parent:
-                parent_categories.append(current_category.parent.name)
-                current_category = current_category.parent
-
-
-
             cart_item_data.append({
                 'id': item.id,
                 'dish_name': item.dish.name,
@@ -260,7 +336,7 @@ def get_all_carts_view(request):
                 'item_total_price': item.item_total_price,
                 'is_custom': item.is_custom,
 
-                'parent_category_names':parent_categories[::-1]
+                'parent_category_names': parent_category_names(item.dish.category_id)
             })
 
 
@@ -269,12 +345,7 @@ def get_all_carts_view(request):
 
     # Constructing pagination info
     data['cart_items'] = cart_item_data
-    data['pagination'] = {
-        'page_number': paginated_carts.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_carts.next_page_number() if paginated_carts.has_next() else None,
-        'previous': paginated_carts.previous_page_number() if paginated_carts.has_previous() else None,
-    }
+    data['pagination'] = paginated_carts.envelope()
 
     payload['message'] = "Success"
     payload['data'] = data
@@ -312,7 +383,6 @@ def get_cart_detail_view(request, cart_id):
         cart_items = CartItem.objects.filter(cart=cart)
 
         cart_item_details = []
-        cart_total = 0  # Variable to keep track of the total price of the cart
 
         for item in cart_items:
             # For each CartItem, get the relevant details
@@ -336,15 +406,13 @@ def get_cart_detail_view(request, cart_id):
             # Add the cart item data to the list
             cart_item_details.append(cart_item_data)
 
-            # Add the item's total price to the cart's total price
-            cart_total += item.total_price()
-
         # Construct the response data
         data['cart_id'] = cart.id
         data['created_at'] = cart.created_at
         data['client'] = client_data
         data['cart_items'] = cart_item_details
-        data['cart_total'] = cart_total
+        data['cart_total'] = cart.total_price
+        data['item_count'] = cart.item_count
 
         payload['message'] = "Success"
         payload['data'] = data
@@ -420,8 +488,8 @@ def get_closest_chef_view(request):
     user_id = request.query_params.get('user_id', None)
     location_id = request.query_params.get('location_id', None)
     radius = request.query_params.get('radius', None)
-    page_number = request.query_params.get('page', 1)
-    page_size = 10  # You can adjust the page size as needed
+    cursor = request.query_params.get('cursor', None)
+    page_size = request.query_params.get('page_size', None)
 
     if not user_id:
         errors['user_id'] = ['User ID is required.']
@@ -430,6 +498,7 @@ def get_closest_chef_view(request):
         errors['location_id'] = ['Location ID is required.']
 
     # If a user_id is provided, filter carts by client
+    client = None
     if user_id:
         try:
             client = Client.objects.get(user__user_id=user_id)
@@ -437,7 +506,7 @@ def get_closest_chef_view(request):
             errors['user_id'] = ['User not found.']
 
             
-    if location_id:
+    if location_id and client:
         try:
             location = ClientHomeLocation.objects.get(id=location_id, client=client)
         except ClientHomeLocation.DoesNotExist:
@@ -448,40 +517,57 @@ def get_closest_chef_view(request):
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    ## Filter CHEFS WITH CLIENT LOCATION
-    chefs = ChefProfile.objects.all()
-
-    nearby_chefs = []
-    
     # Ensure radius is converted to float for comparison
     try:
         radius = float(radius)
     except (ValueError, TypeError):
         errors['radius'] = ['Radius must be a valid number.']
+
+    try:
+        page_size = parse_page_size(page_size)
+    except ValueError:
+        errors['page_size'] = ['Page size must be a positive number.']
+
+    after = None
+    if cursor:
+        try:
+            distance, chef_pk = decode_cursor(cursor, 2)
+            after = (float(distance), int(chef_pk))
+        except (ValueError, TypeError):
+            errors['cursor'] = ['Invalid cursor.']
     
     if errors:
         payload['message'] = "Errors"
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    for chef in chefs:
-        distance = haversine(location.lng, location.lat, chef.lng, chef.lat)
-
-        if distance <= radius:
-            # Create a dictionary for each chef
-            nearby_chefs.append({
-                "chef_id": chef.chef_id,
-                "chef_name": f"{chef.user.first_name} {chef.user.last_name}",
-                "chef_photo": chef.user.photo.url,
-                "kitchen_location": chef.kitchen_location,
-                "lat": chef.lat,
-                "lng": chef.lng,
-                "distance": distance,
-            })
+    ## Prune to chefs in the geo cells around the client location before exact distance math,
+    ## then only load the profiles on the requested page, ordered by (distance, chef pk)
+    matches, has_next = nearby_chefs_page(location.lat, location.lng, radius, limit=page_size, after=after)
+    chefs = ChefProfile.objects.select_related('user').in_bulk([match.chef_id for match in matches])
+
+    nearby_chefs_data = []
+    for match in matches:
+        chef = chefs.get(match.chef_id)
+        if chef is None:
+            # Deleted between the two queries
+            continue
+        nearby_chefs_data.append({
+            "chef_id": chef.chef_id,
+            "chef_name": f"{chef.user.first_name} {chef.user.last_name}",
+            "chef_photo": chef.user.photo.url,
+            "kitchen_location": chef.kitchen_location,
+            "lat": chef.lat,
+            "lng": chef.lng,
+            "distance": match.distance,
+        })
 
-    # Sort the chefs by distance
-    nearby_chefs.sort(key=lambda x: x['distance'])
-    data['nearby_chefs'] = nearby_chefs
+    data['nearby_chefs'] = nearby_chefs_data
+    data['pagination'] = {
+        'page_size': page_size,
+        'next': encode_cursor([matches[-1].distance, matches[-1].chef_id]) if has_next else None,
+        'approximate_total': None,
+    }
 
     payload['message'] = "Success"
     payload['data'] = data
@@ -504,8 +590,6 @@ def get_my_locations_view(request):
 
     # Get user_id and pagination parameters from query parameters
     user_id = request.query_params.get('user_id', None)
-    page_number = request.query_params.get('page', 1)
-    page_size = 10  # You can adjust the page size as needed
 
     # Check if user_id is provided
     if not user_id:
@@ -527,14 +611,13 @@ def get_my_locations_view(request):
     locations = ClientHomeLocation.objects.filter(client=client, is_archived=False)  # You may adjust is_archived logic
 
     # Pagination
-    paginator = Paginator(locations, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_locations = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_locations = paginator.page(1)
-    except EmptyPage:
-        paginated_locations = paginator.page(paginator.num_pages)
+    paginated_locations = paginator.paginate(locations)
 
     # Prepare data for response
     location_data = []
@@ -551,12 +634,7 @@ def get_my_locations_view(request):
 
     # Constructing pagination info
     data['locations'] = location_data
-    data['pagination'] = {
-        'page_number': paginated_locations.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_locations.next_page_number() if paginated_locations.has_next() else None,
-        'previous': paginated_locations.previous_page_number() if paginated_locations.has_previous() else None,
-    }
+    data['pagination'] = paginated_locations.envelope()
 
     payload['message'] = "Success"
     payload['data'] = data
@@ -606,7 +684,11 @@ def edit_cart_view(request, cart_id):
                     
                     # Update the cart item fields
                     if 'quantity' in item_data:
-                        cart_item.quantity = item_data['quantity']
+                        quantity = positive_int(item_data['quantity'])
+                        if quantity is None:
+                            payload['message'] = "Quantity must be greater than 0."
+                            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+                        cart_item.quantity = quantity
                     if 'special_notes' in item_data:
                         cart_item.special_notes = item_data['special_notes']
                     
@@ -634,13 +716,16 @@ def edit_cart_view(request, cart_id):
             else:
                 # Ensure the dish ID is provided and is valid
                 dish_id = item_data.get('dish', None)
-                quantity = item_data.get('quantity', 1)
+                quantity = positive_int(item_data.get('quantity', 1))
                 special_notes = item_data.get('special_notes', "")
                 customizations = item_data.get('customizations', [])
 
                 if not dish_id:
                     payload['message'] = "Dish ID is required for new items."
                     return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+                if quantity is None:
+                    payload['message'] = "Quantity must be greater than 0."
+                    return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
                 try:
                     # Assuming `Dish` model exists with an `id` field
@@ -725,7 +810,7 @@ def edit_cart_item_view(request):
     if request.method == 'POST':
         # Extract fields from the request body
         cart_item_id = request.data.get('cart_item_id')
-        quantity = request.data.get('quantity')
+        quantity = positive_int(request.data.get('quantity'))
         special_notes = request.data.get('special_notes', '')
         customizations = request.data.get('customizations', [])
 
@@ -733,7 +818,7 @@ def edit_cart_item_view(request):
         if not cart_item_id:
             errors['cart_item_id'] = ['Cart Item ID is required.']
         
-        if quantity is None or quantity <= 0:
+        if quantity is None:
             errors['quantity'] = ['Quantity must be greater than 0.']
 
         if errors:
@@ -764,10 +849,10 @@ def edit_cart_item_view(request):
                 for customization in customizations:
                     # Extract customization details
                     custom_option_id = customization.get('custom_option_id')
-                    custom_quantity = customization.get('quantity', 1)
+                    custom_quantity = positive_int(customization.get('quantity', 1))
 
                     # Validate customization quantity
-                    if custom_quantity <= 0:
+                    if custom_quantity is None:
                         raise ValidationError("Customization quantity must be greater than 0.")
 
                     try:
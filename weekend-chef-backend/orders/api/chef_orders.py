@@ -11,11 +11,11 @@ from rest_framework.exceptions import ValidationError
 from django.db import transaction
 from django.utils import timezone
 from django.db.models import Q
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 
 from chef.models import ChefProfile
 from orders.api.order_serializers import ChefOrderItemSerializer, ChefOrderSerializer, OrderItemSerializer, OrderSerializer
 from orders.models import  Order, OrderItem, OrderStatus
+from weekend_chef_project.pagination import KeysetPaginator
 
 
 
@@ -32,8 +32,6 @@ def get_all_chef_orders_view(request):
     # Extract query parameters
     user_id = request.query_params.get('user_id', None)
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10  # You can make this configurable as well
 
     # Start with all orders
     orders = Order.objects.all()
@@ -57,26 +55,20 @@ def get_all_chef_orders_view(request):
         ).distinct()
 
     # Pagination
-    paginator = Paginator(orders, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_orders = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_orders = paginator.page(1)
-    except EmptyPage:
-        paginated_orders = paginator.page(paginator.num_pages)
+    paginated_orders = paginator.paginate(orders)
 
     # Serialize the orders
     orders_serializer = ChefOrderSerializer(paginated_orders, many=True)
 
     # Prepare the data for pagination
     data['orders'] = orders_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_orders.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_orders.next_page_number() if paginated_orders.has_next() else None,
-        'previous': paginated_orders.previous_page_number() if paginated_orders.has_previous() else None,
-    }
+    data['pagination'] = paginated_orders.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -1,7 +1,6 @@
 
 from decimal import Decimal
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
@@ -13,6 +12,7 @@ from rest_framework.authentication import TokenAuthentication
 from activities.models import AllActivity
 from food.models import CustomizationOption
 from orders.api.serializers import AllCustomizationOptionSerializer, CustomizationOptionDetailsSerializer
+from weekend_chef_project.pagination import KeysetPaginator
 
 User = get_user_model()
 
@@ -101,9 +101,7 @@ def get_all_custom_options_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
     category = request.query_params.get('category', '')
-    page_size = 10
 
     all_custom_options = CustomizationOption.objects.all().filter(is_archived=False)
 
@@ -120,25 +118,19 @@ def get_all_custom_options_view(request):
             category__name__icontains=category
         ).distinct()
 
-    paginator = Paginator(all_custom_options, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_custom_options = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_custom_options = paginator.page(1)
-    except EmptyPage:
-        paginated_custom_options = paginator.page(paginator.num_pages)
+    paginated_custom_options = paginator.paginate(all_custom_options)
 
     all_custom_options_serializer = AllCustomizationOptionSerializer(paginated_custom_options, many=True)
 
 
     data['custom_options'] = all_custom_options_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_custom_options.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_custom_options.next_page_number() if paginated_custom_options.has_next() else None,
-        'previous': paginated_custom_options.previous_page_number() if paginated_custom_options.has_previous() else None,
-    }
+    data['pagination'] = paginated_custom_options.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -366,9 +358,7 @@ def get_all_archived_custom_options_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
     category = request.query_params.get('category', '')
-    page_size = 10
 
     all_custom_options = CustomizationOption.objects.all().filter(is_archived=True)
 
@@ -385,25 +375,19 @@ def get_all_archived_custom_options_view(request):
             category__name__icontains=category
         ).distinct()
 
-    paginator = Paginator(all_custom_options, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_custom_options = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_custom_options = paginator.page(1)
-    except EmptyPage:
-        paginated_custom_options = paginator.page(paginator.num_pages)
+    paginated_custom_options = paginator.paginate(all_custom_options)
 
     all_custom_options_serializer = AllCustomizationOptionSerializer(paginated_custom_options, many=True)
 
 
     data['custom_options'] = all_custom_options_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_custom_options.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_custom_options.next_page_number() if paginated_custom_options.has_next() else None,
-        'previous': paginated_custom_options.previous_page_number() if paginated_custom_options.has_previous() else None,
-    }
+    data['pagination'] = paginated_custom_options.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
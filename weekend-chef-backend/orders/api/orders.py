@@ -1,24 +1,34 @@
 from datetime import datetime
-from time import timezone
+from decimal import Decimal, InvalidOperation
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import TokenAuthentication
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ObjectDoesNotExist, ValidationError as DjangoValidationError
 from rest_framework.exceptions import ValidationError
 from django.utils.crypto import get_random_string
 from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.db.models import Q
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 
-from clients.models import Client
+from chef.models import ChefProfile
+from clients.models import Client, ClientHomeLocation
 from orders.api.order_serializers import OrderItemSerializer, OrderSerializer
 from orders.models import Cart, Order, OrderItem, OrderPayment, OrderStatus
+from orders.services import checkout_cart, checkout_cart_queryset
+from weekend_chef_project.pagination import KeysetPaginator
 
 
+def _parse_window(value):
+    # parse_datetime returns None for malformed input but raises for impossible dates
+    try:
+        return parse_datetime(str(value))
+    except ValueError:
+        return None
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -30,18 +40,16 @@ def place_order_view(request):
     if request.method == 'POST':
         # Extract client information from the request
         client_id = request.data.get('client_id')
-        order_date = request.data.get('order_date')
-        order_time = request.data.get('order_time')
-        delivery_date = request.data.get('delivery_date')
-        delivery_time = request.data.get('delivery_time')
-        location_name = request.data.get('location_name')
-        digital_address = request.data.get('digital_address')
-        lat = request.data.get('lat')
-        lng = request.data.get('lng')
-        delivery_fee = request.data.get('delivery_fee')
-        tax = request.data.get('tax')
+        chef_id = request.data.get('chef_id')
+        location_id = request.data.get('location_id')
+        delivery_window_start = request.data.get('delivery_window_start')
+        delivery_window_end = request.data.get('delivery_window_end')
+        delivery_fee = request.data.get('delivery_fee') or 0
+        tax = request.data.get('tax') or 0
+        fast_order = request.data.get('fast_order') in (True, 'true', 'True', '1')
 
         # Validate client_id
+        client = None
         if not client_id:
             errors['client_id'] = ['Client ID is required.']
         else:
@@ -50,21 +58,49 @@ def place_order_view(request):
             except Client.DoesNotExist:
                 errors['client_id'] = ['Client does not exist.']
 
-        if errors.get('client_id'):
+        if not chef_id:
+            errors['chef_id'] = ['Chef ID is required.']
+        else:
+            try:
+                chef = ChefProfile.objects.get(chef_id=chef_id)
+            except ChefProfile.DoesNotExist:
+                errors['chef_id'] = ['Chef does not exist.']
+
+        location = None
+        if location_id and client:
+            try:
+                location = ClientHomeLocation.objects.get(id=location_id, client=client)
+            except ClientHomeLocation.DoesNotExist:
+                errors['location_id'] = ['Location not found.']
+
+        if delivery_window_start:
+            delivery_window_start = _parse_window(delivery_window_start)
+            if delivery_window_start is None:
+                errors['delivery_window_start'] = ['Enter a valid date/time.']
+        if delivery_window_end:
+            delivery_window_end = _parse_window(delivery_window_end)
+            if delivery_window_end is None:
+                errors['delivery_window_end'] = ['Enter a valid date/time.']
+
+        try:
+            delivery_fee = Decimal(str(delivery_fee))
+        except InvalidOperation:
+            errors['delivery_fee'] = ['Delivery fee must be a valid number.']
+        try:
+            tax = Decimal(str(tax))
+        except InvalidOperation:
+            errors['tax'] = ['Tax must be a valid number.']
+
+        if errors:
             payload['message'] = "Errors"
             payload['errors'] = errors
             return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-        # Validate other fields like order_date, delivery_date, location_name, etc.
-        # (same validation as before)
-
-        # Validate if the client has an active cart
-        try:
-            cart = Cart.objects.get(client=client, purchased=False)
-        except Cart.DoesNotExist:
+        # Load the active cart with its items, customizations and options up front
+        cart = checkout_cart_queryset().filter(client=client, purchased=False).order_by('-created_at').first()
+        if cart is None:
             errors['cart'] = ['No active cart available for placing an order.']
-
-        if not cart.items.exists():
+        elif not cart.items.all():
             errors['cart'] = ['The cart does not contain any items.']
 
         if errors:
@@ -72,54 +108,33 @@ def place_order_view(request):
             payload['errors'] = errors
             return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-        # Create the order
-        with transaction.atomic():
-            # Create the Order instance
-            order = Order(
-                client=client,
-                total_price=0,  # Will be updated later
-                paid=False,
-                room=None,  # Optional or add from request if needed
-                order_date=order_date,
-                order_time=order_time,
-                delivery_date=delivery_date,
-                delivery_time=delivery_time,
-                location_name=location_name,
-                digital_address=digital_address,
-                lat=lat,
-                lng=lng,
-                delivery_fee=delivery_fee,
-                tax=tax
-            )
-            order.save()
-
-            # Add items from the cart to the order
-            for cart_item in cart.items.all():
-                # Create the OrderItem and associate it with the Order
-                order_item = OrderItem(
-                    order=order,
-                    cart_item=cart_item,  # Link to CartItem (which includes customizations)
-                    quantity=cart_item.quantity
-                )
-                order_item.save()
-
-            # Update the total price for the order (this will calculate based on CartItems)
-            order.update_total_price()
-
-            # Set the order status to 'Pending'
-            OrderStatus.objects.create(order=order, status='Pending')
-
-            # Mark the cart as purchased
-            cart.purchased = True
-            cart.save()
+        order = Order(
+            chef=chef,
+            location=location,
+            delivery_window_start=delivery_window_start or None,
+            delivery_window_end=delivery_window_end or None,
+            delivery_fee=delivery_fee,
+            tax=tax,
+            fast_order=fast_order,
+        )
+        try:
+            result = checkout_cart(cart, order)
+        except DjangoValidationError as exc:
+            payload['message'] = "Errors"
+            payload['errors'] = exc.message_dict if hasattr(exc, 'error_dict') else {'order': exc.messages}
+            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
         # Prepare the response data
         order_data = {
             'order_id': order.order_id,
             'total_price': order.total_price,
-            'order_date': order.order_date,
-            'order_time': order.order_time,
-            'status': 'Pending',
+            'grocery_advance_amount': order.grocery_advance_amount,
+            'platform_fee_amount': order.platform_fee_amount,
+            'final_payout_amount': order.final_payout_amount,
+            'delivery_window_start': order.delivery_window_start,
+            'delivery_window_end': order.delivery_window_end,
+            'items_count': len(result.items),
+            'status': order.get_status_display(),
         }
 
         return Response({
@@ -310,8 +325,6 @@ def get_all_orders_view(request):
     # Extract query parameters
     client_id = request.query_params.get('client_id', None)
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10  # You can make this configurable as well
 
     # Start with all orders
     orders = Order.objects.all()
@@ -335,26 +348,20 @@ def get_all_orders_view(request):
         ).distinct()
 
     # Pagination
-    paginator = Paginator(orders, page_size)
+    paginator = KeysetPaginator(request)
+    if paginator.errors:
+        payload['message'] = "Errors"
+        payload['errors'] = paginator.errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        paginated_orders = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_orders = paginator.page(1)
-    except EmptyPage:
-        paginated_orders = paginator.page(paginator.num_pages)
+    paginated_orders = paginator.paginate(orders)
 
     # Serialize the orders
     orders_serializer = OrderSerializer(paginated_orders, many=True)
 
     # Prepare the data for pagination
     data['orders'] = orders_serializer.data
-    data['pagination'] = {
-        'page_number': paginated_orders.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_orders.next_page_number() if paginated_orders.has_next() else None,
-        'previous': paginated_orders.previous_page_number() if paginated_orders.has_previous() else None,
-    }
+    data['pagination'] = paginated_orders.envelope()
 
     payload['message'] = "Successful"
     payload['data'] = data
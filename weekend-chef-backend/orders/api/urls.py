@@ -1,6 +1,6 @@
 from django.urls import path
 
-from orders.api.cart_views import add_cart_item, cart_item_detail_view, delete_cart_item_view, edit_cart_item_view, get_all_carts_view, get_cart_detail_view, get_closest_chef_view, get_my_locations_view, set_order_view
+from orders.api.cart_views import add_cart_item, batch_cart_mutation_view, cart_item_detail_view, delete_cart_item_view, edit_cart_item_view, get_all_carts_view, get_cart_detail_view, get_closest_chef_view, get_my_locations_view, set_order_view
 from orders.api.chef_orders import change_chef_order_status_view, get_all_chef_orders_view, get_chef_order_details_view
 from orders.api.custom_options_view import add_custom_option, archive_custom_option, delete_custom_option, edit_custom_option_view, get_all_archived_custom_options_view, get_all_custom_options_view, get_custom_option_details_view, unarchive_custom_option
 from orders.api.orders import change_order_status_view, generate_shopping_list_for_order_item, get_all_orders_view, get_order_details_view, make_order_payment_view, place_order_view
@@ -27,6 +27,7 @@ path('get-all-cart-items/', get_all_carts_view, name='get_all_carts_view'),
     path('edit-cart-item/', edit_cart_item_view, name="edit_cart_item_view"),
     path('get-cart-item-details/', cart_item_detail_view, name="cart_item_detail_view"),
     path('delete-cart-item/', delete_cart_item_view, name="delete_cart_item_view"),
+    path('batch-cart-mutations/', batch_cart_mutation_view, name="batch_cart_mutation_view"),
 
 path('place-order/', place_order_view, name='place_order_view'),
 path('make-order-payment/', make_order_payment_view, name='make_order_payment_view'),
@@ -19,7 +19,7 @@ from orders.models import (
     OrderRating,
     OrderStatusTransition,
 )
-from orders.services import create_order_with_split, transition_order
+from orders.services import cart_total, checkout_cart_queryset, create_order_with_split, transition_order
 
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -163,10 +163,7 @@ class OrderSerializer(serializers.ModelSerializer):
         cart = validated_data.get("cart")
         if not cart:
             raise serializers.ValidationError({"cart": "Cart is required"})
-        total = Decimal("0")
-        for item in cart.items.all():
-            total += item.total_price()
-        validated_data["total_price"] = total
+        validated_data["total_price"] = cart_total(checkout_cart_queryset().get(pk=cart.pk))
         order = Order(**validated_data)
         try:
             return create_order_with_split(order)
@@ -1,15 +1,64 @@
+from collections import OrderedDict
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
+from orders.realtime import socket_groups, subscriptions_for
+from weekend_chef_project.websocket_auth import UNAUTHENTICATED_CLOSE_CODE
+
+# How many recent event ids a socket remembers to drop duplicate deliveries
+SEEN_EVENTS = 256
+
+
+class RealtimeGatewayConsumer(AsyncJsonWebsocketConsumer):
+    """
+    One authenticated socket per user for order status and order chat events.
+    The socket joins its user's group (plus the staff group for admins) rather
+    than a group per order, so group membership grows with connected users and
+    an assignment change needs no resubscription. The current subscription set
+    is sent on connect and on a ``subscriptions`` command.
+    """
 
-class OrderStatusConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):
-        self.order_id = self.scope["url_route"]["kwargs"]["order_id"]
-        self.group_name = f"order_{self.order_id}"
-        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        self.user = self.scope.get("user")
+        self.joined_groups = []
+        self.seen_events = OrderedDict()
+
+        if self.user is None or not self.user.is_authenticated:
+            await self.close(code=UNAUTHENTICATED_CLOSE_CODE)
+            return
+
+        for group in socket_groups(self.user):
+            await self.channel_layer.group_add(group, self.channel_name)
+            self.joined_groups.append(group)
         await self.accept()
+        await self.send_subscriptions()
+
+    async def disconnect(self, close_code):
+        for group in getattr(self, "joined_groups", ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def receive_json(self, content):
+        command = content.get("command", None)
+        if command == "subscriptions":
+            await self.send_subscriptions()
+        else:
+            await self.send_json({"error": "UNKNOWN_COMMAND", "message": "Unknown command."})
+
+    async def send_subscriptions(self):
+        subscriptions = await get_subscriptions(self.user)
+        await self.send_json({"type": "subscriptions", **subscriptions})
+
+    async def realtime_event(self, event):
+        event_id = event["event_id"]
+        if event_id in self.seen_events:
+            return
+        self.seen_events[event_id] = None
+        if len(self.seen_events) > SEEN_EVENTS:
+            self.seen_events.popitem(last=False)
+        await self.send_json(event["payload"])
 
-    async def disconnect(self, code):
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
-    async def order_status(self, event):
-        await self.send_json({"status": event["status"], "order_id": event["order_id"]})
+@database_sync_to_async
+def get_subscriptions(user):
+    return subscriptions_for(user)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from payments.ledger import recount_escrow_balances
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-order and per-chef escrow balances from the ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--order", type=int, action="append", dest="order_ids", help="Only this order (and its chef); repeatable.")
+
+    def handle(self, *args, **options):
+        orders, chefs = recount_escrow_balances(order_ids=options["order_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {orders} order and {chefs} chef escrow balances."))
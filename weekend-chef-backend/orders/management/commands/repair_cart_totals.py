@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from orders.services import repair_cart_totals
+
+
+class Command(BaseCommand):
+    help = "Recompute stored cart and cart item totals and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report drift, do not write anything.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        report = repair_cart_totals(commit=not options["dry_run"], batch_size=options["batch_size"])
+        verb = "would be repaired" if options["dry_run"] else "repaired"
+        self.stdout.write(f"Checked {report.items_checked} cart items, {report.items_repaired} {verb}.")
+        self.stdout.write(f"Checked {report.carts_checked} carts, {report.carts_repaired} {verb}.")
+        if report.items_repaired or report.carts_repaired:
+            self.stdout.write(self.style.WARNING("Cart totals had drifted."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Cart totals are consistent."))
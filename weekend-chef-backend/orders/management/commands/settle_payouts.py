@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from payments.settlement import settle_delivered_orders
+
+
+class Command(BaseCommand):
+    help = "Pay out delivered orders in per-chef batches, resuming any batch left pending."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--order", type=int, action="append", dest="order_ids", help="Only this order; repeatable.")
+        parser.add_argument("--limit", type=int, default=None, help="Most new orders to claim in this run.")
+
+    def handle(self, *args, **options):
+        report = settle_delivered_orders(order_ids=options["order_ids"], limit=options["limit"])
+        self.stdout.write(
+            f"Settled {report.orders} orders ({report.amount}) in {report.batches} batches "
+            f"in {report.elapsed:.2f}s ({report.orders_per_second:.1f} orders/s)."
+        )
+        self.stdout.write(f"Resumed {report.resumed} pending batches; {report.retrying} left pending, {report.failed} failed.")
+        if report.retrying or report.failed:
+            self.stdout.write(self.style.WARNING("Some payout batches did not settle."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Payouts are settled."))
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:12
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+
+CENTS = Decimal("0.01")
+
+
+def backfill_totals(apps, schema_editor):
+    Cart = apps.get_model("orders", "Cart")
+    CartItem = apps.get_model("orders", "CartItem")
+    OrderItem = apps.get_model("orders", "OrderItem")
+
+    unit_price = Coalesce(
+        Sum(
+            F("customizations__customization_option__price") * F("customizations__quantity"),
+            output_field=models.DecimalField(),
+        ),
+        Decimal("0"),
+    )
+    carts = {}
+    items = {}
+    for item in CartItem.objects.annotate(unit_customizations=unit_price):
+        item.customizations_price = Decimal(item.unit_customizations).quantize(CENTS)
+        unit = Decimal(str(item.package_price or 0)) + item.customizations_price
+        item.item_total_price = (unit * item.quantity).quantize(CENTS)
+        items[item.pk] = item
+        totals = carts.setdefault(item.cart_id, [Decimal("0"), 0])
+        totals[0] += item.item_total_price
+        totals[1] += 1
+    CartItem.objects.bulk_update(items.values(), ["customizations_price", "item_total_price"], batch_size=500)
+
+    cart_rows = list(Cart.objects.filter(pk__in=carts))
+    for cart in cart_rows:
+        cart.total_price, cart.item_count = carts[cart.pk]
+    Cart.objects.bulk_update(cart_rows, ["total_price", "item_count"], batch_size=500)
+
+    order_items = list(OrderItem.objects.all())
+    for order_item in order_items:
+        cart_item = items.get(order_item.cart_item_id)
+        if cart_item is not None:
+            unit = Decimal(str(cart_item.package_price or 0)) + cart_item.customizations_price
+            order_item.item_total_price = (unit * order_item.quantity).quantize(CENTS)
+    OrderItem.objects.bulk_update(order_items, ["item_total_price"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0004_orderallergenreport"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cart",
+            name="item_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="cart",
+            name="total_price",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name="cartitem",
+            name="customizations_price",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name="orderitem",
+            name="item_total_price",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=10, null=True
+            ),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
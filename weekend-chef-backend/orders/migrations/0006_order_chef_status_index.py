@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0002_messagetemplate_orderchatthread_ordermessage_and_more"),
+        ("chef", "0002_chefprofile_geohash"),
+        ("clients", "0001_initial"),
+        ("dispatch", "0001_initial"),
+        ("orders", "0005_cart_totals"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["chef", "status", "-created_at"], name="orders_chef_status_idx"
+            ),
+        ),
+    ]
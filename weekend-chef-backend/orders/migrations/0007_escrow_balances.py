@@ -0,0 +1,124 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:21
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+ONCE_PER_ORDER = ("grocery_advance", "platform_fee", "final_payout")
+
+
+def backfill_keys_and_balances(apps, schema_editor):
+    EscrowLedgerEntry = apps.get_model("orders", "EscrowLedgerEntry")
+    OrderEscrowBalance = apps.get_model("orders", "OrderEscrowBalance")
+    ChefEscrowBalance = apps.get_model("orders", "ChefEscrowBalance")
+
+    keyed = []
+    seen = set()
+    orders = defaultdict(lambda: defaultdict(int))
+    chefs = defaultdict(lambda: defaultdict(int))
+    entries = EscrowLedgerEntry.objects.order_by("processed_at", "pk").values_list("pk", "order_id", "order__chef_id", "entry_type", "amount")
+    for pk, order_id, chef_id, entry_type, amount in entries.iterator():
+        # Later duplicates of a once-per-order entry keep no key
+        if entry_type in ONCE_PER_ORDER and (order_id, entry_type) not in seen:
+            seen.add((order_id, entry_type))
+            keyed.append(EscrowLedgerEntry(pk=pk, idempotency_key=f"{order_id}:{entry_type}"))
+        for totals in (orders[order_id], chefs[chef_id]):
+            totals[entry_type] += amount
+            totals["entry_count"] += 1
+    EscrowLedgerEntry.objects.bulk_update(keyed, ["idempotency_key"], batch_size=500)
+    OrderEscrowBalance.objects.bulk_create(
+        [OrderEscrowBalance(order_id=order_id, **totals) for order_id, totals in orders.items()], batch_size=500
+    )
+    ChefEscrowBalance.objects.bulk_create(
+        [ChefEscrowBalance(chef_id=chef_id, **totals) for chef_id, totals in chefs.items()], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chef", "0002_chefprofile_geohash"),
+        ("orders", "0006_order_chef_status_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChefEscrowBalance",
+            fields=[
+                (
+                    "grocery_advance",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "platform_fee",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "final_payout",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "refund",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("entry_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "chef",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="escrow_balance",
+                        serialize=False,
+                        to="chef.chefprofile",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="OrderEscrowBalance",
+            fields=[
+                (
+                    "grocery_advance",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "platform_fee",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "final_payout",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "refund",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("entry_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "order",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="escrow_balance",
+                        serialize=False,
+                        to="orders.order",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.AddField(
+            model_name="escrowledgerentry",
+            name="idempotency_key",
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_keys_and_balances, migrations.RunPython.noop),
+    ]
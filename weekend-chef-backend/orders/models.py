@@ -1,8 +1,12 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 from decimal import Decimal
 
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models.signals import post_save, pre_save
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.utils import timezone
 
 from chats.models import PrivateChatRoom
@@ -13,15 +17,56 @@ from food.models import CustomizationOption, Dish, DishIngredient
 from weekend_chef_project.utils import unique_order_id_generator
 
 
+CENTS = Decimal("0.01")
+
+
 class Cart(models.Model):
     client = models.ForeignKey(Client, related_name="carts", on_delete=models.CASCADE)
     purchased = models.BooleanField(default=False)
+    # Kept in step by CartItem saves/deletes; `repair_cart_totals` fixes any drift
+    total_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    item_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         return f"Cart for {self.client.user.first_name}"
 
 
+_deferred_cart_ids = ContextVar("deferred_cart_ids", default=None)
+
+
+@contextmanager
+def deferred_cart_totals():
+    """
+    Skip per-row cart total updates inside the block and rebuild every touched cart
+    once on exit. Used by batch cart writes.
+    """
+    if _deferred_cart_ids.get() is not None:
+        yield
+        return
+    cart_ids = set()
+    token = _deferred_cart_ids.set(cart_ids)
+    try:
+        yield cart_ids
+    finally:
+        _deferred_cart_ids.reset(token)
+    for cart_id in cart_ids:
+        refresh_cart_totals(cart_id)
+
+
+def apply_cart_delta(cart_id, total_delta, count_delta=0):
+    deferred = _deferred_cart_ids.get()
+    if deferred is not None:
+        if cart_id:
+            deferred.add(cart_id)
+        return
+    if cart_id and (total_delta or count_delta):
+        Cart.objects.filter(pk=cart_id).update(
+            total_price=F("total_price") + total_delta,
+            item_count=F("item_count") + count_delta,
+        )
+
+
 class CustomizationValue(models.Model):
     customization_option = models.ForeignKey(CustomizationOption, related_name="values", on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
@@ -38,6 +83,8 @@ class CartItem(models.Model):
     value = models.CharField(max_length=200)
     package = models.CharField(max_length=200)
     package_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # Per-unit price of the selected customizations, refreshed when they change
+    customizations_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     item_total_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     customizations = models.ManyToManyField(CustomizationValue, related_name="cart_items", blank=True)
     special_notes = models.TextField(max_length=100, null=True, blank=True)
@@ -49,11 +96,101 @@ class CartItem(models.Model):
     def __str__(self):
         return f"{self.dish.name} (x{self.quantity})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what this row contributed to its cart so saves only apply the difference
+        instance._cart_contribution = (instance.__dict__.get("cart_id"), instance.__dict__.get("item_total_price", Ellipsis))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None:
+            self._cart_contribution = (self.cart_id, self.item_total_price)
+        elif not {"cart", "cart_id", "item_total_price"}.isdisjoint(fields):
+            # Only part of the row was reloaded, so the stored contribution is no longer known
+            self._cart_contribution = (self.cart_id, Ellipsis)
+
     def total_price(self):
-        base_price = Decimal(self.package_price or 0)
-        for customization in self.customizations.all():
-            base_price += Decimal(customization.customization_option.price) * customization.quantity
-        return base_price * self.quantity
+        if self.item_total_price is None:
+            return self.compute_total_price()
+        return self.item_total_price
+
+    def compute_total_price(self):
+        unit_price = Decimal(str(self.package_price or 0)) + Decimal(str(self.customizations_price or 0))
+        # quantity may still hold the raw request value ("2") until the row is reloaded
+        return (unit_price * int(self.quantity or 0)).quantize(CENTS)
+
+    def customization_unit_price(self):
+        """Price the selected customizations with a single aggregate query."""
+        if self.pk is None:
+            return Decimal("0")
+        return self.customizations.aggregate(
+            total=Coalesce(Sum(F("customization_option__price") * F("quantity"), output_field=models.DecimalField()), Decimal("0"))
+        )["total"]
+
+    def refresh_customizations_price(self):
+        self.customizations_price = Decimal(self.customization_unit_price()).quantize(CENTS)
+        self.save(update_fields=["customizations_price"])
+
+    def save(self, *args, **kwargs):
+        self.item_total_price = self.compute_total_price()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "item_total_price"}
+        adding = self._state.adding
+        previous_cart_id, previous_total = getattr(self, "_cart_contribution", (None, None))
+        super().save(*args, **kwargs)
+
+        if adding:
+            apply_cart_delta(self.cart_id, self.item_total_price, 1)
+        elif previous_total is Ellipsis or previous_total is None:
+            # The previous contribution is unknown, so rebuild the cart totals from its rows
+            refresh_cart_totals(self.cart_id)
+        elif previous_cart_id != self.cart_id:
+            apply_cart_delta(previous_cart_id, -previous_total, -1)
+            apply_cart_delta(self.cart_id, self.item_total_price, 1)
+        else:
+            apply_cart_delta(self.cart_id, self.item_total_price - previous_total)
+        self._cart_contribution = (self.cart_id, self.item_total_price)
+
+
+def refresh_cart_totals(cart_id):
+    deferred = _deferred_cart_ids.get()
+    if deferred is not None:
+        deferred.add(cart_id)
+        return
+    totals = CartItem.objects.filter(cart_id=cart_id).aggregate(
+        total=Coalesce(Sum("item_total_price"), Decimal("0")),
+        count=models.Count("id"),
+    )
+    Cart.objects.filter(pk=cart_id).update(total_price=totals["total"], item_count=totals["count"])
+
+
+def post_delete_cart_item_receiver(sender, instance, *args, **kwargs):
+    apply_cart_delta(instance.cart_id, -(instance.item_total_price or 0), -1)
+
+
+post_delete.connect(post_delete_cart_item_receiver, sender=CartItem)
+
+
+def cart_item_customizations_changed_receiver(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear", "pre_clear"):
+        return
+    if not reverse:
+        if action != "pre_clear":
+            instance.refresh_customizations_price()
+        return
+    # A customization value was attached to / detached from cart items
+    if action == "pre_clear":
+        instance._cleared_cart_item_ids = list(instance.cart_items.values_list("pk", flat=True))
+        return
+    cart_item_ids = pk_set if action != "post_clear" else getattr(instance, "_cleared_cart_item_ids", [])
+    for cart_item in CartItem.objects.filter(pk__in=cart_item_ids):
+        cart_item.refresh_customizations_price()
+
+
+m2m_changed.connect(cart_item_customizations_changed_receiver, sender=CartItem.customizations.through)
 
 
 class Order(models.Model):
@@ -90,9 +227,24 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["chef", "status", "-created_at"], name="orders_chef_status_idx"),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} for {self.client.user.first_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember who the chat thread was synced for so unrelated saves skip the sync
+        instance._synced_participants = instance.participant_assignment()
+        return instance
+
+    def participant_assignment(self):
+        return tuple(self.__dict__.get(field) for field in ("client_id", "chef_id", "dispatch_id"))
+
     def clean(self):
         if self.delivery_window_start and self.delivery_window_end and self.delivery_window_start >= self.delivery_window_end:
             raise ValidationError("Delivery window end must be after start.")
@@ -162,15 +314,18 @@ class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name="items", on_delete=models.CASCADE)
     cart_item = models.ForeignKey(CartItem, related_name="order_items", on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
+    # Snapshot of the cart item total at checkout
+    item_total_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
 
     def __str__(self):
         return f"{self.cart_item.dish.name} (x{self.quantity})"
 
     def total_price(self):
-        base_price = Decimal(self.cart_item.package_price or 0)
-        for customization in self.cart_item.customizations.all():
-            base_price += Decimal(customization.customization_option.price) * customization.quantity
-        return base_price * self.quantity
+        if self.item_total_price is not None:
+            return self.item_total_price
+        cart_item = self.cart_item
+        unit_price = Decimal(str(cart_item.package_price or 0)) + Decimal(str(cart_item.customizations_price or 0))
+        return (unit_price * self.quantity).quantize(CENTS)
 
 
 class OrderPayment(models.Model):
@@ -193,12 +348,83 @@ class EscrowLedgerEntry(models.Model):
     entry_type = models.CharField(max_length=32, choices=EntryType.choices)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     reference = models.CharField(max_length=255, blank=True)
+    # "<order pk>:<entry type>" for the once-per-order entries; refunds may repeat and go without
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
     processed_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["processed_at"]
 
 
+class EscrowBalance(models.Model):
+    """Running ledger totals per entry type, written in the transaction that posts the entries."""
+
+    grocery_advance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    platform_fee = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    final_payout = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    refund = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    entry_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    AMOUNT_FIELDS = [choice.value for choice in EscrowLedgerEntry.EntryType]
+
+    class Meta:
+        abstract = True
+
+    @property
+    def paid_out(self) -> Decimal:
+        """What has reached the chef: the grocery advance, the final payout and any adjustments."""
+        return self.grocery_advance + self.final_payout + self.refund
+
+
+class OrderEscrowBalance(EscrowBalance):
+    order = models.OneToOneField(Order, primary_key=True, related_name="escrow_balance", on_delete=models.CASCADE)
+
+
+class ChefEscrowBalance(EscrowBalance):
+    chef = models.OneToOneField(ChefProfile, primary_key=True, related_name="escrow_balance", on_delete=models.CASCADE)
+
+
+class PayoutBatch(models.Model):
+    """
+    One gateway release covering a chef's delivered orders. The batch and its
+    items are written before the gateway is called, so a run that stops
+    part-way resumes by re-issuing the release with the same idempotency key.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SETTLED = "settled", "Settled"
+        FAILED = "failed", "Failed"
+
+    chef = models.ForeignKey(ChefProfile, related_name="payout_batches", on_delete=models.CASCADE)
+    idempotency_key = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+    reference = models.CharField(max_length=255, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    settled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["pk"]
+        indexes = [
+            models.Index(fields=["status"], name="payout_batch_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"Payout {self.idempotency_key} ({self.status})"
+
+
+class PayoutBatchItem(models.Model):
+    batch = models.ForeignKey(PayoutBatch, related_name="items", on_delete=models.CASCADE)
+    order = models.ForeignKey(Order, related_name="payout_items", on_delete=models.CASCADE)
+    # The final payout as it stood when the batch was drawn up
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+
+
 class OrderRating(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="order_ratings")
     rating = models.IntegerField(default=0)
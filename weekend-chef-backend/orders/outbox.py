@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from orders.models import Order
+from orders.realtime import order_recipients, publish, publish_order_status
+from outbox.handlers import register
+from payments.services import get_payment_gateway
+
+ORDER_CREATED = "order.created"
+ORDER_STATUS_CHANGED = "order.status_changed"
+ESCROW_HOLD = "escrow.hold"
+ESCROW_RELEASE = "escrow.release"
+
+
+@register(ORDER_CREATED)
+def announce_order(event) -> None:
+    payload = event.payload
+    publish(
+        order_recipients(payload["order"]),
+        {"type": "order.created", "order_id": payload["order_id"], "status": payload["status"]},
+        fail_silently=False,
+    )
+
+
+@register(ORDER_STATUS_CHANGED)
+def broadcast_status_change(event) -> None:
+    payload = event.payload
+    # The status is the one the transition wrote, even if the order has moved on since
+    publish_order_status(payload["order"], payload["order_id"], payload["status"], fail_silently=False)
+
+
+@register(ESCROW_HOLD)
+def place_escrow_hold(event) -> None:
+    order = Order.objects.only("pk", "order_id").get(pk=event.payload["order"])
+    get_payment_gateway().create_hold(order, Decimal(event.payload["amount"]), idempotency_key=event.idempotency_key)
+
+
+# Final payouts are released in batches by payments.settlement; this only drains
+# release events recorded before that
+@register(ESCROW_RELEASE)
+def release_escrow(event) -> None:
+    get_payment_gateway().release(event.payload["reference"], Decimal(event.payload["amount"]), idempotency_key=event.idempotency_key)
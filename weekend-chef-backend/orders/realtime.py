@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import logging
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+
+from chats.models import OrderChatThread, ThreadParticipant
+from orders.models import Order
+
+logger = logging.getLogger(__name__)
+
+# Admins see every order through one shared group instead of one group per order
+STAFF_GROUP = "realtime.staff"
+# Orders in these states no longer produce events and drop out of the subscription set
+CLOSED_STATUSES = (Order.Status.COMPLETED, Order.Status.CANCELLED)
+
+
+def user_group(user_id) -> str:
+    """The one channel-layer group every socket of a user joins."""
+    return f"realtime.user.{user_id}"
+
+
+def socket_groups(user) -> list[str]:
+    groups = [user_group(user.pk)]
+    if user.is_staff:
+        groups.append(STAFF_GROUP)
+    return groups
+
+
+def subscriptions_for(user) -> dict:
+    """
+    The orders and chat threads a user's socket receives events for, derived
+    from who the orders are assigned to. Sent when the socket connects so the
+    client knows what it is listening to; delivery itself only needs the
+    user's group.
+    """
+    assigned = (
+        Order.objects.filter(Q(client__user=user) | Q(chef__user=user) | Q(dispatch__user=user))
+        .exclude(status__in=CLOSED_STATUSES)
+        .values_list("order_id", "status", "client__user_id", "chef__user_id", "dispatch__user_id")
+        .order_by("-created_at")
+    )
+    orders = []
+    roles = set()
+    for order_id, status, client_user_id, chef_user_id, dispatch_user_id in assigned:
+        # Same precedence as the chat thread roles
+        role = {
+            client_user_id: OrderChatThread.Role.CLIENT,
+            chef_user_id: OrderChatThread.Role.CHEF,
+            dispatch_user_id: OrderChatThread.Role.DISPATCH,
+        }[user.pk]
+        roles.add(role)
+        orders.append({"order_id": order_id, "status": status, "role": role})
+
+    threads = list(
+        ThreadParticipant.objects.filter(user=user, is_active=True)
+        .exclude(thread__order__status__in=CLOSED_STATUSES)
+        .values_list("thread__order__order_id", flat=True)
+    )
+    if user.is_staff:
+        roles.add(OrderChatThread.Role.ADMIN)
+    return {"roles": sorted(roles), "orders": orders, "threads": threads}
+
+
+def publish(user_ids, payload: dict, *, staff: bool = True, fail_silently: bool = True) -> None:
+    """
+    Push ``payload`` to every socket of ``user_ids`` (and of staff) with one
+    group_send per user. A user who is both assigned and staff gets the event
+    on two groups; the shared ``event_id`` lets their sockets drop the copy.
+    With ``fail_silently=False`` channel layer errors propagate so the caller
+    can retry.
+    """
+    try:
+        channel_layer = get_channel_layer()
+    except ImproperlyConfigured:
+        channel_layer = None
+    if channel_layer is None:
+        return
+
+    message = {"type": "realtime.event", "event_id": uuid.uuid4().hex, "payload": payload}
+    groups = [user_group(user_id) for user_id in {user_id for user_id in user_ids if user_id is not None}]
+    if staff:
+        groups.append(STAFF_GROUP)
+    try:
+        for group in groups:
+            async_to_sync(channel_layer.group_send)(group, message)
+    except Exception:  # pragma: no cover - log and continue when redis unavailable
+        if not fail_silently:
+            raise
+        logger.debug("Skipping realtime event; channel layer unavailable.", exc_info=True)
+
+
+def order_recipients(order_pk) -> tuple:
+    """User ids of the order's client, chef and dispatch rider in one query."""
+    return (
+        Order.objects.filter(pk=order_pk)
+        .values_list("client__user_id", "chef__user_id", "dispatch__user_id")
+        .first()
+        or ()
+    )
+
+
+def publish_order_status(order_pk, order_id, status: str, *, fail_silently: bool = True) -> None:
+    publish(
+        order_recipients(order_pk),
+        {"type": "order.status", "order_id": order_id, "status": status},
+        fail_silently=fail_silently,
+    )
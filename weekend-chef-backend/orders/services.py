@@ -1,17 +1,33 @@
 from __future__ import annotations
 
-import logging
 from dataclasses import dataclass
-from typing import Optional
+from decimal import Decimal
+from typing import Any, Optional
 
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
-from django.core.exceptions import ImproperlyConfigured
+from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import DecimalField, F, Prefetch, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from accounts.models import User
-from orders.models import EscrowLedgerEntry, Order, OrderStatusTransition
-from payments.services import record_split, release_final_payout
+from food.models import CustomizationOption, Dish
+from orders.models import (
+    CENTS,
+    Cart,
+    CartItem,
+    CustomizationValue,
+    EscrowLedgerEntry,
+    Order,
+    OrderItem,
+    OrderStatusTransition,
+    deferred_cart_totals,
+    refresh_cart_totals,
+)
+from orders.outbox import ESCROW_HOLD, ORDER_STATUS_CHANGED
+from outbox.dispatch import enqueue
+from payments.ledger import post_entries
+from payments.services import apply_split, hold_reference, hold_split, save_split, write_split_entries
 
 
 @dataclass
@@ -20,16 +36,74 @@ class StatusChangeResult:
     transition: OrderStatusTransition
 
 
+@dataclass
+class CheckoutResult:
+    order: Order
+    items: list[OrderItem]
+    ledger_entries: list[EscrowLedgerEntry]
+
+
+def checkout_cart_queryset():
+    """Carts with their items loaded in a fixed number of queries."""
+    return Cart.objects.select_related("client").prefetch_related(Prefetch("items", queryset=CartItem.objects.select_related("dish")))
+
+
+def cart_total(cart: Cart) -> Decimal:
+    """Sum the stored item totals of a cart loaded through ``checkout_cart_queryset``."""
+    return sum((item.total_price() for item in cart.items.all()), Decimal("0"))
+
+
 @transaction.atomic
 def create_order_with_split(order: Order) -> Order:
     order.full_clean()
+    split = apply_split(order)
     order.save()
-    record_split(order)
+    hold_split(order, split)
     return order
 
 
+@transaction.atomic
+def checkout_cart(cart: Cart, order: Order) -> CheckoutResult:
+    """
+    Turn a cart loaded through ``checkout_cart_queryset`` into ``order``: price it from
+    the stored item totals, write the order once with its split, then insert the order
+    items and the escrow ledger rows in one statement each. The query count does not
+    depend on the number of cart items.
+
+    The cart is claimed first with a conditional update, so of two concurrent
+    submissions of the same cart only one places an order; the other raises
+    ``ValidationError``.
+    """
+    cart_items = list(cart.items.all())
+    if not cart_items:
+        raise ValueError("The cart does not contain any items.")
+    if not Cart.objects.filter(pk=cart.pk, purchased=False).update(purchased=True):
+        raise ValidationError({"cart": ["This cart has already been checked out."]})
+    cart.purchased = True
+    order.cart = cart
+    order.client = cart.client
+    order.total_price = cart_total(cart)
+    order.full_clean()
+    split = apply_split(order)
+    order.save()
+    items = OrderItem.objects.bulk_create(
+        [
+            OrderItem(order=order, cart_item=cart_item, quantity=cart_item.quantity, item_total_price=cart_item.total_price())
+            for cart_item in cart_items
+        ]
+    )
+    ledger_entries = hold_split(order, split)
+    return CheckoutResult(order, items, ledger_entries)
+
+
 @transaction.atomic
 def transition_order(order: Order, new_status: str, *, changed_by: Optional[User] = None, notes: str = "") -> StatusChangeResult:
+    """
+    Move ``order`` to ``new_status`` and write its ledger rows. Only database
+    work happens here: the gateway hold and the status broadcast are recorded
+    as outbox events in the same transaction and delivered by a worker after
+    commit. Delivered orders are paid out later by the settlement job.
+    """
     if new_status not in Order.Status.values:
         raise ValueError("Invalid order status")
     if order.status == new_status:
@@ -44,29 +118,263 @@ def transition_order(order: Order, new_status: str, *, changed_by: Optional[User
             client_actor = changed_by
     transition = OrderStatusTransition.objects.create(order=order, status=new_status, changed_by=client_actor, notes=notes)
     if new_status == Order.Status.ACCEPTED:
-        record_split(order)
-    if new_status == Order.Status.DELIVERED:
-        release_final_payout(order)
-    try:
-        channel_layer = get_channel_layer()
-    except ImproperlyConfigured:
-        channel_layer = None
-    if channel_layer:
-        try:
-            async_to_sync(channel_layer.group_send)(
-                f"order_{order.pk}",
-                {
-                    "type": "order.status",
-                    "status": new_status,
-                    "order_id": order.order_id,
-                },
-            )
-        except Exception:  # pragma: no cover - log and continue when redis unavailable
-            logging.getLogger(__name__).debug("Skipping status broadcast; channel layer unavailable.", exc_info=True)
+        write_split_entries(order, save_split(order), hold_reference(order))
+        enqueue(ESCROW_HOLD, {"order": order.pk, "amount": str(order.total_price)}, f"{ESCROW_HOLD}:{order.pk}")
+    enqueue(
+        ORDER_STATUS_CHANGED,
+        {"order": order.pk, "order_id": order.order_id, "status": new_status},
+        f"{ORDER_STATUS_CHANGED}:{transition.pk}",
+    )
     return StatusChangeResult(order, transition)
 
 
+@transaction.atomic
 def apply_payout_adjustment(order: Order, amount):
-    EscrowLedgerEntry.objects.create(order=order, entry_type=EscrowLedgerEntry.EntryType.REFUND, amount=amount)
+    post_entries([EscrowLedgerEntry(order=order, entry_type=EscrowLedgerEntry.EntryType.REFUND, amount=amount)])
     order.final_payout_amount += amount
     order.save(update_fields=["final_payout_amount"])
+
+
+@dataclass
+class CartTotalsReport:
+    items_checked: int = 0
+    items_repaired: int = 0
+    carts_checked: int = 0
+    carts_repaired: int = 0
+
+
+def repair_cart_totals(*, commit: bool = True, batch_size: int = 500) -> CartTotalsReport:
+    """
+    Recompute the stored item and cart totals from the customization graph and fix
+    any rows that drifted (e.g. after an option price change). With ``commit=False``
+    only counts the drift.
+    """
+    report = CartTotalsReport()
+    unit_price = Coalesce(
+        Sum(F("customizations__customization_option__price") * F("customizations__quantity"), output_field=DecimalField()),
+        Decimal("0"),
+    )
+    items = CartItem.objects.annotate(expected_customizations_price=unit_price).only(
+        "pk", "cart_id", "quantity", "package_price", "customizations_price", "item_total_price"
+    )
+
+    expected_carts: dict[int, list] = {}
+    drifted_items = []
+    for item in items.order_by("pk").iterator(chunk_size=batch_size):
+        report.items_checked += 1
+        customizations_price = Decimal(item.expected_customizations_price).quantize(CENTS)
+        stored = (item.customizations_price, item.item_total_price)
+        item.customizations_price = customizations_price
+        item.item_total_price = item.compute_total_price()
+        if stored != (item.customizations_price, item.item_total_price):
+            drifted_items.append(item)
+        cart_totals = expected_carts.setdefault(item.cart_id, [Decimal("0"), 0])
+        cart_totals[0] += item.item_total_price
+        cart_totals[1] += 1
+
+    drifted_carts = []
+    for cart in Cart.objects.only("pk", "total_price", "item_count").order_by("pk").iterator(chunk_size=batch_size):
+        report.carts_checked += 1
+        total_price, item_count = expected_carts.get(cart.pk, (Decimal("0"), 0))
+        if (cart.total_price, cart.item_count) != (total_price, item_count):
+            cart.total_price, cart.item_count = total_price, item_count
+            drifted_carts.append(cart)
+
+    report.items_repaired = len(drifted_items)
+    report.carts_repaired = len(drifted_carts)
+    if commit:
+        with transaction.atomic():
+            CartItem.objects.bulk_update(drifted_items, ["customizations_price", "item_total_price"], batch_size=batch_size)
+            Cart.objects.bulk_update(drifted_carts, ["total_price", "item_count"], batch_size=batch_size)
+    return report
+
+
+class CartMutationError(ValueError):
+    def __init__(self, errors: dict[str, list[str]]):
+        super().__init__("Invalid cart mutation.")
+        self.errors = errors
+
+
+def positive_int(value) -> Optional[int]:
+    """A quantity or id from request data as a positive int, or None (JSON and form values alike)."""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def _decimal(value) -> Optional[Decimal]:
+    """A finite, non-negative decimal, or ``None``."""
+    try:
+        value = Decimal(str(value))
+    except (ArithmeticError, ValueError):
+        return None
+    return value if value.is_finite() and value >= 0 else None
+
+
+def _lookup_id(value) -> Optional[str | int]:
+    """``value`` if it can key an ``in_bulk`` lookup, else ``None`` (lists, objects, booleans)."""
+    return value if isinstance(value, (str, int)) and not isinstance(value, bool) else None
+
+
+def cart_with_items_queryset():
+    customizations = CustomizationValue.objects.select_related("customization_option")
+    items = CartItem.objects.select_related("dish").prefetch_related(Prefetch("customizations", queryset=customizations)).order_by("created_at", "pk")
+    return Cart.objects.prefetch_related(Prefetch("items", queryset=items))
+
+
+@transaction.atomic
+def apply_cart_mutations(cart: Cart, *, add: list[dict[str, Any]] = (), update: list[dict[str, Any]] = (), remove: list[Any] = ()) -> Cart:
+    """
+    Apply a batch of cart item adds, updates and removals in one transaction.
+
+    Every dish, customization option and cart item referenced by the batch is looked
+    up with one ``in_bulk`` query per model and the whole batch is validated before
+    anything is written; on any error nothing changes and ``CartMutationError`` is
+    raised with per-entry messages. Customizations given for an update replace the
+    item's current ones. Returns the cart reloaded through ``cart_with_items_queryset``.
+    """
+    errors: dict[str, list[str]] = {}
+
+    # Shape checks first, so the lookups below only see dicts, lists of dicts and scalar ids
+    for field, entries in (("add", add), ("update", update)):
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                errors[f"{field}[{index}]"] = ["Entry must be an object."]
+            elif "customizations" in entry and not (
+                isinstance(entry["customizations"], (list, type(None)))
+                and all(isinstance(customization, dict) for customization in entry["customizations"] or [])
+            ):
+                errors[f"{field}[{index}].customizations"] = ["Customizations must be a list of objects."]
+    if errors:
+        raise CartMutationError(errors)
+
+    dish_ids = {_lookup_id(entry.get("dish_id")) for entry in add}
+    option_ids = {
+        _lookup_id(customization.get("custom_option_id"))
+        for entry in [*add, *update]
+        for customization in entry.get("customizations") or []
+    }
+    updated_ids = {positive_int(entry.get("id")) for entry in update}
+    item_ids = updated_ids | {positive_int(item_id) for item_id in remove}
+    dishes = Dish.objects.in_bulk([dish_id for dish_id in dish_ids if dish_id], field_name="dish_id")
+    options = CustomizationOption.objects.in_bulk([option_id for option_id in option_ids if option_id], field_name="custom_option_id")
+    items = CartItem.objects.filter(cart=cart).in_bulk([item_id for item_id in item_ids if item_id])
+
+    def customization_rows(prefix, entry):
+        rows = []
+        for index, customization in enumerate(entry.get("customizations") or []):
+            option = options.get(_lookup_id(customization.get("custom_option_id")))
+            quantity = positive_int(customization.get("quantity", 1))
+            if option is None:
+                errors[f"{prefix}.customizations[{index}].custom_option_id"] = ["Customization option does not exist."]
+            if quantity is None:
+                errors[f"{prefix}.customizations[{index}].quantity"] = ["Customization quantity must be greater than 0."]
+            rows.append((option, quantity))
+        return rows
+
+    new_items = []
+    for index, entry in enumerate(add):
+        prefix = f"add[{index}]"
+        dish = dishes.get(_lookup_id(entry.get("dish_id")))
+        quantity = positive_int(entry.get("quantity"))
+        package_price = _decimal(entry.get("package_price"))
+        if dish is None:
+            errors[f"{prefix}.dish_id"] = ["Dish does not exist."]
+        if quantity is None:
+            errors[f"{prefix}.quantity"] = ["Quantity must be greater than 0."]
+        for field in ("package", "value"):
+            if not entry.get(field):
+                errors[f"{prefix}.{field}"] = [f"{field.capitalize()} is required."]
+        if package_price is None:
+            errors[f"{prefix}.package_price"] = ["Package price must be a valid non-negative number."]
+        rows = customization_rows(prefix, entry)
+        item = CartItem(
+            cart=cart,
+            dish=dish,
+            quantity=quantity,
+            value=entry.get("value"),
+            package=entry.get("package"),
+            package_price=package_price,
+            is_custom=bool(rows),
+            special_notes=entry.get("special_notes", ""),
+        )
+        new_items.append((item, rows))
+
+    changed_items = []
+    for index, entry in enumerate(update):
+        prefix = f"update[{index}]"
+        item = items.get(positive_int(entry.get("id")))
+        if item is None:
+            errors[f"{prefix}.id"] = ["Cart item does not exist in this cart."]
+        if "quantity" in entry and positive_int(entry["quantity"]) is None:
+            errors[f"{prefix}.quantity"] = ["Quantity must be greater than 0."]
+        rows = customization_rows(prefix, entry) if "customizations" in entry else None
+        changed_items.append((item, entry, rows))
+
+    removed_ids = []
+    for index, item_id in enumerate(remove):
+        item_id = positive_int(item_id)
+        if item_id not in items:
+            errors[f"remove[{index}]"] = ["Cart item does not exist in this cart."]
+        elif item_id in updated_ids:
+            errors[f"remove[{index}]"] = ["Cart item cannot be updated and removed in the same batch."]
+        removed_ids.append(item_id)
+
+    if errors:
+        raise CartMutationError(errors)
+
+    def apply_customizations(item, rows):
+        item.customizations_price = sum(
+            (option.price * quantity for option, quantity in rows), Decimal("0")
+        ).quantize(CENTS)
+        item.item_total_price = item.compute_total_price()
+        return [CustomizationValue(customization_option=option, quantity=quantity) for option, quantity in rows]
+
+    Through = CartItem.customizations.through
+    with deferred_cart_totals():
+        if removed_ids:
+            CustomizationValue.objects.filter(cart_items__in=removed_ids).delete()
+            CartItem.objects.filter(cart=cart, pk__in=removed_ids).delete()
+
+        links = []
+        update_fields = {"item_total_price", "updated_at"}
+        replaced_ids = []
+        for item, entry, rows in changed_items:
+            if "quantity" in entry:
+                item.quantity = positive_int(entry["quantity"])
+                update_fields.add("quantity")
+            if "special_notes" in entry:
+                item.special_notes = entry["special_notes"]
+                update_fields.add("special_notes")
+            if rows is not None:
+                values = apply_customizations(item, rows)
+                links.append((item, values))
+                replaced_ids.append(item.pk)
+                item.is_custom = bool(rows)
+                update_fields.update({"customizations_price", "is_custom"})
+            item.item_total_price = item.compute_total_price()
+            item.updated_at = timezone.now()
+        if replaced_ids:
+            CustomizationValue.objects.filter(cart_items__in=replaced_ids).delete()
+        if changed_items:
+            CartItem.objects.bulk_update([item for item, _, _ in changed_items], sorted(update_fields))
+
+        for item, rows in new_items:
+            links.append((item, apply_customizations(item, rows)))
+        CartItem.objects.bulk_create([item for item, _ in new_items])
+
+        values = CustomizationValue.objects.bulk_create([value for _, item_values in links for value in item_values])
+        Through.objects.bulk_create(
+            [
+                Through(cartitem_id=item.pk, customizationvalue_id=value.pk)
+                for item, item_values in links
+                for value in item_values
+            ]
+        )
+        if new_items or changed_items:
+            # bulk writes skip CartItem.save, so mark the cart for a rebuild explicitly
+            refresh_cart_totals(cart.pk)
+
+    return cart_with_items_queryset().get(pk=cart.pk)
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from orders.models import Order
+from orders.outbox import ORDER_CREATED
+from outbox.dispatch import enqueue
+
+
+@receiver(post_save, sender=Order)
+def record_order_created(sender, instance, created, using, **kwargs):
+    if created:
+        enqueue(
+            ORDER_CREATED,
+            {"order": instance.pk, "order_id": instance.order_id, "status": instance.status},
+            f"{ORDER_CREATED}:{instance.pk}",
+            using=using,
+        )
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from payments.settlement import settle_delivered_orders as settle
+
+
+@shared_task
+def settle_delivered_orders():
+    report = settle()
+    return report.orders
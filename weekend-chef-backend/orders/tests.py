@@ -1,5 +1,16 @@
 from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
@@ -8,10 +19,16 @@ from rest_framework.test import APITestCase
 
 from accounts.models import User
 from chef.models import ChefProfile
-from clients.models import Allergy, Client
+from clients.models import Allergy, Client, ClientHomeLocation
 from dispatch.models import DispatchDriver
-from food.models import FoodCategory, Dish
-from orders.models import Cart, CartItem, Order
+from food.models import CustomizationOption, FoodCategory, Dish
+from orders.consumers import RealtimeGatewayConsumer
+from orders.models import Cart, CartItem, ChefEscrowBalance, CustomizationValue, EscrowLedgerEntry, Order, OrderEscrowBalance, PayoutBatch
+from orders.services import CartMutationError, apply_cart_mutations, apply_payout_adjustment, checkout_cart, checkout_cart_queryset, transition_order
+from payments.ledger import post_entries, recount_escrow_balances
+from payments.services import PaymentGateway, hold_reference
+from payments.settlement import claim_batches, settle_batch, settle_delivered_orders
+from weekend_chef_project.websocket_auth import UNAUTHENTICATED_CLOSE_CODE, TokenAuthMiddlewareStack
 
 
 class OrderApiTests(APITestCase):
@@ -64,6 +81,9 @@ class OrderApiTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         order.refresh_from_db()
         self.assertEqual(order.status, Order.Status.DELIVERED)
+        # The final payout waits for the settlement job
+        self.assertEqual(order.escrow_entries.count(), 2)
+        settle_delivered_orders()
         self.assertEqual(order.escrow_entries.count(), 3)
 
     def test_scheduler_prevents_overlap(self):
@@ -160,3 +180,518 @@ class OrderApiTests(APITestCase):
         ack_url = reverse("orders:v2:order-acknowledge-allergens", args=[order_id])
         response = self.client.post(ack_url, {"acknowledgement_notes": ""}, format="json", **self._auth(self.chef_token.key))
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ClosestChefSearchTests(APITestCase):
+    def setUp(self):
+        self.client_user = User.objects.create_user(email="nearby-client@test.com", password="secret", first_name="Client", last_name="User")
+        self.client_profile = Client.objects.create(user=self.client_user)
+        self.client_token = Token.objects.get(user=self.client_user)
+        self.location = ClientHomeLocation.objects.create(client=self.client_profile, lat="5.6037", lng="-0.1870")
+
+        self.chefs = []
+        for index in range(5):
+            user = User.objects.create_user(email=f"nearby-chef{index}@test.com", password="secret", first_name="Chef", last_name=str(index))
+            self.chefs.append(ChefProfile.objects.create(
+                user=user,
+                lat=Decimal("5.6037") + Decimal("0.01") * (index + 1),
+                lng="-0.1870",
+                active=True,
+                review_status=ChefProfile.ReviewStatus.APPROVED,
+            ))
+        self.url = reverse("orders:get_closest_chef_view")
+
+    def _search(self, **params):
+        query = {"user_id": self.client_user.user_id, "location_id": self.location.pk, "radius": 20, **params}
+        return self.client.get(self.url, query, HTTP_AUTHORIZATION=f"Token {self.client_token.key}")
+
+    def test_pages_follow_distance_order_with_cursor(self):
+        seen = []
+        cursor = None
+        while True:
+            response = self._search(page_size=2, **({"cursor": cursor} if cursor else {}))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.data["data"]
+            self.assertLessEqual(len(data["nearby_chefs"]), 2)
+            seen.extend(chef["chef_id"] for chef in data["nearby_chefs"])
+            cursor = data["pagination"]["next"]
+            if cursor is None:
+                break
+        self.assertEqual(seen, [chef.chef_id for chef in self.chefs])
+
+    def test_page_query_count_does_not_grow_with_matches(self):
+        with CaptureQueriesContext(connection) as small:
+            self._search(page_size=2, radius=2)
+        with CaptureQueriesContext(connection) as large:
+            self._search(page_size=2)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self._search(cursor="not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("cursor", response.data["errors"])
+
+
+class PlaceOrderCheckoutTests(APITestCase):
+    def setUp(self):
+        self.category = FoodCategory.objects.create(name="Soups")
+        self.dish = Dish.objects.create(name="Light Soup", category=self.category, description="")
+        self.spice = CustomizationOption.objects.create(option_type="Spice", name="Extra pepper", price=Decimal("2.50"))
+        self.protein = CustomizationOption.objects.create(option_type="Protein", name="Goat meat", price=Decimal("10.00"))
+
+        chef_user = User.objects.create_user(email="checkout-chef@test.com", password="secret", first_name="Chef", last_name="User")
+        self.chef_profile = ChefProfile.objects.create(user=chef_user)
+
+    def _client_with_cart(self, email, item_count):
+        user = User.objects.create_user(email=email, password="secret", first_name="Client", last_name="User")
+        client = Client.objects.create(user=user)
+        cart = Cart.objects.create(client=client)
+        for _ in range(item_count):
+            item = CartItem.objects.create(cart=cart, dish=self.dish, quantity=2, value="Large", package="Large", package_price=Decimal("40.00"))
+            item.customizations.add(
+                CustomizationValue.objects.create(customization_option=self.spice, quantity=1),
+                CustomizationValue.objects.create(customization_option=self.protein, quantity=2),
+            )
+        return client, cart, Token.objects.get(user=user)
+
+    def _place(self, client, token):
+        return self.client.post(
+            reverse("orders:place_order_view"),
+            {"client_id": client.client_id, "chef_id": self.chef_profile.chef_id},
+            format="json",
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+        )
+
+    def test_checkout_prices_items_and_records_split(self):
+        client, cart, token = self._client_with_cart("checkout-one@test.com", 3)
+        response = self._place(client, token)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        order = Order.objects.get(order_id=response.data["data"]["order_id"])
+        # (40 + 2.50 + 2 * 10) * 2 per item
+        self.assertEqual(order.total_price, Decimal("375.00"))
+        self.assertEqual(order.items.count(), 3)
+        self.assertEqual(order.escrow_entries.count(), 2)
+        self.assertGreater(order.grocery_advance_amount, 0)
+        cart.refresh_from_db()
+        self.assertTrue(cart.purchased)
+
+        response = self._place(client, token)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("cart", response.data["errors"])
+
+    def test_impossible_delivery_window_is_rejected(self):
+        client, _, token = self._client_with_cart("checkout-window@test.com", 1)
+        response = self.client.post(
+            reverse("orders:place_order_view"),
+            {"client_id": client.client_id, "chef_id": self.chef_profile.chef_id, "delivery_window_start": "2024-13-45T10:00"},
+            format="json",
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("delivery_window_start", response.data["errors"])
+
+    def test_a_cart_loaded_twice_is_only_checked_out_once(self):
+        client, cart, _ = self._client_with_cart("checkout-twice@test.com", 2)
+        first = checkout_cart_queryset().get(pk=cart.pk)
+        second = checkout_cart_queryset().get(pk=cart.pk)
+        list(second.items.all())
+
+        checkout_cart(first, Order(chef=self.chef_profile))
+        with self.assertRaises(ValidationError) as raised:
+            checkout_cart(second, Order(chef=self.chef_profile))
+        self.assertIn("cart", raised.exception.message_dict)
+        self.assertEqual(Order.objects.filter(cart=cart).count(), 1)
+
+    def test_checkout_query_count_is_constant_in_cart_size(self):
+        small_client, _, small_token = self._client_with_cart("checkout-small@test.com", 1)
+        large_client, _, large_token = self._client_with_cart("checkout-large@test.com", 8)
+
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self._place(small_client, small_token).status_code, status.HTTP_201_CREATED)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self._place(large_client, large_token).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+class EscrowLedgerTests(TestCase):
+    def setUp(self):
+        client = Client.objects.create(user=User.objects.create_user(email="ledger-client@test.com", password="secret"))
+        self.chef = ChefProfile.objects.create(user=User.objects.create_user(email="ledger-chef@test.com", password="secret"))
+        self.orders = [
+            Order.objects.create(client=client, chef=self.chef, total_price=Decimal(total))
+            for total in ("100.00", "50.00")
+        ]
+
+    def test_entries_post_once_and_keep_order_and_chef_balances_current(self):
+        first, second = self.orders
+        transition_order(first, Order.Status.ACCEPTED)
+        # Posting the split again, as a retried transition would, changes nothing
+        transition_order(first, Order.Status.PENDING)
+        transition_order(first, Order.Status.ACCEPTED)
+        transition_order(first, Order.Status.DELIVERED)
+        transition_order(second, Order.Status.ACCEPTED)
+        settle_delivered_orders()
+        apply_payout_adjustment(first, Decimal("-5.00"))
+        apply_payout_adjustment(first, Decimal("-2.50"))
+
+        self.assertEqual(first.escrow_entries.count(), 5)
+        balance = OrderEscrowBalance.objects.get(order=first)
+        self.assertEqual(
+            (balance.grocery_advance, balance.platform_fee, balance.final_payout, balance.refund, balance.entry_count),
+            (Decimal("40.00"), Decimal("12.00"), Decimal("48.00"), Decimal("-7.50"), 5),
+        )
+        self.assertEqual(balance.paid_out, Decimal("80.50"))
+        chef_balance = ChefEscrowBalance.objects.get(chef=self.chef)
+        self.assertEqual((chef_balance.grocery_advance, chef_balance.entry_count), (Decimal("60.00"), 7))
+
+        # Rebuilding from the ledger agrees with the running totals
+        ChefEscrowBalance.objects.update(grocery_advance=0)
+        self.assertEqual(recount_escrow_balances(), (2, 1))
+        self.assertEqual(ChefEscrowBalance.objects.get(chef=self.chef).grocery_advance, Decimal("60.00"))
+        self.assertEqual(OrderEscrowBalance.objects.get(order=first).refund, Decimal("-7.50"))
+
+    def test_posting_cost_does_not_depend_on_entry_count(self):
+        def entries(amount):
+            return [
+                EscrowLedgerEntry(order=order, entry_type=EscrowLedgerEntry.EntryType.REFUND, amount=Decimal(amount))
+                for order in self.orders
+            ]
+
+        with CaptureQueriesContext(connection) as one:
+            post_entries(entries("1.00")[:1])
+        with CaptureQueriesContext(connection) as many:
+            post_entries([entry for _ in range(5) for entry in entries("1.00")])
+        self.assertEqual(len(one.captured_queries), len(many.captured_queries))
+        self.assertEqual(ChefEscrowBalance.objects.get(chef=self.chef).refund, Decimal("11.00"))
+
+
+class FlakyGateway(PaymentGateway):
+    """Fails the first release that includes one of ``failing_references``."""
+
+    def __init__(self, failing_references=()):
+        self.failing_references = set(failing_references)
+        self.calls = []
+
+    def release_batch(self, releases, idempotency_key):
+        self.calls.append((idempotency_key, releases))
+        failing = self.failing_references.intersection(reference for reference, _ in releases)
+        if failing:
+            self.failing_references -= failing
+            raise ConnectionError("gateway timeout")
+        return super().release_batch(releases, idempotency_key)
+
+
+@override_settings(SETTLEMENT_BATCH_SIZE=2)
+class PayoutSettlementTests(TestCase):
+    def setUp(self):
+        client = Client.objects.create(user=User.objects.create_user(email="settle-client@test.com", password="secret"))
+        self.busy_chef, self.quiet_chef = (
+            ChefProfile.objects.create(user=User.objects.create_user(email=f"settle-{name}@test.com", password="secret"))
+            for name in ("busy", "quiet")
+        )
+
+        def order(chef, payout, status=Order.Status.DELIVERED):
+            return Order.objects.create(client=client, chef=chef, status=status, final_payout_amount=Decimal(payout))
+
+        self.busy_orders = [order(self.busy_chef, payout) for payout in ("10.00", "20.00", "30.00")]
+        self.quiet_order = order(self.quiet_chef, "5.00", Order.Status.COMPLETED)
+        self.cooking = order(self.busy_chef, "99.00", Order.Status.COOKING)
+
+    def test_delivered_orders_settle_in_per_chef_batches_and_resume_after_failure(self):
+        quiet_batches = PayoutBatch.objects.filter(chef=self.quiet_chef)
+        gateway = FlakyGateway([hold_reference(self.quiet_order)])
+
+        with self.assertLogs("payments.settlement", "WARNING"):
+            report = settle_delivered_orders(gateway=gateway)
+        self.assertEqual((report.batches, report.orders, report.amount, report.retrying), (2, 3, Decimal("60.00"), 1))
+        # Three busy orders in batches of two, one quiet order
+        self.assertEqual(sorted(len(releases) for _, releases in gateway.calls), [1, 1, 2])
+        final_payouts = EscrowLedgerEntry.objects.filter(entry_type=EscrowLedgerEntry.EntryType.FINAL_PAYOUT)
+        self.assertCountEqual(final_payouts.values_list("order_id", flat=True), [order.pk for order in self.busy_orders])
+        self.assertEqual(ChefEscrowBalance.objects.get(chef=self.busy_chef).final_payout, Decimal("60.00"))
+        pending = quiet_batches.get()
+        self.assertEqual((pending.status, pending.attempts), (PayoutBatch.Status.PENDING, 1))
+
+        # The next run retries the same batch with the same key and claims nothing new
+        report = settle_delivered_orders(gateway=gateway)
+        self.assertEqual((report.resumed, report.batches, report.orders), (1, 1, 1))
+        self.assertEqual(gateway.calls[-1][0], pending.idempotency_key)
+        self.assertEqual(quiet_batches.get().status, PayoutBatch.Status.SETTLED)
+        self.assertTrue(final_payouts.filter(order=self.quiet_order, reference=f"PAYOUT-{pending.idempotency_key}").exists())
+
+        self.assertEqual(settle_delivered_orders(gateway=gateway).orders, 0)
+        self.assertEqual(len(gateway.calls), 4)
+        self.assertFalse(final_payouts.filter(order=self.cooking).exists())
+
+    def test_a_batch_settled_by_a_concurrent_run_is_not_released_again(self):
+        with self.assertLogs("payments.settlement", "WARNING"):
+            settle_delivered_orders(gateway=FlakyGateway([hold_reference(self.quiet_order)]))
+        pending = PayoutBatch.objects.get(chef=self.quiet_chef)
+        other_run, this_run = PaymentGateway(), FlakyGateway()
+
+        def claim_after_other_run(*args, **kwargs):
+            # Another run locks and settles the pending batch after this one listed it
+            settle_batch(PayoutBatch.objects.get(pk=pending.pk), other_run)
+            return claim_batches(*args, **kwargs)
+
+        with mock.patch("payments.settlement.claim_batches", side_effect=claim_after_other_run):
+            report = settle_delivered_orders(gateway=this_run)
+        self.assertEqual((report.resumed, report.batches), (0, 0))
+        self.assertEqual(this_run.calls, [])
+        self.assertEqual(EscrowLedgerEntry.objects.filter(order=self.quiet_order, entry_type=EscrowLedgerEntry.EntryType.FINAL_PAYOUT).count(), 1)
+
+
+class CartTotalsTests(TestCase):
+    def setUp(self):
+        category = FoodCategory.objects.create(name="Grills")
+        self.dish = Dish.objects.create(name="Kebab", category=category, description="")
+        self.option = CustomizationOption.objects.create(option_type="Protein", name="Extra beef", price=Decimal("5.00"))
+        user = User.objects.create_user(email="totals@test.com", password="secret", first_name="Client", last_name="User")
+        self.cart = Cart.objects.create(client=Client.objects.create(user=user))
+
+    def _item(self, quantity=2, package_price="10.00"):
+        return CartItem.objects.create(cart=self.cart, dish=self.dish, quantity=quantity, value="Regular", package="Regular", package_price=Decimal(package_price))
+
+    def test_totals_follow_item_and_customization_changes(self):
+        first = self._item()
+        second = self._item(quantity=1, package_price="7.50")
+        self.cart.refresh_from_db()
+        self.assertEqual((self.cart.total_price, self.cart.item_count), (Decimal("27.50"), 2))
+
+        first.customizations.add(CustomizationValue.objects.create(customization_option=self.option, quantity=2))
+        self.assertEqual(first.item_total_price, Decimal("40.00"))
+
+        first = CartItem.objects.get(pk=first.pk)
+        first.quantity = 3
+        first.save()
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total_price, Decimal("67.50"))
+
+        second.delete()
+        first.customizations.clear()
+        self.cart.refresh_from_db()
+        self.assertEqual((self.cart.total_price, self.cart.item_count), (Decimal("30.00"), 1))
+
+    def test_refreshed_items_apply_deltas_against_the_reloaded_row(self):
+        item = self._item()
+        other = CartItem.objects.get(pk=item.pk)
+        other.quantity = 5
+        other.save()
+
+        item.refresh_from_db()
+        item.quantity = 1
+        item.save()
+        self.cart.refresh_from_db()
+        self.assertEqual((self.cart.total_price, self.cart.item_count), (Decimal("10.00"), 1))
+
+    def test_raw_request_quantities_are_priced_or_rejected(self):
+        item = self._item()
+        item.quantity = "3"
+        self.assertEqual(item.compute_total_price(), Decimal("30.00"))
+
+        url = reverse("orders:edit_cart_item_view")
+        auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.get(user=self.cart.client.user).key}"}
+        response = self.client.post(url, {"cart_item_id": item.pk, "quantity": "4"}, content_type="application/json", **auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        item.refresh_from_db()
+        self.assertEqual((item.quantity, item.item_total_price), (4, Decimal("40.00")))
+
+        for quantity in ("two", "0", [2]):
+            with self.subTest(quantity=quantity):
+                response = self.client.post(url, {"cart_item_id": item.pk, "quantity": quantity}, content_type="application/json", **auth)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("quantity", response.data["errors"])
+
+    def test_repair_command_fixes_drift(self):
+        item = self._item()
+        item.customizations.add(CustomizationValue.objects.create(customization_option=self.option, quantity=1))
+        # Price changes on the option are not propagated to stored totals
+        CustomizationOption.objects.filter(pk=self.option.pk).update(price=Decimal("6.00"))
+        Cart.objects.filter(pk=self.cart.pk).update(item_count=5)
+
+        out = StringIO()
+        call_command("repair_cart_totals", "--dry-run", stdout=out)
+        self.assertIn("1 would be repaired", out.getvalue())
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.item_count, 5)
+
+        call_command("repair_cart_totals", stdout=StringIO())
+        item.refresh_from_db()
+        self.cart.refresh_from_db()
+        self.assertEqual(item.item_total_price, Decimal("32.00"))
+        self.assertEqual((self.cart.total_price, self.cart.item_count), (Decimal("32.00"), 1))
+
+
+class BatchCartMutationTests(APITestCase):
+    def setUp(self):
+        category = FoodCategory.objects.create(name="Stews")
+        self.dishes = [Dish.objects.create(name=f"Stew {index}", category=category, description="") for index in range(6)]
+        self.spice = CustomizationOption.objects.create(option_type="Spice", name="Extra pepper", price=Decimal("1.50"))
+        self.protein = CustomizationOption.objects.create(option_type="Protein", name="Fish", price=Decimal("8.00"))
+
+        self.user = User.objects.create_user(email="batch@test.com", password="secret", first_name="Client", last_name="User")
+        self.client_profile = Client.objects.create(user=self.user)
+        self.token = Token.objects.get(user=self.user)
+        self.cart = Cart.objects.create(client=self.client_profile)
+        self.url = reverse("orders:batch_cart_mutation_view")
+
+    def _post(self, body):
+        return self.client.post(self.url, body, format="json", HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def _add_entry(self, dish, **extra):
+        return {"dish_id": dish.dish_id, "quantity": 1, "package": "Regular", "package_price": "20.00", "value": "Regular", **extra}
+
+    def test_adds_updates_and_removes_in_one_request(self):
+        keep = CartItem.objects.create(cart=self.cart, dish=self.dishes[0], quantity=1, value="Regular", package="Regular", package_price=Decimal("20.00"))
+        drop = CartItem.objects.create(cart=self.cart, dish=self.dishes[1], quantity=1, value="Regular", package="Regular", package_price=Decimal("20.00"))
+
+        response = self._post({
+            "add": [self._add_entry(self.dishes[2], quantity=2, customizations=[{"custom_option_id": self.protein.custom_option_id, "quantity": 1}])],
+            "update": [{"id": keep.pk, "quantity": 3, "customizations": [{"custom_option_id": self.spice.custom_option_id, "quantity": 2}]}],
+            "remove": [drop.pk],
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data["data"]
+        # kept: (20 + 2 * 1.50) * 3 = 69, added: (20 + 8) * 2 = 56
+        self.assertEqual(data["total_price"], Decimal("125.00"))
+        self.assertEqual(data["item_count"], 2)
+        self.assertEqual({item["id"]: item["item_total_price"] for item in data["cart_items"]}[keep.pk], Decimal("69.00"))
+        self.assertFalse(CartItem.objects.filter(pk=drop.pk).exists())
+
+        self.cart.refresh_from_db()
+        self.assertEqual((self.cart.total_price, self.cart.item_count), (Decimal("125.00"), 2))
+        out = StringIO()
+        call_command("repair_cart_totals", "--dry-run", stdout=out)
+        self.assertIn("Cart totals are consistent.", out.getvalue())
+
+    def test_invalid_batch_changes_nothing(self):
+        item = CartItem.objects.create(cart=self.cart, dish=self.dishes[0], quantity=1, value="Regular", package="Regular", package_price=Decimal("20.00"))
+        response = self._post({
+            "add": [self._add_entry(self.dishes[1]), {"dish_id": "DI-MISSING-SH", "quantity": 1, "package": "Regular", "package_price": "5", "value": "Regular"}],
+            "remove": [item.pk],
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("add[1].dish_id", response.data["errors"])
+        self.assertEqual(CartItem.objects.filter(cart=self.cart).count(), 1)
+
+    def test_malformed_entries_are_rejected_not_crashed_on(self):
+        item = CartItem.objects.create(cart=self.cart, dish=self.dishes[0], quantity=1, value="Regular", package="Regular", package_price=Decimal("20.00"))
+        cases = {
+            "add[0].dish_id": {"add": [self._add_entry(self.dishes[1], dish_id=[self.dishes[1].dish_id])]},
+            "add[0].customizations": {"add": [self._add_entry(self.dishes[1], customizations="spicy")]},
+            "update[0].customizations": {"update": [{"id": item.pk, "customizations": [self.spice.custom_option_id]}]},
+            "add[0].customizations[0].custom_option_id": {
+                "add": [self._add_entry(self.dishes[1], customizations=[{"custom_option_id": {"id": 1}}])]
+            },
+            "remove[0]": {"update": [{"id": item.pk, "quantity": 2}], "remove": [item.pk]},
+        }
+        for price in ("NaN", "Infinity", "-5"):
+            cases[f"add[0].package_price ({price})"] = {"add": [self._add_entry(self.dishes[1], package_price=price)]}
+
+        for field, body in cases.items():
+            with self.subTest(field):
+                response = self._post(body)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(field.split(" ")[0], response.data["errors"])
+        self.assertEqual(list(CartItem.objects.filter(cart=self.cart)), [item])
+
+    def test_non_object_bodies_are_rejected(self):
+        for body in ([{"add": []}], "add", 5):
+            with self.subTest(body=body):
+                response = self._post(body)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("body", response.data["errors"])
+
+    def test_rejected_batch_leaves_no_new_cart_behind(self):
+        self.cart.delete()
+        response = self._post({"add": [self._add_entry(self.dishes[0], quantity=0)]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Cart.objects.filter(client=self.client_profile).exists())
+
+    def test_non_object_entries_are_rejected_by_the_service(self):
+        with self.assertRaises(CartMutationError) as raised:
+            apply_cart_mutations(self.cart, add=["DI-1"], update=[None])
+        self.assertEqual(set(raised.exception.errors), {"add[0]", "update[0]"})
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def batch(dishes):
+            return {"add": [
+                self._add_entry(dish, customizations=[{"custom_option_id": self.spice.custom_option_id, "quantity": 1}])
+                for dish in dishes
+            ]}
+
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self._post(batch(self.dishes[:1])).status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self._post(batch(self.dishes[1:])).status_code, status.HTTP_200_OK)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+@override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+class RealtimeGatewayTests(TransactionTestCase):
+    def setUp(self):
+        self.client_user = User.objects.create_user(email="rt-client@test.com", password="secret")
+        self.chef_user = User.objects.create_user(email="rt-chef@test.com", password="secret")
+        # A staff member who also rides for one order must not get its events twice
+        self.staff_rider = User.objects.create_user(email="rt-staff@test.com", password="secret", is_staff=True)
+        self.outsider = User.objects.create_user(email="rt-outsider@test.com", password="secret")
+
+        client = Client.objects.create(user=self.client_user)
+        chef = ChefProfile.objects.create(user=self.chef_user)
+        self.first = Order.objects.create(client=client, chef=chef)
+        self.second = Order.objects.create(client=client, chef=chef, dispatch=DispatchDriver.objects.create(user=self.staff_rider))
+        Order.objects.create(client=client, chef=chef, status=Order.Status.COMPLETED)
+        self.second.chat_thread
+        for user in (self.client_user, self.chef_user, self.staff_rider, self.outsider):
+            user.auth_token  # loaded here, outside the event loop
+
+    def _connect(self, user):
+        return WebsocketCommunicator(TokenAuthMiddlewareStack(RealtimeGatewayConsumer.as_asgi()), f"/ws/realtime/?token={user.auth_token.key}")
+
+    def test_one_socket_per_user_receives_events_for_all_assigned_orders(self):
+        async def scenario():
+            sockets = {}
+            for name, user in (("chef", self.chef_user), ("client", self.client_user), ("staff", self.staff_rider), ("outsider", self.outsider)):
+                sockets[name] = self._connect(user)
+                connected, _ = await sockets[name].connect()
+                self.assertTrue(connected)
+                subscriptions = await sockets[name].receive_json_from()
+                self.assertEqual(subscriptions["type"], "subscriptions")
+                sockets[name].subscriptions = subscriptions
+
+            chef_orders = sockets["chef"].subscriptions["orders"]
+            self.assertCountEqual([order["order_id"] for order in chef_orders], [self.first.order_id, self.second.order_id])
+            self.assertEqual({order["role"] for order in chef_orders}, {"chef"})
+            self.assertEqual(sockets["staff"].subscriptions["roles"], ["admin", "dispatch"])
+            self.assertEqual(sockets["outsider"].subscriptions["orders"], [])
+
+            for order in (self.first, self.second):
+                await database_sync_to_async(transition_order)(order, Order.Status.ACCEPTED)
+
+            for name in ("chef", "client", "staff"):
+                events = [await sockets[name].receive_json_from() for _ in range(2)]
+                self.assertEqual(
+                    [(event["type"], event["order_id"], event["status"]) for event in events],
+                    [("order.status", self.first.order_id, "accepted"), ("order.status", self.second.order_id, "accepted")],
+                )
+
+            # Thread messages reach the thread's active participants only
+            await database_sync_to_async(self.second.chat_thread.record_message)(sender=self.client_user, body="On my way?")
+            for name in ("chef", "client", "staff"):
+                event = await sockets[name].receive_json_from()
+                self.assertEqual((event["type"], event["order_id"], event["message"]["body"]), ("thread.message", self.second.order_id, "On my way?"))
+            for socket in sockets.values():
+                self.assertTrue(await socket.receive_nothing())
+                await socket.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_anonymous_sockets_are_closed(self):
+        async def scenario():
+            communicator = WebsocketCommunicator(RealtimeGatewayConsumer.as_asgi(), "/ws/realtime/")
+            connected, code = await communicator.connect()
+            self.assertFalse(connected)
+            self.assertEqual(code, UNAUTHENTICATED_CLOSE_CODE)
+
+        async_to_sync(scenario)()
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from outbox.handlers import HANDLERS
+from outbox.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DeliveryReport:
+    batch_size: int = 0
+    delivered: int = 0
+    retried: int = 0
+    failed: int = 0
+    # Pending events left after the batch, due or not
+    backlog: int = 0
+    # Seconds from being recorded to being delivered, over this batch's deliveries
+    max_latency: float = 0.0
+    mean_latency: float = 0.0
+
+
+def enqueue(topic: str, payload: dict, idempotency_key: str, *, using=None) -> None:
+    """
+    Record a side effect in the current transaction and hand it to a worker
+    once that transaction commits. An event whose key was already recorded is
+    ignored. If the worker cannot be reached the periodic relay picks the
+    event up instead.
+    """
+    OutboxEvent.objects.using(using).bulk_create(
+        [OutboxEvent(topic=topic, payload=payload, idempotency_key=idempotency_key)], ignore_conflicts=True
+    )
+    transaction.on_commit(lambda: _schedule_delivery([idempotency_key]), using=using)
+
+
+def _schedule_delivery(idempotency_keys) -> None:
+    from outbox.tasks import deliver_outbox_events
+
+    try:
+        deliver_outbox_events.delay(idempotency_keys)
+    except Exception:  # pragma: no cover - broker down; the relay sweep delivers it later
+        logger.warning("Could not schedule outbox delivery; leaving it to the relay.", exc_info=True)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=settings.OUTBOX_RETRY_SECONDS * 2 ** (attempts - 1))
+
+
+def deliver_pending(idempotency_keys=None, batch_size: int | None = None) -> DeliveryReport:
+    """
+    Deliver due pending events (only those in ``idempotency_keys`` when given)
+    in one batch, oldest first, grouping them by topic so batch handlers see
+    all of theirs at once. The batch is claimed in a short transaction that
+    pushes the events' ``available_at`` out by ``OUTBOX_LEASE_SECONDS``, so
+    concurrent workers skip them while their handlers run outside any
+    transaction; a worker that dies mid-batch leaves them due again once the
+    lease runs out. Results are written back in a second short transaction.
+    A failed handler is retried with exponential backoff until
+    ``OUTBOX_MAX_ATTEMPTS`` is reached. Redacting handlers' events are stored
+    without their payload once delivered or given up on.
+    """
+    report = DeliveryReport()
+    now = timezone.now()
+    due = OutboxEvent.objects.filter(status=OutboxEvent.Status.PENDING, available_at__lte=now)
+    if idempotency_keys is not None:
+        due = due.filter(idempotency_key__in=idempotency_keys)
+
+    with transaction.atomic():
+        events = list(due.select_for_update(skip_locked=True)[: batch_size or settings.OUTBOX_BATCH_SIZE])
+        leased_until = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+        for event in events:
+            event.available_at = leased_until
+        OutboxEvent.objects.bulk_update(events, ["available_at"])
+
+    by_topic: dict[str, list[OutboxEvent]] = {}
+    for event in events:
+        by_topic.setdefault(event.topic, []).append(event)
+
+    latencies = []
+    fields = ["status", "attempts", "last_error", "available_at", "delivered_at"]
+    for topic, topic_events in by_topic.items():
+        handler = HANDLERS.get(topic)
+        # A batch handler succeeds or fails for its whole group
+        groups = [topic_events] if handler is not None and handler.batch else [[event] for event in topic_events]
+        for group in groups:
+            try:
+                if handler is None:
+                    raise LookupError(f"No outbox handler registered for {topic!r}.")
+                handler.func(group if handler.batch else group[0])
+            except Exception as exc:
+                logger.warning("Outbox delivery of %s %s event(s) failed.", len(group), topic, exc_info=True)
+                _record_failure(group, exc, now, report)
+                failed = [event for event in group if event.status == OutboxEvent.Status.FAILED]
+                if failed and handler is not None and handler.redact:
+                    # Failed events are kept for review, but not their message bodies
+                    for event in failed:
+                        event.payload = {}
+                    if "payload" not in fields:
+                        fields.append("payload")
+            else:
+                delivered_at = timezone.now()
+                for event in group:
+                    event.attempts += 1
+                    event.status = OutboxEvent.Status.DELIVERED
+                    event.delivered_at = delivered_at
+                    event.last_error = ""
+                    if handler.redact:
+                        event.payload = {}
+                    latencies.append((delivered_at - event.created_at).total_seconds())
+                report.delivered += len(group)
+                if handler.redact and "payload" not in fields:
+                    fields.append("payload")
+
+    with transaction.atomic():
+        OutboxEvent.objects.bulk_update(events, fields)
+
+    report.batch_size = len(events)
+    if latencies:
+        report.max_latency = max(latencies)
+        report.mean_latency = sum(latencies) / len(latencies)
+    report.backlog = OutboxEvent.objects.filter(status=OutboxEvent.Status.PENDING).count()
+    if events:
+        logger.info(
+            "Outbox batch of %s: %s delivered, %s retried, %s failed, backlog %s, latency max %.3fs mean %.3fs.",
+            report.batch_size, report.delivered, report.retried, report.failed,
+            report.backlog, report.max_latency, report.mean_latency,
+        )
+    return report
+
+
+def purge_delivered(retention: timedelta | None = None) -> int:
+    """
+    Delete events delivered longer than ``retention`` (``OUTBOX_RETENTION_HOURS``)
+    ago and return how many went. Failed events stay for review.
+    """
+    retention = retention if retention is not None else timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+    deleted, _ = OutboxEvent.objects.filter(
+        status=OutboxEvent.Status.DELIVERED, delivered_at__lt=timezone.now() - retention
+    ).delete()
+    if deleted:
+        logger.info("Purged %s delivered outbox events.", deleted)
+    return deleted
+
+
+def _record_failure(events, exc, now, report: DeliveryReport) -> None:
+    for event in events:
+        event.attempts += 1
+        event.last_error = repr(exc)
+        if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            event.status = OutboxEvent.Status.FAILED
+            report.failed += 1
+        else:
+            event.available_at = now + retry_delay(event.attempts)
+            report.retried += 1
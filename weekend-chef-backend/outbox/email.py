@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import uuid
+
+from django.core.mail import send_mail
+
+from outbox.dispatch import enqueue
+from outbox.handlers import register
+
+EMAIL_SEND = "email.send"
+
+
+def queue_email(subject: str, message: str, from_email, recipient_list, html_message=None, *, using=None) -> None:
+    """``send_mail`` from the outbox worker once the current transaction commits."""
+    enqueue(
+        EMAIL_SEND,
+        {
+            "subject": subject,
+            "message": message,
+            "from_email": from_email,
+            "recipient_list": list(recipient_list),
+            "html_message": html_message,
+        },
+        f"{EMAIL_SEND}:{uuid.uuid4().hex}",
+        using=using,
+    )
+
+
+# Bodies can hold one-time codes; they are not kept once sent
+@register(EMAIL_SEND, redact=True)
+def deliver_email(event) -> None:
+    send_mail(fail_silently=False, **event.payload)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class Handler:
+    func: Callable
+    # Batch handlers get every due event of their topic in one call
+    batch: bool = False
+    # The payload is cleared once delivered or failed, for topics that carry message bodies
+    redact: bool = False
+
+
+# topic -> Handler; filled by the apps that own the topics
+HANDLERS: dict[str, Handler] = {}
+
+
+def register(topic: str, *, batch: bool = False, redact: bool = False):
+    """
+    Decorator registering the function that delivers events of ``topic``. It
+    takes one OutboxEvent, or with ``batch=True`` the list of due events of
+    the topic, so one channel send or task covers a whole relay batch. With
+    ``redact=True`` delivered and failed events keep no payload.
+    """
+
+    def decorator(func):
+        HANDLERS[topic] = Handler(func, batch, redact)
+        return func
+
+    return decorator
@@ -0,0 +1,42 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from outbox.dispatch import deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Deliver pending outbox events in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--follow", action="store_true", help="Keep relaying until stopped with SIGINT or SIGTERM.")
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--interval", type=float, default=None, help="Seconds to wait when a batch comes back empty with --follow.")
+
+    def handle(self, *args, **options):
+        interval = options["interval"] or settings.OUTBOX_RELAY_SECONDS
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        if options["follow"]:
+            signal.signal(signal.SIGTERM, stop)
+            signal.signal(signal.SIGINT, stop)
+
+        while True:
+            report = deliver_pending(batch_size=options["batch_size"])
+            if report.batch_size:
+                self.stdout.write(
+                    f"Relayed a batch of {report.batch_size}: {report.delivered} delivered, {report.retried} retried, "
+                    f"{report.failed} failed; backlog {report.backlog}; latency max {report.max_latency:.3f}s "
+                    f"mean {report.mean_latency:.3f}s."
+                )
+            if not options["follow"] or stopping:
+                break
+            # Drain a backlog back to back; only idle between empty batches
+            if not report.batch_size:
+                time.sleep(interval)
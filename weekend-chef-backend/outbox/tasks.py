@@ -0,0 +1,19 @@
+from celery import shared_task
+
+from outbox.dispatch import deliver_pending, purge_delivered
+
+
+@shared_task
+def deliver_outbox_events(idempotency_keys=None):
+    return deliver_pending(idempotency_keys).delivered
+
+
+@shared_task
+def relay_outbox_events():
+    """Periodic sweep for retries and events whose on-commit hand-off was lost."""
+    return deliver_pending().delivered
+
+
+@shared_task
+def purge_outbox_events():
+    return purge_delivered()
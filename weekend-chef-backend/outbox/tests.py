@@ -0,0 +1,150 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User, VerificationToken
+from accounts.outbox import USER_CODE_SEND, VERIFICATION_CODE_SEND, queue_user_code
+from accounts.services import issue_token
+from chats.models import OrderMessage
+from chef.models import ChefProfile
+from clients.models import Client
+from orders.models import EscrowLedgerEntry, Order
+from orders.outbox import ESCROW_HOLD, ORDER_CREATED, ORDER_STATUS_CHANGED
+from orders.services import transition_order
+from outbox.dispatch import deliver_pending, enqueue, purge_delivered
+from outbox.email import EMAIL_SEND, queue_email
+from outbox.handlers import HANDLERS, Handler
+from outbox.models import OutboxEvent
+from payments.services import PaymentGateway
+
+
+@override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+class TransitionOutboxTests(TestCase):
+    def setUp(self):
+        client = Client.objects.create(user=User.objects.create_user(email="outbox-client@test.com", password="secret"))
+        chef = ChefProfile.objects.create(user=User.objects.create_user(email="outbox-chef@test.com", password="secret"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order = Order.objects.create(client=client, chef=chef, total_price=Decimal("100.00"))
+
+    def test_transition_writes_the_ledger_and_defers_gateway_calls_until_commit(self):
+        with mock.patch.object(PaymentGateway, "create_hold") as create_hold:
+            with self.captureOnCommitCallbacks() as callbacks:
+                transition_order(self.order, Order.Status.ACCEPTED)
+            # Ledger rows are part of the transaction; the gateway is not
+            self.assertEqual(self.order.escrow_entries.count(), 2)
+            self.assertEqual(EscrowLedgerEntry.objects.filter(order=self.order, reference=f"HOLD-{self.order.order_id}").count(), 2)
+            create_hold.assert_not_called()
+            self.assertEqual(
+                set(OutboxEvent.objects.exclude(topic=ORDER_CREATED).values_list("topic", "status")),
+                {(ESCROW_HOLD, OutboxEvent.Status.PENDING), (ORDER_STATUS_CHANGED, OutboxEvent.Status.PENDING)},
+            )
+
+            for callback in callbacks:
+                callback()
+            create_hold.assert_called_once()
+            self.assertEqual(create_hold.call_args.kwargs["idempotency_key"], f"{ESCROW_HOLD}:{self.order.pk}")
+            self.assertFalse(OutboxEvent.objects.exclude(status=OutboxEvent.Status.DELIVERED).exists())
+
+            # Delivered events are not delivered again, and re-recording one is a no-op
+            self.assertEqual(deliver_pending().delivered, 0)
+            enqueue(ESCROW_HOLD, {"order": self.order.pk, "amount": "100.00"}, f"{ESCROW_HOLD}:{self.order.pk}")
+            self.assertEqual(OutboxEvent.objects.filter(topic=ESCROW_HOLD).count(), 1)
+            self.assertEqual(create_hold.call_count, 1)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_SECONDS=30)
+    def test_failed_deliveries_back_off_and_give_up_after_max_attempts(self):
+        handler = mock.Mock(side_effect=ConnectionError("redis down"))
+        with mock.patch.dict(HANDLERS, {"test.flaky": Handler(handler)}):
+            enqueue("test.flaky", {}, "test.flaky:1")
+
+            with self.assertLogs("outbox.dispatch", "WARNING"):
+                report = deliver_pending()
+            event = OutboxEvent.objects.get(topic="test.flaky")
+            self.assertEqual((report.retried, event.status, event.attempts), (1, OutboxEvent.Status.PENDING, 1))
+            self.assertIn("redis down", event.last_error)
+            self.assertGreater(event.available_at, timezone.now() + timedelta(seconds=20))
+
+            # Not due yet
+            self.assertEqual(deliver_pending().retried, 0)
+            OutboxEvent.objects.filter(pk=event.pk).update(available_at=timezone.now())
+            with self.assertLogs("outbox.dispatch", "WARNING"):
+                report = deliver_pending()
+            event.refresh_from_db()
+            self.assertEqual((report.failed, event.status, event.attempts), (1, OutboxEvent.Status.FAILED, 2))
+            self.assertEqual(handler.call_count, 2)
+
+    def test_claimed_events_are_leased_while_their_handler_runs(self):
+        concurrent = []
+        handler = mock.Mock(side_effect=lambda event: concurrent.append(deliver_pending().batch_size))
+        with mock.patch.dict(HANDLERS, {"test.slow": Handler(handler)}):
+            enqueue("test.slow", {}, "test.slow:1")
+            self.assertEqual(deliver_pending().delivered, 1)
+        # A second worker running meanwhile found nothing due
+        self.assertEqual(concurrent, [0])
+        self.assertEqual(OutboxEvent.objects.get(topic="test.slow").status, OutboxEvent.Status.DELIVERED)
+
+    def test_relay_hands_a_batch_of_posted_messages_to_one_notification_task(self):
+        thread = self.order.chat_thread
+        for body in ("Hello", "Any allergies?", "Ten minutes out"):
+            OrderMessage.objects.create(thread=thread, sender=self.order.client.user, body=body)
+        queue_email("Receipt", "Thanks for your order.", "chef@weekendchef.test", ["outbox-client@test.com"])
+
+        with mock.patch("chats.tasks.notify_order_message_participants.delay") as notify:
+            report = deliver_pending()
+        notify.assert_called_once()
+        self.assertCountEqual(notify.call_args.args[0], thread.messages.values_list("pk", flat=True))
+        self.assertEqual((report.batch_size, report.delivered, report.backlog), (4, 4, 0))
+        self.assertGreaterEqual(report.max_latency, report.mean_latency)
+        self.assertEqual([message.subject for message in mail.outbox], ["Receipt"])
+
+    def test_verification_codes_are_rendered_at_delivery_and_not_kept(self):
+        user = User.objects.get(email="outbox-client@test.com")
+        with self.captureOnCommitCallbacks(execute=True):
+            token = issue_token(user, VerificationToken.Purpose.PASSWORD_RESET)
+        event = OutboxEvent.objects.get(topic=VERIFICATION_CODE_SEND)
+        self.assertEqual((event.payload, event.status), ({"token": token.pk}, OutboxEvent.Status.DELIVERED))
+        self.assertIn(token.code, mail.outbox[-1].body)
+
+        queue_email("Your code", "Use 123456.", "chef@weekendchef.test", ["outbox-client@test.com"])
+        deliver_pending()
+        self.assertEqual(OutboxEvent.objects.get(topic=EMAIL_SEND).payload, {})
+        self.assertNotIn(token.code, str(list(OutboxEvent.objects.values_list("payload", flat=True))))
+
+    def test_account_view_codes_are_read_at_delivery_and_not_kept(self):
+        user = User.objects.get(email="outbox-client@test.com")
+        user.otp_code = "4821"
+        user.save(update_fields=["otp_code"])
+        with self.captureOnCommitCallbacks(execute=True):
+            queue_user_code(user, "otp_code", "OTP CODE", "registration/emails/send_otp")
+        code = user.otp_code
+        event = OutboxEvent.objects.get(topic=USER_CODE_SEND)
+        self.assertEqual(event.status, OutboxEvent.Status.DELIVERED)
+        self.assertNotIn(code, str(event.payload))
+        self.assertIn(code, mail.outbox[-1].body)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=1)
+    def test_redacted_topics_drop_the_payload_when_they_fail(self):
+        handler = mock.Mock(side_effect=ConnectionError("smtp down"))
+        with mock.patch.dict(HANDLERS, {"test.secret": Handler(handler, redact=True)}):
+            enqueue("test.secret", {"body": "Use 123456."}, "test.secret:1")
+            with self.assertLogs("outbox.dispatch", "WARNING"):
+                self.assertEqual(deliver_pending().failed, 1)
+        event = OutboxEvent.objects.get(topic="test.secret")
+        self.assertEqual((event.status, event.payload), (OutboxEvent.Status.FAILED, {}))
+
+    def test_purge_keeps_recent_and_failed_events(self):
+        enqueue("test.old", {}, "test.old:1")
+        enqueue("test.recent", {}, "test.recent:1")
+        enqueue("test.failed", {}, "test.failed:1")
+        long_ago = timezone.now() - timedelta(days=30)
+        OutboxEvent.objects.filter(topic="test.old").update(status=OutboxEvent.Status.DELIVERED, delivered_at=long_ago)
+        OutboxEvent.objects.filter(topic="test.recent").update(status=OutboxEvent.Status.DELIVERED, delivered_at=timezone.now())
+        OutboxEvent.objects.filter(topic="test.failed").update(status=OutboxEvent.Status.FAILED, created_at=long_ago)
+
+        self.assertEqual(purge_delivered(), 1)
+        self.assertFalse(OutboxEvent.objects.filter(topic="test.old").exists())
+        self.assertEqual(OutboxEvent.objects.filter(topic__in=["test.recent", "test.failed"]).count(), 2)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from orders.models import ChefEscrowBalance, EscrowBalance, EscrowLedgerEntry, Order, OrderEscrowBalance
+
+# Entry types an order carries at most once; their idempotency key is derived
+ONCE_PER_ORDER = (
+    EscrowLedgerEntry.EntryType.GROCERY_ADVANCE,
+    EscrowLedgerEntry.EntryType.PLATFORM_FEE,
+    EscrowLedgerEntry.EntryType.FINAL_PAYOUT,
+)
+
+
+def entry_key(order_id, entry_type: str) -> str:
+    return f"{order_id}:{entry_type}"
+
+
+def post_entries(entries: list[EscrowLedgerEntry]) -> list[EscrowLedgerEntry]:
+    """
+    Insert ledger entries in one statement and add them to their order's and
+    chef's balances in the same transaction. Once-per-order entry types get
+    an ``(order, entry_type)`` idempotency key; an entry whose key is already
+    in the ledger is skipped, so posting the same split twice changes nothing.
+    The orders' balance rows are locked first, which serializes concurrent
+    posts for an order. Returns the entries actually inserted. The query count
+    does not depend on the number of entries.
+    """
+    for entry in entries:
+        if entry.idempotency_key is None and entry.entry_type in ONCE_PER_ORDER:
+            entry.idempotency_key = entry_key(entry.order_id, entry.entry_type)
+    if not entries:
+        return []
+
+    order_ids = {entry.order_id for entry in entries}
+    with transaction.atomic():
+        OrderEscrowBalance.objects.bulk_create([OrderEscrowBalance(order_id=order_id) for order_id in order_ids], ignore_conflicts=True)
+        chefs = dict(
+            OrderEscrowBalance.objects.select_for_update(of=("self",))
+            .filter(order_id__in=order_ids)
+            .values_list("order_id", "order__chef_id")
+        )
+        keys = [entry.idempotency_key for entry in entries if entry.idempotency_key]
+        posted = set(EscrowLedgerEntry.objects.filter(idempotency_key__in=keys).values_list("idempotency_key", flat=True))
+        new = []
+        for entry in entries:
+            if entry.idempotency_key in posted:
+                continue
+            if entry.idempotency_key:
+                posted.add(entry.idempotency_key)
+            new.append(entry)
+        created = EscrowLedgerEntry.objects.bulk_create(new)
+
+        order_totals = _totals(created, lambda entry: entry.order_id)
+        chef_totals = _totals(created, lambda entry: chefs.get(entry.order_id))
+        _apply(OrderEscrowBalance, "order_id", order_totals)
+        _apply(ChefEscrowBalance, "chef_id", chef_totals)
+    return created
+
+
+def _totals(entries, owner_of) -> dict:
+    totals = defaultdict(lambda: defaultdict(int))
+    for entry in entries:
+        owner = owner_of(entry)
+        if owner is not None:
+            totals[owner][entry.entry_type] += Decimal(entry.amount)
+            totals[owner]["entry_count"] += 1
+    return totals
+
+
+def _apply(model, key: str, totals: dict) -> None:
+    """Add per-owner deltas to the balance rows: create missing rows, then one conditional UPDATE."""
+    if not totals:
+        return
+    model.objects.bulk_create([model(**{key: owner}) for owner in totals], ignore_conflicts=True)
+    updates = {}
+    for field in [*EscrowBalance.AMOUNT_FIELDS, "entry_count"]:
+        whens = [When(**{key: owner}, then=Value(deltas[field])) for owner, deltas in totals.items() if deltas.get(field)]
+        if whens:
+            output_field = IntegerField() if field == "entry_count" else DecimalField(max_digits=12, decimal_places=2)
+            updates[field] = F(field) + Case(*whens, default=Value(0), output_field=output_field)
+    model.objects.filter(**{f"{key}__in": totals}).update(updated_at=timezone.now(), **updates)
+
+
+def recount_escrow_balances(order_ids=None) -> tuple[int, int]:
+    """
+    Rebuild balances from the ledger to repair drift: those of ``order_ids``
+    and of their chefs, or all of them. Returns the order and chef rows
+    written.
+    """
+    orders = Order.objects.all()
+    if order_ids is not None:
+        orders = orders.filter(pk__in=order_ids)
+    chef_ids = set(orders.values_list("chef_id", flat=True))
+
+    def sums(entries, owner):
+        rows = entries.values(owner).annotate(
+            **{field: Sum("amount", filter=Q(entry_type=field)) for field in EscrowBalance.AMOUNT_FIELDS},
+            entry_count=Count("pk"),
+        )
+        return [
+            {owner: row[owner], "entry_count": row["entry_count"], **{field: row[field] or 0 for field in EscrowBalance.AMOUNT_FIELDS}}
+            for row in rows
+        ]
+
+    entries = EscrowLedgerEntry.objects.order_by()
+    order_rows = sums(entries.filter(order__in=orders), "order_id")
+    chef_rows = sums(entries.filter(order__chef_id__in=chef_ids).annotate(chef_id=F("order__chef_id")), "chef_id")
+    with transaction.atomic():
+        OrderEscrowBalance.objects.filter(order__in=orders).delete()
+        ChefEscrowBalance.objects.filter(chef_id__in=chef_ids).delete()
+        OrderEscrowBalance.objects.bulk_create([OrderEscrowBalance(**row) for row in order_rows], batch_size=500)
+        ChefEscrowBalance.objects.bulk_create([ChefEscrowBalance(**row) for row in chef_rows], batch_size=500)
+    return len(order_rows), len(chef_rows)
@@ -5,8 +5,10 @@ from dataclasses import dataclass
 from decimal import Decimal
 
 from django.conf import settings
+from django.utils.module_loading import import_string
 
 from orders.models import EscrowLedgerEntry, Order
+from payments.ledger import post_entries
 
 logger = logging.getLogger(__name__)
 
@@ -18,17 +20,36 @@ class PaymentSplit:
     final_payout: Decimal
 
 
-class PaymentGateway:
-    """A lightweight gateway abstraction to simulate split payouts."""
+def hold_reference(order: Order) -> str:
+    return f"HOLD-{order.order_id}"
+
 
-    def create_hold(self, order: Order, amount: Decimal) -> str:
-        reference = f"HOLD-{order.order_id}"
+class PaymentGateway:
+    """
+    A lightweight gateway abstraction to simulate split payouts; it is also the
+    local fake used when ``PAYMENT_GATEWAY`` names no real provider. Calls made
+    from the outbox and the settlement job pass an ``idempotency_key`` so a
+    retried call is not charged or paid out twice.
+    """
+
+    def create_hold(self, order: Order, amount: Decimal, idempotency_key: str | None = None) -> str:
+        reference = hold_reference(order)
         logger.info("Holding %s for order %s", amount, order.order_id)
         return reference
 
-    def release(self, reference: str, amount: Decimal) -> None:
+    def release(self, reference: str, amount: Decimal, idempotency_key: str | None = None) -> None:
         logger.info("Releasing %s for reference %s", amount, reference)
 
+    def release_batch(self, releases: list[tuple[str, Decimal]], idempotency_key: str) -> str:
+        """Release several holds as one transfer; returns the transfer reference."""
+        total = sum((amount for _, amount in releases), Decimal("0"))
+        logger.info("Releasing %s across %s holds in transfer %s", total, len(releases), idempotency_key)
+        return f"PAYOUT-{idempotency_key}"
+
+
+def get_payment_gateway() -> PaymentGateway:
+    return import_string(settings.PAYMENT_GATEWAY)()
+
 
 def calculate_split(order: Order) -> PaymentSplit:
     grocery_ratio = Decimal(getattr(settings, "GROCERY_ADVANCE_RATIO", Decimal("0.40")))
@@ -39,19 +60,40 @@ def calculate_split(order: Order) -> PaymentSplit:
     return PaymentSplit(grocery_advance, platform_fee, final_payout)
 
 
-def record_split(order: Order, gateway: PaymentGateway | None = None) -> None:
-    gateway = gateway or PaymentGateway()
+SPLIT_FIELDS = ["grocery_advance_amount", "final_payout_amount", "platform_fee_amount"]
+
+
+def apply_split(order: Order) -> PaymentSplit:
+    """Set the split amounts on ``order`` without saving it."""
     split = calculate_split(order)
     order.grocery_advance_amount = split.grocery_advance
     order.final_payout_amount = split.final_payout
     order.platform_fee_amount = split.platform_fee
-    order.save(update_fields=["grocery_advance_amount", "final_payout_amount", "platform_fee_amount"])
-    hold_reference = gateway.create_hold(order, order.total_price)
-    EscrowLedgerEntry.objects.create(order=order, entry_type=EscrowLedgerEntry.EntryType.GROCERY_ADVANCE, amount=split.grocery_advance, reference=hold_reference)
-    EscrowLedgerEntry.objects.create(order=order, entry_type=EscrowLedgerEntry.EntryType.PLATFORM_FEE, amount=split.platform_fee, reference=hold_reference)
+    return split
+
+
+def hold_split(order: Order, split: PaymentSplit, gateway: PaymentGateway | None = None) -> list[EscrowLedgerEntry]:
+    """Place the escrow hold for a saved order and write its ledger rows in one insert."""
+    gateway = gateway or get_payment_gateway()
+    reference = gateway.create_hold(order, order.total_price)
+    return write_split_entries(order, split, reference)
+
 
+def write_split_entries(order: Order, split: PaymentSplit, reference: str) -> list[EscrowLedgerEntry]:
+    """Post the split's ledger rows in one insert, without calling the gateway; a split already posted is skipped."""
+    return post_entries(
+        [
+            EscrowLedgerEntry(order=order, entry_type=EscrowLedgerEntry.EntryType.GROCERY_ADVANCE, amount=split.grocery_advance, reference=reference),
+            EscrowLedgerEntry(order=order, entry_type=EscrowLedgerEntry.EntryType.PLATFORM_FEE, amount=split.platform_fee, reference=reference),
+        ]
+    )
 
-def release_final_payout(order: Order, gateway: PaymentGateway | None = None) -> None:
-    gateway = gateway or PaymentGateway()
-    gateway.release(f"HOLD-{order.order_id}", order.final_payout_amount)
-    EscrowLedgerEntry.objects.create(order=order, entry_type=EscrowLedgerEntry.EntryType.FINAL_PAYOUT, amount=order.final_payout_amount)
+
+def save_split(order: Order) -> PaymentSplit:
+    split = apply_split(order)
+    order.save(update_fields=SPLIT_FIELDS)
+    return split
+
+
+def record_split(order: Order, gateway: PaymentGateway | None = None) -> None:
+    hold_split(order, save_split(order), gateway)
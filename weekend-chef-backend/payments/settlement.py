@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from orders.models import EscrowLedgerEntry, Order, PayoutBatch, PayoutBatchItem
+from payments.ledger import post_entries
+from payments.services import PaymentGateway, get_payment_gateway, hold_reference
+
+logger = logging.getLogger(__name__)
+
+# Orders whose food has reached the client and whose final payout is owed
+SETTLEABLE_STATUSES = (Order.Status.DELIVERED, Order.Status.COMPLETED)
+
+
+@dataclass
+class SettlementReport:
+    batches: int = 0
+    orders: int = 0
+    amount: Decimal = Decimal("0")
+    # Pending batches from an earlier run that were retried
+    resumed: int = 0
+    retrying: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def orders_per_second(self) -> float:
+        return self.orders / self.elapsed if self.elapsed else 0.0
+
+
+def unsettled_orders():
+    """Delivered orders with no final payout in the ledger and in no payout batch."""
+    final_payout = EscrowLedgerEntry.objects.filter(order=OuterRef("pk"), entry_type=EscrowLedgerEntry.EntryType.FINAL_PAYOUT)
+    batched = PayoutBatchItem.objects.filter(order=OuterRef("pk"))
+    return Order.objects.filter(status__in=SETTLEABLE_STATUSES).exclude(Exists(final_payout)).exclude(Exists(batched))
+
+
+def claim_batches(order_ids=None, limit: int | None = None, batch_size: int | None = None) -> list[PayoutBatch]:
+    """
+    Group unsettled orders per chef into pending batches of at most
+    ``batch_size`` orders and write them, with their items, in one
+    transaction. Claimed orders are locked while this runs, and a batched
+    order is no longer unsettled, so concurrent runs never claim an order twice.
+    """
+    batch_size = batch_size or settings.SETTLEMENT_BATCH_SIZE
+    orders = unsettled_orders()
+    if order_ids is not None:
+        orders = orders.filter(pk__in=order_ids)
+
+    with transaction.atomic():
+        rows = list(
+            orders.select_for_update(skip_locked=True)
+            .order_by("chef_id", "pk")
+            .values_list("pk", "chef_id", "final_payout_amount")[: limit or settings.SETTLEMENT_MAX_ORDERS]
+        )
+        batches, grouped = [], []
+        for chef_id, chef_rows in groupby(rows, key=lambda row: row[1]):
+            chef_rows = list(chef_rows)
+            for start in range(0, len(chef_rows), batch_size):
+                chunk = chef_rows[start:start + batch_size]
+                batches.append(
+                    PayoutBatch(
+                        chef_id=chef_id,
+                        idempotency_key=f"payout:{chef_id}:{uuid.uuid4().hex}",
+                        amount=sum((amount for _, _, amount in chunk), Decimal("0")),
+                        order_count=len(chunk),
+                    )
+                )
+                grouped.append(chunk)
+        PayoutBatch.objects.bulk_create(batches)
+        PayoutBatchItem.objects.bulk_create(
+            [
+                PayoutBatchItem(batch=batch, order_id=order_id, amount=amount)
+                for batch, chunk in zip(batches, grouped)
+                for order_id, _, amount in chunk
+            ]
+        )
+    return batches
+
+
+def settle_batch(batch: PayoutBatch, gateway: PaymentGateway) -> None:
+    """
+    Release the batch through the gateway, then post its final payout entries
+    and mark it settled in one transaction. Re-running a batch that stopped
+    between the two reuses its idempotency key, so the gateway pays it once.
+    """
+    items = list(batch.items.select_related("order").only("order_id", "amount", "order__order_id"))
+    batch.reference = gateway.release_batch(
+        [(hold_reference(item.order), item.amount) for item in items], idempotency_key=batch.idempotency_key
+    )
+    with transaction.atomic():
+        post_entries(
+            [
+                EscrowLedgerEntry(
+                    order_id=item.order_id,
+                    entry_type=EscrowLedgerEntry.EntryType.FINAL_PAYOUT,
+                    amount=item.amount,
+                    reference=batch.reference,
+                )
+                for item in items
+            ]
+        )
+        batch.status = PayoutBatch.Status.SETTLED
+        batch.settled_at = timezone.now()
+        batch.last_error = ""
+        batch.save(update_fields=["status", "settled_at", "reference", "last_error", "attempts"])
+
+
+def settle_delivered_orders(order_ids=None, gateway: PaymentGateway | None = None, limit: int | None = None) -> SettlementReport:
+    """
+    Pay out delivered orders in per-chef batches: retry the batches an earlier
+    run left pending, claim new ones, and settle each with one gateway release
+    and one ledger insert. A batch whose release fails stays pending for the
+    next run until ``SETTLEMENT_MAX_ATTEMPTS``, then is marked failed and its
+    orders wait for manual review instead of being paid out again. Each batch
+    is locked while it settles; one that a concurrent run holds or has already
+    settled is skipped, so only one run calls the gateway for it.
+    """
+    gateway = gateway or get_payment_gateway()
+    report = SettlementReport()
+    started = time.monotonic()
+
+    pending = PayoutBatch.objects.filter(status=PayoutBatch.Status.PENDING)
+    if order_ids is not None:
+        pending = pending.filter(items__order_id__in=order_ids).distinct()
+    resumed = set(pending.values_list("pk", flat=True))
+    claimed = [batch.pk for batch in claim_batches(order_ids, limit=limit)]
+
+    for batch_pk in [*sorted(resumed), *claimed]:
+        with transaction.atomic():
+            batch = (
+                PayoutBatch.objects.select_for_update(skip_locked=True)
+                .filter(pk=batch_pk, status=PayoutBatch.Status.PENDING)
+                .first()
+            )
+            if batch is None:
+                continue
+            if batch_pk in resumed:
+                report.resumed += 1
+            batch.attempts += 1
+            try:
+                settle_batch(batch, gateway)
+            except Exception as exc:
+                logger.warning("Payout batch %s failed (attempt %s).", batch.idempotency_key, batch.attempts, exc_info=True)
+                batch.last_error = repr(exc)
+                if batch.attempts >= settings.SETTLEMENT_MAX_ATTEMPTS:
+                    batch.status = PayoutBatch.Status.FAILED
+                    report.failed += 1
+                else:
+                    report.retrying += 1
+                batch.save(update_fields=["status", "attempts", "last_error"])
+            else:
+                report.batches += 1
+                report.orders += batch.order_count
+                report.amount += batch.amount
+
+    report.elapsed = time.monotonic() - started
+    if report.batches or report.retrying or report.failed:
+        logger.info(
+            "Settled %s orders (%s) in %s batches in %.2fs (%.1f orders/s); %s resumed, %s retrying, %s failed.",
+            report.orders, report.amount, report.batches, report.elapsed, report.orders_per_second,
+            report.resumed, report.retrying, report.failed,
+        )
+    return report
@@ -12,6 +12,7 @@ from clients.models import Allergy, Client, ClientHomeLocation, DietaryPreferenc
 from dispatch.models import DispatchDriver
 from food.models import CustomizationOption, Dish, DishIngredient, FoodCategory
 from orders.models import Cart, CartItem, EscrowLedgerEntry, Order, OrderAllergenReport, OrderItem
+from payments.ledger import post_entries, recount_escrow_balances
 
 
 DEMO_USERS: List[Dict[str, str]] = [
@@ -459,10 +460,15 @@ class Command(BaseCommand):
         OrderItem.objects.create(order=order_two, cart_item=marco_item, quantity=marco_item.quantity)
 
         EscrowLedgerEntry.objects.filter(order__order_id__in=DEMO_ORDER_IDS).delete()
-        EscrowLedgerEntry.objects.create(order=order_one, entry_type=EscrowLedgerEntry.EntryType.GROCERY_ADVANCE, amount=order_one.grocery_advance_amount, reference="ACH-2193")
-        EscrowLedgerEntry.objects.create(order=order_one, entry_type=EscrowLedgerEntry.EntryType.PLATFORM_FEE, amount=order_one.platform_fee_amount, reference="FEE-2193")
-        EscrowLedgerEntry.objects.create(order=order_one, entry_type=EscrowLedgerEntry.EntryType.FINAL_PAYOUT, amount=order_one.final_payout_amount, reference="PAYOUT-2193")
-        EscrowLedgerEntry.objects.create(order=order_two, entry_type=EscrowLedgerEntry.EntryType.GROCERY_ADVANCE, amount=order_two.grocery_advance_amount, reference="ACH-4821")
+        recount_escrow_balances(order_ids=[order_one.pk, order_two.pk])
+        post_entries(
+            [
+                EscrowLedgerEntry(order=order_one, entry_type=EscrowLedgerEntry.EntryType.GROCERY_ADVANCE, amount=order_one.grocery_advance_amount, reference="ACH-2193"),
+                EscrowLedgerEntry(order=order_one, entry_type=EscrowLedgerEntry.EntryType.PLATFORM_FEE, amount=order_one.platform_fee_amount, reference="FEE-2193"),
+                EscrowLedgerEntry(order=order_one, entry_type=EscrowLedgerEntry.EntryType.FINAL_PAYOUT, amount=order_one.final_payout_amount, reference="PAYOUT-2193"),
+                EscrowLedgerEntry(order=order_two, entry_type=EscrowLedgerEntry.EntryType.GROCERY_ADVANCE, amount=order_two.grocery_advance_amount, reference="ACH-4821"),
+            ]
+        )
 
         OrderAllergenReport.objects.update_or_create(
             order=order_one,
@@ -9,17 +9,17 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
-from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
 from django.core.asgi import get_asgi_application
 
-from weekend_chef_project.routing import websocket_urlpatterns
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'weekend_chef_project.settings')
 
 dj_application = get_asgi_application()
 
+from weekend_chef_project.routing import websocket_urlpatterns  # noqa: E402
+from weekend_chef_project.websocket_auth import TokenAuthMiddlewareStack  # noqa: E402
+
 application = ProtocolTypeRouter({
     "http": dj_application,
-    "websocket": AuthMiddlewareStack(URLRouter(websocket_urlpatterns)),
+    "websocket": TokenAuthMiddlewareStack(URLRouter(websocket_urlpatterns)),
 })
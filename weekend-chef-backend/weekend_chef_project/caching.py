@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def cache_is_shared(alias='default'):
+    """Whether every process (web, workers) reads and writes the same cache."""
+    return not isinstance(caches[alias], LocMemCache)
+
+
+def invalidated_timeout(timeout, alias='default'):
+    """
+    Timeout for a cache key that other processes invalidate. A per-process
+    cache never sees their deletes, so there the key expires after at most
+    ``LOCAL_CACHE_MAX_AGE`` seconds instead; ``None`` means no expiry.
+    """
+    if cache_is_shared(alias):
+        return timeout
+    if timeout is None:
+        return settings.LOCAL_CACHE_MAX_AGE
+    return min(timeout, settings.LOCAL_CACHE_MAX_AGE)
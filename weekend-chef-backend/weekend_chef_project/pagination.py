@@ -0,0 +1,186 @@
+import base64
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import exceptions
+
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 50
+
+
+def encode_cursor(position):
+    """
+    Encode a keyset position (the sort key of the last row on a page) into an
+    opaque, URL safe cursor string.
+    """
+    raw = json.dumps(list(position), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """
+    Decode a cursor produced by ``encode_cursor`` back into a tuple of ``size``
+    values. Raises ValueError for anything that was not issued by us.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError):
+        raise ValueError('Invalid cursor.')
+    if not isinstance(position, list) or len(position) != size:
+        raise ValueError('Invalid cursor.')
+    # Sort keys are plain scalars; nulls, lists and objects were never issued
+    if not all(isinstance(value, (int, float, str)) and not isinstance(value, bool) for value in position):
+        raise ValueError('Invalid cursor.')
+    return tuple(position)
+
+
+class InvalidCursor(exceptions.ValidationError):
+    """
+    A cursor whose values do not parse as the sort fields they stand for. Raised
+    from ``paginate`` once the queryset is known and rendered by DRF as the
+    views' usual 400 errors payload.
+    """
+
+    def __init__(self):
+        super().__init__({'message': 'Errors', 'errors': {'cursor': ['Invalid cursor.']}})
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Read a client supplied page size, clamped to ``maximum``."""
+    if value in (None, ''):
+        return default
+    page_size = int(value)
+    if page_size < 1:
+        raise ValueError('Page size must be a positive number.')
+    return min(page_size, maximum)
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over a queryset ordered by ``ordering``, shared by the
+    list endpoints. Query parameters are read once: ``cursor`` (the position of
+    the last row of the previous page), ``page_size`` (clamped to
+    ``max_page_size``) and ``total`` (opt in to an approximate total). Invalid
+    input lands in ``errors`` keyed like the views' own errors dicts; a cursor
+    that decodes but does not parse as the sort fields raises ``InvalidCursor``
+    from ``paginate``.
+
+    Each page is one query fetching ``page_size + 1`` rows after the cursor, so
+    deep pages cost the same as the first one and nothing is counted unless
+    asked for. The ordering must end in a unique, non-null key; the primary key
+    is appended when it does not. The default, newest primary key first, walks
+    the primary key index.
+    """
+
+    def __init__(self, request, ordering=('-pk',), default_page_size=DEFAULT_PAGE_SIZE,
+                 max_page_size=MAX_PAGE_SIZE):
+        ordering = list(ordering)
+        if ordering[-1].lstrip('-') not in ('pk', 'id'):
+            ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+        self.ordering = ordering
+        self.errors = {}
+
+        params = request.query_params
+        try:
+            self.page_size = parse_page_size(params.get('page_size'), default=default_page_size, maximum=max_page_size)
+        except ValueError:
+            self.page_size = default_page_size
+            self.errors['page_size'] = ['Page size must be a positive number.']
+
+        self.after = None
+        cursor = params.get('cursor')
+        if cursor:
+            try:
+                self.after = decode_cursor(cursor, len(self.ordering))
+            except ValueError:
+                self.errors['cursor'] = ['Invalid cursor.']
+
+        self.with_total = params.get('total', '').lower() in ('1', 'true', 'yes')
+
+    def _sort_field(self, queryset, name):
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        opts = queryset.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def _after_values(self, queryset):
+        """The cursor's values parsed by the fields they sort on."""
+        try:
+            return [
+                self._sort_field(queryset, field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, self.after)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor()
+
+    def _after_filter(self, after):
+        """(k1 > v1) OR (k1 = v1 AND k2 > v2) ... with < for descending keys."""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = f"{name}__lt" if field.startswith('-') else f"{name}__gt"
+            equal = {key.lstrip('-'): value for key, value in zip(self.ordering[:index], after)}
+            condition |= Q(**equal, **{lookup: after[index]})
+        return condition
+
+    def _position(self, item):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            value = item[name] if isinstance(item, dict) else getattr(item, name)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            elif not isinstance(value, (int, float, str)):
+                # Decimals, UUIDs: the field parses the string back when filtering
+                value = str(value)
+            values.append(value)
+        return values
+
+    def approximate_total(self, queryset):
+        """
+        Row count of the filtered set, cached per query for
+        PAGINATION_COUNT_CACHE_SECONDS so scrolling does not recount it.
+        """
+        sql, params = queryset.order_by().query.sql_with_params()
+        key = 'pagination:count:' + hashlib.sha1(f"{sql}{params}".encode()).hexdigest()
+        return cache.get_or_set(key, queryset.order_by().count, settings.PAGINATION_COUNT_CACHE_SECONDS)
+
+    def paginate(self, queryset):
+        ordered = queryset.order_by(*self.ordering)
+        if self.after is not None:
+            ordered = ordered.filter(self._after_filter(self._after_values(queryset)))
+        rows = list(ordered[: self.page_size + 1])
+        items = rows[: self.page_size]
+        return KeysetPage(
+            items=items,
+            page_size=self.page_size,
+            next=encode_cursor(self._position(items[-1])) if len(rows) > self.page_size else None,
+            approximate_total=self.approximate_total(queryset) if self.with_total else None,
+        )
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    page_size: int
+    next: Optional[str] = None
+    approximate_total: Optional[int] = None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def envelope(self):
+        """The ``pagination`` block every list endpoint returns."""
+        return {
+            'page_size': self.page_size,
+            'next': self.next,
+            'approximate_total': self.approximate_total,
+        }
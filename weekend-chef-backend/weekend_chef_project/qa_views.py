@@ -16,6 +16,7 @@ from dispatch.models import DispatchDriver
 from food.models import FoodCategory, Dish
 from orders.models import Cart, CartItem, Order
 from orders.services import transition_order
+from payments.settlement import settle_delivered_orders
 
 
 @require_http_methods(["POST"])
@@ -116,6 +117,7 @@ def order_smoke_test(request):
         transition_order(order, Order.Status.DISPATCHED, changed_by=dispatch_user)
         transition_order(order, Order.Status.DELIVERED, changed_by=dispatch_user)
         transition_order(order, Order.Status.COMPLETED, changed_by=client_user)
+        settle_delivered_orders(order_ids=[order.pk])
 
         ledger = [
             {
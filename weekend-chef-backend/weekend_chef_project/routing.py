@@ -1,7 +1,9 @@
 from django.urls import re_path
 
-from orders.consumers import OrderStatusConsumer
+from chats.api.consumers import BookingChatConsumers
+from orders.consumers import RealtimeGatewayConsumer
 
 websocket_urlpatterns = [
-    re_path(r"ws/orders/(?P<order_id>[^/]+)/$", OrderStatusConsumer.as_asgi()),
+    re_path(r"ws/realtime/$", RealtimeGatewayConsumer.as_asgi()),
+    re_path(r"ws/chat-rooms/$", BookingChatConsumers.as_asgi()),
 ]
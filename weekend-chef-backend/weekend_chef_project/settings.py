@@ -13,7 +13,9 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from datetime import timedelta
 import logging
 import os
+import sys
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 from django.core.management.utils import get_random_secret_key
 
 
@@ -95,6 +97,7 @@ INSTALLED_APPS = [
     'homepage',
     'notifications',
     'complaints',
+    'outbox',
 
 ]
 
@@ -166,8 +169,47 @@ else:
 
 
 
+# Shared cache; without DJANGO_CACHE_URL each process keeps its own in-memory cache
+DJANGO_CACHE_URL = env("DJANGO_CACHE_URL", "")
+if DJANGO_CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": DJANGO_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "weekend-chef",
+        }
+    }
+# Without a shared cache, keys other processes invalidate expire after this many seconds instead
+LOCAL_CACHE_MAX_AGE = int(env("LOCAL_CACHE_MAX_AGE", "30"))
+
+HOMEPAGE_CACHE_TIMEOUT = int(env("HOMEPAGE_CACHE_TIMEOUT", "600"))
+# How long list endpoints reuse an approximate total (?total=1) for the same filters
+PAGINATION_COUNT_CACHE_SECONDS = int(env("PAGINATION_COUNT_CACHE_SECONDS", "300"))
+
+
 CELERY_BROKER_URL = env("CELERY_BROKER_URL", "redis://redis:6379")
 CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND", "redis://redis:6379")
+# Run tasks in-process under `manage.py test` so no broker is needed
+TESTING = len(sys.argv) > 1 and sys.argv[1] == "test"
+CELERY_TASK_ALWAYS_EAGER = env_bool("CELERY_TASK_ALWAYS_EAGER", TESTING)
+
+# Dish popularity ranking (food.popularity)
+POPULARITY_HALF_LIFE_DAYS = float(env("POPULARITY_HALF_LIFE_DAYS", "14"))
+POPULARITY_WINDOW_DAYS = int(env("POPULARITY_WINDOW_DAYS", "90"))
+POPULARITY_REFRESH_SECONDS = int(env("POPULARITY_REFRESH_SECONDS", "3600"))
+
+CELERY_BEAT_SCHEDULE = {
+    "refresh-dish-popularity": {
+        "task": "food.tasks.refresh_dish_popularity",
+        "schedule": POPULARITY_REFRESH_SECONDS,
+    },
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -248,6 +290,57 @@ app = Celery('weekend_chef_project')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
+# Per-room ring buffer of recent chat messages (chats.history); without it history is read from the database
+CHAT_HISTORY_REDIS_URL = env("CHAT_HISTORY_REDIS_URL", "")
+CHAT_RECENT_MESSAGES = int(env("CHAT_RECENT_MESSAGES", "50"))
+CHAT_RECENT_MESSAGES_TTL = int(env("CHAT_RECENT_MESSAGES_TTL", str(60 * 60 * 24)))
+
+# Write-behind persistence for order chat messages (chats.write_behind)
+CHAT_WRITE_BEHIND = env_bool("CHAT_WRITE_BEHIND", False)
+CHAT_WRITE_BEHIND_REDIS_URL = env("CHAT_WRITE_BEHIND_REDIS_URL", "")
+CHAT_WRITE_BEHIND_BATCH_SIZE = int(env("CHAT_WRITE_BEHIND_BATCH_SIZE", "200"))
+CHAT_WRITE_BEHIND_FLUSH_SECONDS = float(env("CHAT_WRITE_BEHIND_FLUSH_SECONDS", "2"))
+if CHAT_WRITE_BEHIND and not CHAT_WRITE_BEHIND_REDIS_URL and not TESTING:
+    # An in-process queue would answer 202 for messages a restart loses
+    raise ImproperlyConfigured("CHAT_WRITE_BEHIND requires CHAT_WRITE_BEHIND_REDIS_URL.")
+
+if CHAT_WRITE_BEHIND and CHAT_WRITE_BEHIND_REDIS_URL:
+    CELERY_BEAT_SCHEDULE["flush-order-chat-messages"] = {
+        "task": "chats.tasks.flush_order_chat_messages",
+        "schedule": CHAT_WRITE_BEHIND_FLUSH_SECONDS,
+    }
+
+# Transactional outbox (outbox.dispatch): side effects delivered by a worker after commit
+OUTBOX_BATCH_SIZE = int(env("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_MAX_ATTEMPTS = int(env("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_RETRY_SECONDS = float(env("OUTBOX_RETRY_SECONDS", "5"))
+OUTBOX_RELAY_SECONDS = float(env("OUTBOX_RELAY_SECONDS", "10"))
+# How long a claimed batch is hidden from other workers while its handlers run
+OUTBOX_LEASE_SECONDS = float(env("OUTBOX_LEASE_SECONDS", "300"))
+# Delivered events are deleted after this long; failed ones are kept
+OUTBOX_RETENTION_HOURS = float(env("OUTBOX_RETENTION_HOURS", "72"))
+
+CELERY_BEAT_SCHEDULE["relay-outbox-events"] = {
+    "task": "outbox.tasks.relay_outbox_events",
+    "schedule": OUTBOX_RELAY_SECONDS,
+}
+CELERY_BEAT_SCHEDULE["purge-outbox-events"] = {
+    "task": "outbox.tasks.purge_outbox_events",
+    "schedule": 3600,
+}
+
+# Batch payout settlement (payments.settlement)
+PAYMENT_GATEWAY = env("PAYMENT_GATEWAY", "payments.services.PaymentGateway")
+SETTLEMENT_BATCH_SIZE = int(env("SETTLEMENT_BATCH_SIZE", "100"))
+SETTLEMENT_MAX_ORDERS = int(env("SETTLEMENT_MAX_ORDERS", "5000"))
+SETTLEMENT_MAX_ATTEMPTS = int(env("SETTLEMENT_MAX_ATTEMPTS", "5"))
+SETTLEMENT_INTERVAL_SECONDS = float(env("SETTLEMENT_INTERVAL_SECONDS", "300"))
+
+CELERY_BEAT_SCHEDULE["settle-delivered-orders"] = {
+    "task": "orders.tasks.settle_delivered_orders",
+    "schedule": SETTLEMENT_INTERVAL_SECONDS,
+}
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
@@ -257,6 +350,10 @@ CHANNEL_LAYERS = {
     },
 }
 
+if TESTING:
+    # Outbox handlers surface channel layer errors for retry; tests have no redis
+    CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
 
 
 REST_FRAMEWORK = {
@@ -0,0 +1,61 @@
+"""Benchmark the batched haversine helpers against the scalar loop.
+
+Run with ``python -m weekend_chef_project.tests.bench_haversine``; it is not collected by the test runner.
+"""
+import argparse
+import random
+import time
+
+from weekend_chef_project import utils
+from weekend_chef_project.utils import haversine, haversine_many, haversine_matrix
+
+
+def _time(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=10000, help="Destinations per origin.")
+    parser.add_argument("--origins", type=int, default=50, help="Origins for the matrix benchmark.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per variant; the best run is reported.")
+    parser.add_argument("--seed", type=int, default=42)
+    options = parser.parse_args(argv)
+
+    rng = random.Random(options.seed)
+    points = options.points
+    origins = options.origins
+    repeat = options.repeat
+
+    # A regional service area a few hundred kilometers across
+    lons = [rng.uniform(-2.5, 0.5) for _ in range(points)]
+    lats = [rng.uniform(4.7, 7.5) for _ in range(points)]
+    origin_lons = lons[:origins]
+    origin_lats = lats[:origins]
+    lon, lat = -0.1870, 5.6037
+
+    variants = [
+        ("scalar loop", lambda: [haversine(lon, lat, lon2, lat2) for lon2, lat2 in zip(lons, lats)]),
+        ("haversine_many (python)", lambda: haversine_many(lon, lat, lons, lats, use_numpy=False)),
+        ("scalar loop matrix", lambda: [
+            [haversine(lon1, lat1, lon2, lat2) for lon2, lat2 in zip(lons, lats)]
+            for lon1, lat1 in zip(origin_lons, origin_lats)
+        ]),
+        ("haversine_matrix (python)", lambda: haversine_matrix(origin_lons, origin_lats, lons, lats, use_numpy=False)),
+    ]
+    if utils.np is not None:
+        variants.insert(2, ("haversine_many (numpy)", lambda: haversine_many(lon, lat, lons, lats, use_numpy=True)))
+        variants.append(("haversine_matrix (numpy)", lambda: haversine_matrix(origin_lons, origin_lats, lons, lats, use_numpy=True)))
+    else:
+        print("NumPy is not installed; only the pure Python fallback is benchmarked.")
+
+    print(f"{points} destinations, {origins} origins for the matrix, best of {repeat} runs")
+    for label, func in variants:
+        best = min(_time(func) for _ in range(repeat))
+        print(f"{label:<28} {best * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
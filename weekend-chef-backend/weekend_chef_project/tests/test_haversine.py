@@ -0,0 +1,52 @@
+from decimal import Decimal
+from unittest import skipIf
+
+from django.test import SimpleTestCase
+
+from weekend_chef_project import utils
+from weekend_chef_project.utils import haversine, haversine_many, haversine_matrix
+
+
+ORIGIN = (-0.1870, 5.6037)
+LONS = [-0.1870, -0.2300, -1.6244, 2.3522, Decimal("-0.1900")]
+LATS = [5.6037, 5.6500, 6.6885, 48.8566, Decimal("5.6100")]
+
+
+class BatchHaversineTests(SimpleTestCase):
+    def _expected(self):
+        return [haversine(ORIGIN[0], ORIGIN[1], float(lon), float(lat)) for lon, lat in zip(LONS, LATS)]
+
+    def test_python_fallback_matches_scalar(self):
+        distances = haversine_many(*ORIGIN, LONS, LATS, use_numpy=False)
+        for got, expected in zip(distances, self._expected()):
+            self.assertAlmostEqual(got, expected, places=6)
+
+        matrix = haversine_matrix(LONS, LATS, LONS, LATS, use_numpy=False)
+        self.assertEqual(len(matrix), len(LONS))
+        for i, row in enumerate(matrix):
+            self.assertAlmostEqual(row[i], 0.0, places=6)
+            for j, got in enumerate(row):
+                expected = haversine(float(LONS[i]), float(LATS[i]), float(LONS[j]), float(LATS[j]))
+                self.assertAlmostEqual(got, expected, places=6)
+
+    @skipIf(utils.np is None, "NumPy is not installed")
+    def test_numpy_matches_python_fallback(self):
+        distances = haversine_many(*ORIGIN, LONS, LATS, use_numpy=True)
+        for got, expected in zip(distances, self._expected()):
+            self.assertAlmostEqual(float(got), expected, places=6)
+
+        matrix = haversine_matrix(LONS[:2], LATS[:2], LONS, LATS, use_numpy=True)
+        fallback = haversine_matrix(LONS[:2], LATS[:2], LONS, LATS, use_numpy=False)
+        self.assertEqual(matrix.shape, (2, len(LONS)))
+        for row, expected_row in zip(matrix.tolist(), fallback):
+            for got, expected in zip(row, expected_row):
+                self.assertAlmostEqual(got, expected, places=6)
+
+    def test_invalid_coordinates_are_rejected(self):
+        modes = [False] if utils.np is None else [False, True]
+        for use_numpy in modes:
+            with self.assertRaises(ValueError):
+                haversine_many(*ORIGIN, [0.0, None], [0.0, 1.0], use_numpy=use_numpy)
+            with self.assertRaises(ValueError):
+                haversine_many(*ORIGIN, [0.0], [0.0, 1.0], use_numpy=use_numpy)
+        self.assertEqual(list(haversine_many(*ORIGIN, [], [])), [])
@@ -14,6 +14,7 @@ from dispatch.models import DispatchDriver
 from food.models import FoodCategory, Dish
 from orders.models import Cart, CartItem, Order
 from orders.services import transition_order
+from payments.settlement import settle_delivered_orders
 
 
 class OrderLifecycleTests(TestCase):
@@ -108,6 +109,7 @@ class OrderLifecycleTests(TestCase):
 
     def test_payout_entries_created_when_order_completed(self):
         order = self._create_order()
+        settle_delivered_orders()
 
         order.refresh_from_db()
         entry_types = list(order.escrow_entries.values_list("entry_type", flat=True))
@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from food.models import Dish, DishPopularity, FoodCategory
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(email='pages@test.com', password='secret')
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.get(user=user).key}'}
+
+    def _walk(self, url, **params):
+        """Follow ``next`` cursors to the end; returns the names seen and the queries of each page."""
+        names, page_queries, cursor = [], [], None
+        while True:
+            query = dict(params, cursor=cursor) if cursor else params
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, query, **self.auth)
+            self.assertEqual(response.status_code, 200, response.data)
+            data = response.data['data']
+            names.extend(item['name'] for item in data.get('food_categories', data.get('dishes', [])))
+            page_queries.append(queries.captured_queries)
+            cursor = data['pagination']['next']
+            if cursor is None:
+                return names, page_queries, data['pagination']
+
+    def test_cursor_pages_are_stable_and_never_count_unless_asked(self):
+        for name in ('Rice', 'Soups', 'Swallows', 'Grills', 'Pastries'):
+            FoodCategory.objects.create(name=name)
+        url = reverse('clients_api:get_all_client_food_categories')
+
+        names, page_queries, pagination = self._walk(url, page_size=2)
+        self.assertEqual(names, ['Pastries', 'Grills', 'Swallows', 'Soups', 'Rice'])
+        self.assertEqual(len({len(queries) for queries in page_queries}), 1)
+        self.assertFalse(any('COUNT(' in query['sql'] for queries in page_queries for query in queries))
+        self.assertEqual(pagination, {'page_size': 2, 'next': None, 'approximate_total': None})
+
+        response = self.client.get(url, {'page_size': 2, 'total': 'true'}, **self.auth)
+        self.assertEqual(response.data['data']['pagination']['approximate_total'], 5)
+        # The total is cached per filter set, so later pages skip the count
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'page_size': 2, 'total': 'true', 'cursor': response.data['data']['pagination']['next']}, **self.auth)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+        self.assertEqual(self.client.get(url, {'cursor': 'bogus'}, **self.auth).status_code, 400)
+        self.assertEqual(self.client.get(url, {'page_size': 0}, **self.auth).status_code, 400)
+
+    def test_popular_sort_pages_ranked_dishes_before_unranked_ones(self):
+        rice = FoodCategory.objects.create(name='Rice')
+        jollof, waakye, fried_rice, plain = (
+            Dish.objects.create(name=name, category=rice, description='')
+            for name in ('Jollof', 'Waakye', 'Fried Rice', 'Plain Rice')
+        )
+        for rank, dish in enumerate((waakye, jollof), start=1):
+            DishPopularity.objects.create(dish=dish, category=rice, rank=rank, category_rank=rank, computed_at=timezone.now())
+
+        names, _, _ = self._walk(reverse('clients_api:get_all_client_dishes_view'), category_id=rice.pk, sort='popular', page_size=1)
+        self.assertEqual(names, ['Waakye', 'Jollof', 'Plain Rice', 'Fried Rice'])
@@ -0,0 +1,56 @@
+import re
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from food.models import Dish, FoodCategory
+from weekend_chef_project.utils import (
+    PUBLIC_ID_FORMATS,
+    assign_public_ids,
+    generate_public_id,
+    generate_public_ids,
+    generate_ulid,
+)
+
+
+ULID_PATTERN = r'[0-9A-HJKMNP-TV-Z]{26}'
+
+
+class PublicIdGeneratorTests(SimpleTestCase):
+    def test_ids_keep_existing_prefixes_and_suffixes(self):
+        self.assertRegex(generate_public_id('order_id'), rf'^ORD-{ULID_PATTERN}-ER$')
+        self.assertRegex(generate_public_id('dish_id'), rf'^DI-{ULID_PATTERN}-SH$')
+        self.assertRegex(generate_public_id('transaction_id'), rf'^TRN-{ULID_PATTERN}-\(P\)$')
+        for field_name, (prefix, suffix) in PUBLIC_ID_FORMATS.items():
+            public_id = generate_public_id(field_name)
+            self.assertTrue(public_id.startswith(prefix) and public_id.endswith(suffix), field_name)
+
+    def test_ulids_are_unique_and_time_ordered(self):
+        ulids = [generate_ulid() for _ in range(20000)]
+        self.assertEqual(len(set(ulids)), len(ulids))
+        self.assertEqual(ulids, sorted(ulids))
+
+    def test_bulk_generation_fills_only_missing_ids(self):
+        self.assertEqual(len(set(generate_public_ids('order_id', 500))), 500)
+
+        dishes = [Dish(name='Jollof', dish_id='DI-EXISTING-SH'), Dish(name='Waakye')]
+        assign_public_ids(dishes, 'dish_id')
+        self.assertEqual(dishes[0].dish_id, 'DI-EXISTING-SH')
+        self.assertRegex(dishes[1].dish_id, rf'^DI-{ULID_PATTERN}-SH$')
+
+
+class PublicIdQueryTests(TestCase):
+    def test_saving_a_model_does_not_query_for_id_collisions(self):
+        category = FoodCategory.objects.create(name='Soups')
+        with CaptureQueriesContext(connection) as queries:
+            dish = Dish.objects.create(name='Light Soup', category=category)
+        self.assertTrue(dish.dish_id.startswith('DI-'))
+        selects = [query['sql'] for query in queries.captured_queries if re.match(r'\s*SELECT', query['sql'])]
+        self.assertEqual(selects, [])
+
+    def test_bulk_create_with_assigned_ids(self):
+        category = FoodCategory.objects.create(name='Stews')
+        dishes = assign_public_ids([Dish(name=f'Stew {index}', category=category) for index in range(5)], 'dish_id')
+        Dish.objects.bulk_create(dishes)
+        self.assertEqual(Dish.objects.filter(dish_id__startswith='DI-').count(), 5)
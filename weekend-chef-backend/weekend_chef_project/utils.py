@@ -1,9 +1,19 @@
 import math
 import random
 import re
+import secrets
 import string
+import threading
+import time
 from django.contrib.auth import get_user_model, authenticate
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the batch distance helpers fall back to pure Python
+    np = None
+
+EARTH_RADIUS_KM = 6371
+
 
 
 
@@ -17,40 +27,83 @@ def generate_random_otp_code():
     return code
 
 
-def unique_user_id_generator(instance):
+# Prefix/suffix around the ULID body for each public id field
+PUBLIC_ID_FORMATS = {
+    'user_id': ('', ''),
+    'chef_id': ('CH-', '-F'),
+    'client_id': ('CL-', '-NT'),
+    'dispatch_id': ('DIS-', '-CT'),
+    'admin_id': ('AD-', '-IN'),
+    'dish_id': ('DI-', '-SH'),
+    'ingredient_id': ('ING-', '-NT'),
+    'order_id': ('ORD-', '-ER'),
+    'custom_option_id': ('CO-', '-O'),
+    'dish_gallery_id': ('DG-', '-D'),
+    'booking_id': ('BK-', '_AP'),
+    'room_id': ('', ''),
+    'account_id': ('ACC-', '-(BNK)'),
+    'transaction_id': ('TRN-', '-(P)'),
+    'review_id': ('RV-', '-CH'),
+}
+
+_CROCKFORD_BASE32 = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_ULID_RANDOM_BITS = 80
+_ulid_lock = threading.Lock()
+_ulid_last = (0, 0)
+
+
+def generate_ulid():
     """
-    This is for a django project with a user_id field
-    :param instance:
-    :return:
+    26 character ULID: 48 bits of millisecond timestamp followed by 80 random bits,
+    Crockford base32 encoded so ids sort by creation time. Ids generated in the same
+    millisecond by this process increment the random part, so they never repeat.
     """
-
-    size = random.randint(30,45)
-    user_id = random_string_generator(size=size)
-
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(user_id=user_id).exists()
-    if qs_exists:
-        return
-    return user_id
-
+    global _ulid_last
+
+    timestamp = time.time_ns() // 1_000_000
+    with _ulid_lock:
+        last_timestamp, last_randomness = _ulid_last
+        if timestamp <= last_timestamp:
+            timestamp = last_timestamp
+            randomness = last_randomness + 1
+            if randomness >> _ULID_RANDOM_BITS:
+                timestamp += 1
+                randomness = secrets.randbits(_ULID_RANDOM_BITS)
+        else:
+            randomness = secrets.randbits(_ULID_RANDOM_BITS)
+        _ulid_last = (timestamp, randomness)
+
+    value = (timestamp << _ULID_RANDOM_BITS) | randomness
+    chars = []
+    for _ in range(26):
+        chars.append(_CROCKFORD_BASE32[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def generate_public_id(field_name):
+    """
+    Public id for ``field_name`` (e.g. ``order_id`` -> ``ORD-<ULID>-ER``).
+    Needs no database round trip.
+    """
+    prefix, suffix = PUBLIC_ID_FORMATS[field_name]
+    return prefix + generate_ulid() + suffix
 
 
+def generate_public_ids(field_name, count):
+    return [generate_public_id(field_name) for _ in range(count)]
 
 
-def unique_chef_id_generator(instance):
+def assign_public_ids(instances, field_name):
     """
-    This is for a chef_id field
-    :param instance:
-    :return:H
+    Fill ``field_name`` on unsaved instances before ``bulk_create``, which does not
+    send the pre_save signals that normally set it.
     """
-    size = random.randint(5, 10)
-    chef_id = "CH-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-F"
+    for instance in instances:
+        if not getattr(instance, field_name):
+            setattr(instance, field_name, generate_public_id(field_name))
+    return instances
 
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(chef_id=chef_id).exists()
-    if qs_exists:
-        return None
-    return chef_id
 
 def generate_email_token():
     code = ''
@@ -59,198 +112,64 @@ def generate_email_token():
     return code
 
 
+def unique_user_id_generator(instance):
+    return generate_public_id('user_id')
 
 
-def unique_client_id_generator(instance):
-    """
-    This is for a client_id field
-    :param instance:
-    :return:
-    """
-    size = random.randint(5, 10)
-    client_id = "CL-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-NT"
-
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(client_id=client_id).exists()
-    if qs_exists:
-        return None
-    return client_id
-
+def unique_chef_id_generator(instance):
+    return generate_public_id('chef_id')
 
-def unique_dispatch_id_generator(instance):
-    """
-    This is for a dispatch_id field
-    :param instance:
-    :return:
-    """
-    size = random.randint(5, 10)
-    dispatch_id = "DIS-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-CT"
 
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(dispatch_id=dispatch_id).exists()
-    if qs_exists:
-        return None
-    return dispatch_id
+def unique_client_id_generator(instance):
+    return generate_public_id('client_id')
 
 
+def unique_dispatch_id_generator(instance):
+    return generate_public_id('dispatch_id')
 
 
 def unique_admin_id_generator(instance):
-    """
-    This is for a admin_id field
-    :param instance:
-    :return:
-    """
-    size = random.randint(5, 10)
-    admin_id = "AD-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-IN"
-
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(admin_id=admin_id).exists()
-    if qs_exists:
-        return None
-    return admin_id
-
+    return generate_public_id('admin_id')
 
 
 def unique_dish_id_generator(instance):
-    """
-    This is for a dish_id field
-    :param instance:
-    :return:
-    """
-    size = random.randint(5, 10)
-    dish_id = "DI-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-SH"
+    return generate_public_id('dish_id')
 
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(dish_id=dish_id).exists()
-    if qs_exists:
-        return None
-    return dish_id
 
 def unique_ingredient_id_generator(instance):
-    """
-    This is for a ingredient_id field
-    :param instance:
-    :return:
-    """
-    size = random.randint(5, 10)
-    ingredient_id = "ING-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-NT"
+    return generate_public_id('ingredient_id')
 
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(ingredient_id=ingredient_id).exists()
-    if qs_exists:
-        return None
-    return ingredient_id
 
 def unique_order_id_generator(instance):
-    """
-    This is for a order_id field
-    :param instance:
-    :return:
-    """
-    size = random.randint(5, 10)
-    order_id = "ORD-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-ER"
+    return generate_public_id('order_id')
 
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(order_id=order_id).exists()
-    if qs_exists:
-        return None
-    return order_id
 
 def unique_custom_option_id_generator(instance):
-    """
-    This is for a custom_option_id field
-    :param instance:
-    :return:
-    """
-    size = random.randint(5, 10)
-    custom_option_id = "CO-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-O"
+    return generate_public_id('custom_option_id')
 
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(custom_option_id=custom_option_id).exists()
-    if qs_exists:
-        return None
-    return custom_option_id
 
 def unique_dish_gallery_id_generator(instance):
-    """
-    This is for a ingredient_id field
-    :param instance:
-    :return:
-    """
-    size = random.randint(5, 15)
-    dish_gallery_id = "DG-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-D"
-
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(dish_gallery_id=dish_gallery_id).exists()
-    if qs_exists:
-        return None
-    return dish_gallery_id
+    return generate_public_id('dish_gallery_id')
 
 
 def unique_booking_id_generator(instance):
-    """
-    This is for a booking_id field
-    :param instance:
-    :return:
-    """
-    size = random.randint(5, 7)
-    booking_id = "BK-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "_AP"
+    return generate_public_id('booking_id')
 
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(booking_id=booking_id).exists()
-    if qs_exists:
-        return None
-    return booking_id
 
 def unique_room_id_generator(instance):
-    """
-    This is for a room_id field
-    :param instance:
-    :return:
-    """
-    size = random.randint(30, 45)
-    room_id = random_string_generator(size=size)
-
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(room_id=room_id).exists()
-    if qs_exists:
-        return None
-    return room_id
-
-
+    return generate_public_id('room_id')
 
 
 def unique_account_id_generator(instance):
-    """
-    This is for a account_id field
-    :param instance:
-    :return:
-    """
-    size = random.randint(5, 7)
-    account_id = "ACC-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-(BNK)"
-
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(account_id=account_id).exists()
-    if qs_exists:
-        return None
-    return account_id
+    return generate_public_id('account_id')
 
 
 def unique_transaction_id_generator(instance):
-    """
-    This is for a transaction_id field
-    :param instance:
-    :return:
-    """
-    size = random.randint(5, 7)
-    transaction_id = "TRN-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-(P)"
+    return generate_public_id('transaction_id')
 
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(transaction_id=transaction_id).exists()
-    if qs_exists:
-        return None
-    return transaction_id
+
+def unique_review_id_generator(instance):
+    return generate_public_id('review_id')
 
 
 
@@ -259,7 +178,7 @@ def haversine(lon1, lat1, lon2, lat2):
     if None in (lon1, lat1, lon2, lat2):
         raise ValueError("Coordinates cannot be None.")
 
-    R = 6371  # Earth radius in kilometers
+    R = EARTH_RADIUS_KM  # Earth radius in kilometers
 
     dlon = math.radians(lon2 - lon1)
     dlat = math.radians(lat2 - lat1)
@@ -272,6 +191,99 @@ def haversine(lon1, lat1, lon2, lat2):
     return R * c  # Distance in kilometers
 
 
+def _use_numpy(use_numpy):
+    if use_numpy is None:
+        return np is not None
+    if use_numpy and np is None:
+        raise ImportError("NumPy is not installed.")
+    return use_numpy
+
+
+def _radians(values):
+    try:
+        return [math.radians(value) for value in values]
+    except TypeError:
+        raise ValueError("Coordinates cannot be None.")
+
+
+def _np_radians(values):
+    try:
+        values = np.asarray(values, dtype=float)
+    except TypeError:
+        raise ValueError("Coordinates cannot be None.")
+    # NumPy turns None into NaN rather than failing the conversion
+    if np.isnan(values).any():
+        raise ValueError("Coordinates cannot be None.")
+    return np.radians(values)
+
+
+def _haversine_row(lon1, lat1, lon2s, lat2s, cos_lat2s):
+    # Pure Python fallback; all coordinates are already in radians
+    cos_lat1 = math.cos(lat1)
+    distances = []
+    for lon2, lat2, cos_lat2 in zip(lon2s, lat2s, cos_lat2s):
+        a = (math.sin((lat2 - lat1) / 2) ** 2 +
+             cos_lat1 * cos_lat2 *
+             math.sin((lon2 - lon1) / 2) ** 2)
+        distances.append(EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(min(a, 1.0))))
+    return distances
+
+
+def haversine_many(lon, lat, lons, lats, use_numpy=None):
+    """
+    Distances in kilometers from one origin to N destinations.
+    Arguments follow ``haversine`` (longitude first); ``lons``/``lats`` are sequences
+    of equal length. Returns a NumPy array when NumPy is available, otherwise a list.
+    """
+    if lon is None or lat is None:
+        raise ValueError("Coordinates cannot be None.")
+    if len(lons) != len(lats):
+        raise ValueError("Longitude and latitude sequences must be the same length.")
+
+    lon1 = math.radians(lon)
+    lat1 = math.radians(lat)
+
+    if _use_numpy(use_numpy):
+        lon2 = _np_radians(lons)
+        lat2 = _np_radians(lats)
+        a = (np.sin((lat2 - lat1) / 2) ** 2 +
+             math.cos(lat1) * np.cos(lat2) *
+             np.sin((lon2 - lon1) / 2) ** 2)
+        return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    lat2s = _radians(lats)
+    return _haversine_row(lon1, lat1, _radians(lons), lat2s, [math.cos(lat2) for lat2 in lat2s])
+
+
+def haversine_matrix(lons1, lats1, lons2, lats2, use_numpy=None):
+    """
+    N x M matrix of distances in kilometers between N origins and M destinations,
+    e.g. drivers against pickups. Returns a 2-D NumPy array when NumPy is available,
+    otherwise a list of rows.
+    """
+    if len(lons1) != len(lats1) or len(lons2) != len(lats2):
+        raise ValueError("Longitude and latitude sequences must be the same length.")
+
+    if _use_numpy(use_numpy):
+        lon1 = _np_radians(lons1)[:, None]
+        lat1 = _np_radians(lats1)[:, None]
+        lon2 = _np_radians(lons2)[None, :]
+        lat2 = _np_radians(lats2)[None, :]
+        a = (np.sin((lat2 - lat1) / 2) ** 2 +
+             np.cos(lat1) * np.cos(lat2) *
+             np.sin((lon2 - lon1) / 2) ** 2)
+        distances = EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        return distances.reshape(len(lons1), len(lons2))
+
+    lon2s = _radians(lons2)
+    lat2s = _radians(lats2)
+    cos_lat2s = [math.cos(lat2) for lat2 in lat2s]
+    return [
+        _haversine_row(lon1, lat1, lon2s, lat2s, cos_lat2s)
+        for lon1, lat1 in zip(_radians(lons1), _radians(lats1))
+    ]
+
+
 
 
     
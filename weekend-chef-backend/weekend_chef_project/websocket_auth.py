@@ -0,0 +1,50 @@
+from urllib.parse import parse_qs
+
+from channels.auth import AuthMiddlewareStack
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from rest_framework.authtoken.models import Token
+
+# Close code for sockets without a user (4000-4999 are free for applications)
+UNAUTHENTICATED_CLOSE_CODE = 4401
+
+
+@database_sync_to_async
+def get_token_user(key):
+    try:
+        token = Token.objects.select_related("user").get(key=key)
+    except Token.DoesNotExist:
+        return None
+    return token.user if token.user.is_active else None
+
+
+def token_from_scope(scope):
+    """Read the DRF token from ``?token=`` or an ``Authorization: Token <key>`` header."""
+    query = parse_qs(scope.get("query_string", b"").decode())
+    if query.get("token"):
+        return query["token"][0]
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            keyword, _, key = value.decode().partition(" ")
+            if keyword.lower() == "token" and key:
+                return key
+    return None
+
+
+class TokenAuthMiddleware(BaseMiddleware):
+    """
+    Authenticate websockets with the same tokens as the REST API, resolved once
+    per connection. Falls back to the session user set by AuthMiddlewareStack.
+    """
+
+    async def __call__(self, scope, receive, send):
+        key = token_from_scope(scope)
+        if key:
+            user = await get_token_user(key)
+            if user is not None:
+                scope = dict(scope, user=user)
+        return await super().__call__(scope, receive, send)
+
+
+def TokenAuthMiddlewareStack(inner):
+    return AuthMiddlewareStack(TokenAuthMiddleware(inner))
@@ -1,20 +1,15 @@
 import React from 'react';
 
-const Pagination = ({ pagination, setPage }) => {
-  const { page_number, total_pages, next, previous } = pagination;
-
-  const handlePageChange = (pageNumber) => {
-    if (pageNumber >= 1 && pageNumber <= total_pages) {
-      setPage(pageNumber);
-    }
-  };
+// Previous / next over cursor paginated lists; see hooks/useCursorPagination.
+const Pagination = ({ pagination, onNext, onPrevious }) => {
+  const { page_number, next, previous } = pagination;
 
   return (
     <div className="flex justify-center mb-5">
       <nav aria-label="Page navigation example">
         <ul className="flex items-center -space-x-px h-8 text-sm bg-gray rounded-lg">
           <li
-            onClick={() => handlePageChange(previous)}
+            onClick={() => previous && onPrevious()}
             className={`cursor-pointer ${!previous ? 'opacity-50 cursor-not-allowed' : ''}`}
           >
             <a
@@ -39,22 +34,17 @@ const Pagination = ({ pagination, setPage }) => {
               </svg>
             </a>
           </li>
-          {[...Array(total_pages)].map((_, index) => {
-            const pageNumber = index + 1;
-            return (
-              <li key={pageNumber} onClick={() => handlePageChange(pageNumber)}>
-                <a
-                  href="#"
-                  className={`flex items-center justify-center px-3 h-8 leading-tight ${pageNumber === page_number ? 'text-blue-600 border-blue-300 bg-blue-50 hover:bg-blue-100 hover:text-blue-700' : 'text-gray-500 bg-white border-gray-300 hover:bg-gray-100 hover:text-gray-700'} dark:bg-gray-800 dark:border-gray-700 dark:text-gray-400 dark:hover:bg-gray-700 dark:hover:text-white`}
-                  aria-current={pageNumber === page_number ? 'page' : undefined}
-                >
-                  {pageNumber}
-                </a>
-              </li>
-            );
-          })}
+          <li>
+            <a
+              href="#"
+              className="flex items-center justify-center px-3 h-8 leading-tight text-blue-600 border-blue-300 bg-blue-50 dark:bg-gray-800 dark:border-gray-700 dark:text-gray-400"
+              aria-current="page"
+            >
+              {page_number}
+            </a>
+          </li>
           <li
-            onClick={() => handlePageChange(next)}
+            onClick={() => next && onNext()}
             className={`cursor-pointer ${!next ? 'opacity-50 cursor-not-allowed' : ''}`}
           >
             <a
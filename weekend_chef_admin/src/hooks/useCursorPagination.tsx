@@ -0,0 +1,36 @@
+import { useCallback, useEffect, useState } from 'react';
+
+// List endpoints page by cursor: each response carries the opaque `next`
+// cursor, and earlier pages are reached through the cursors already visited.
+// Changing `resetKey` (e.g. the search term or filters) starts from page one.
+function useCursorPagination(resetKey = '') {
+  const [cursors, setCursors] = useState<string[]>(['']);
+  const [next, setNext] = useState<string | null>(null);
+
+  useEffect(() => {
+    setCursors(['']);
+  }, [resetKey]);
+
+  const goNext = useCallback(() => {
+    if (next) {
+      setCursors((previous) => [...previous, next]);
+    }
+  }, [next]);
+
+  const goPrevious = useCallback(() => {
+    setCursors((previous) =>
+      previous.length > 1 ? previous.slice(0, -1) : previous,
+    );
+  }, []);
+
+  return {
+    cursor: cursors[cursors.length - 1],
+    pageNumber: cursors.length,
+    next,
+    setNext,
+    goNext,
+    goPrevious,
+  };
+}
+
+export default useCursorPagination;
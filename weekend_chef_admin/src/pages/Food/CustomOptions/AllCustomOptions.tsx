@@ -7,6 +7,7 @@ import {
   userToken,
 } from '../../../constants';
 import Pagination from '../../../components/Pagination';
+import useCursorPagination from '../../../hooks/useCursorPagination';
 import Alert2 from '../../UiElements/Alert2';
 import ArchiveConfirmationModal from '../../../components/ArchiveConfirmationModal';
 import DeleteConfirmationModal from '../../../components/DeleteConfirmationModal';
@@ -15,11 +16,11 @@ import AddCustomOptionModal from './modals/AddCustomOptionModal';
 
 const AllCustomOptions = () => {
   const [search, setSearch] = useState('');
-  const [page, setPage] = useState(1);
   const [customOptions, setcustomOptions] = useState([]);
-  const [totalPages, setTotalPages] = useState(1); // Default to 1 to avoid issues
   const [loading, setLoading] = useState(false);
   const [optionType, setOptionType] = useState('');
+  const { cursor, pageNumber, next, setNext, goNext, goPrevious } =
+    useCursorPagination(`${search}|${optionType}`);
 
   const [itemToDelete, setItemToDelete] = useState(null);
   const [itemToArchive, setItemToArchive] = useState(null);
@@ -47,7 +48,7 @@ const AllCustomOptions = () => {
       const response = await fetch(
         `${baseUrl}api/orders/get-all-custom-options/?search=${encodeURIComponent(
           search,
-        )}&page=${page}&option_type=${optionType}`,
+        )}&cursor=${encodeURIComponent(cursor)}&option_type=${optionType}`,
         {
           headers: {
             'Content-Type': 'application/json',
@@ -62,18 +63,17 @@ const AllCustomOptions = () => {
 
       const data = await response.json();
       setcustomOptions(data.data.custom_options);
-      setTotalPages(data.data.pagination.total_pages);
-      console.log('Total Pages:', data.data.pagination.total_pages);
+      setNext(data.data.pagination.next);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
       setLoading(false);
     }
-  }, [baseUrl, search, page, userToken]);
+  }, [baseUrl, search, cursor, userToken]);
 
   useEffect(() => {
     fetchData();
-  }, [fetchData, search, page,]);
+  }, [fetchData, search, cursor,]);
 
   const handleDelete = async (itemId) => {
     const data = { custom_option_id: itemId };
@@ -364,12 +364,12 @@ const AllCustomOptions = () => {
 
           <Pagination
             pagination={{
-              page_number: page,
-              total_pages: totalPages,
-              next: page < totalPages ? page + 1 : null,
-              previous: page > 1 ? page - 1 : null,
+              page_number: pageNumber,
+              next,
+              previous: pageNumber > 1,
             }}
-            setPage={setPage}
+            onNext={goNext}
+            onPrevious={goPrevious}
           />
 
           {/* Render the alert */}
@@ -2,6 +2,7 @@ import { useCallback, useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { baseUrl, baseUrlMedia, truncateText, userToken } from '../../../constants';
 import Pagination from '../../../components/Pagination';
+import useCursorPagination from '../../../hooks/useCursorPagination';
 import Alert2 from '../../UiElements/Alert2';
 import ArchiveConfirmationModal from '../../../components/ArchiveConfirmationModal';
 import Breadcrumb from '../../../components/Breadcrumbs/Breadcrumb';
@@ -9,9 +10,9 @@ import UnArchiveConfirmationModal from '../../../components/UnArchiveConfirmatio
 
 const ArchivedCustomOptions = () => {
   const [search, setSearch] = useState('');
-  const [page, setPage] = useState(1);
+  const { cursor, pageNumber, next, setNext, goNext, goPrevious } =
+    useCursorPagination(search);
   const [customOptions, setCustomOptions] = useState([]);
-  const [totalPages, setTotalPages] = useState(1); // Default to 1 to avoid issues
   const [loading, setLoading] = useState(false);
 
   const [itemToArchive, setItemToArchive] = useState(null);
@@ -40,7 +41,7 @@ const ArchivedCustomOptions = () => {
       const response = await fetch(
         `${baseUrl}api/orders/get-all-archived-custom-options/?search=${encodeURIComponent(
           search,
-        )}&page=${page}`,
+        )}&cursor=${encodeURIComponent(cursor)}`,
         {
           headers: {
             'Content-Type': 'application/json',
@@ -55,13 +56,13 @@ const ArchivedCustomOptions = () => {
 
       const data = await response.json();
       setCustomOptions(data.data.custom_options);
-      setTotalPages(data.data.pagination.total_pages);
+      setNext(data.data.pagination.next);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
       setLoading(false);
     }
-  }, [baseUrl, search, page, userToken]);
+  }, [baseUrl, search, cursor, userToken]);
 
   useEffect(() => {
     fetchData();
@@ -294,12 +295,12 @@ const ArchivedCustomOptions = () => {
 
         <Pagination
           pagination={{
-            page_number: page,
-            total_pages: totalPages,
-            next: page < totalPages ? page + 1 : null,
-            previous: page > 1 ? page - 1 : null,
+            page_number: pageNumber,
+            next,
+            previous: pageNumber > 1,
           }}
-          setPage={setPage}
+          onNext={goNext}
+          onPrevious={goPrevious}
         />
   
         
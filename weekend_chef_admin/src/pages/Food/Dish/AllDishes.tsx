@@ -2,6 +2,7 @@ import { useCallback, useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { baseUrl, baseUrlMedia, truncateText, userToken } from '../../../constants';
 import Pagination from '../../../components/Pagination';
+import useCursorPagination from '../../../hooks/useCursorPagination';
 import Alert2 from '../../UiElements/Alert2';
 import ArchiveConfirmationModal from '../../../components/ArchiveConfirmationModal';
 import DeleteConfirmationModal from '../../../components/DeleteConfirmationModal';
@@ -10,10 +11,8 @@ import AddDishModal from './modals/AddDishesModal';
 
 const AllDishes = () => {
   const [search, setSearch] = useState('');
-  const [page, setPage] = useState(1);
   const [dishes, setDishes] = useState([]);
   const [dishCategories, setDishCategories] = useState([]);
-  const [totalPages, setTotalPages] = useState(1); // Default to 1 to avoid issues
   const [loading, setLoading] = useState(false);
 
   const [itemToDelete, setItemToDelete] = useState(null);
@@ -43,6 +42,8 @@ const AllDishes = () => {
 
 
     const [priceValue, setPriceValue] = useState(50); // Initial value set to 50
+  const { cursor, pageNumber, next, setNext, goNext, goPrevious } =
+    useCursorPagination(`${search}|${JSON.stringify(checkedCategories)}|${priceValue}`);
 
   const handleSliderChange = (event) => {
     setPriceValue(event.target.value);
@@ -65,7 +66,7 @@ const AllDishes = () => {
       const response = await fetch(
         `${baseUrl}api/food/get-all-dishes/?search=${encodeURIComponent(
           search,
-        )}&page=${page}&categories=${JSON.stringify(checkedCategories)}&price=${priceValue}`,
+        )}&cursor=${encodeURIComponent(cursor)}&categories=${JSON.stringify(checkedCategories)}&price=${priceValue}`,
         {
           headers: {
             'Content-Type': 'application/json',
@@ -80,14 +81,13 @@ const AllDishes = () => {
 
       const data = await response.json();
       setDishes(data.data.dishes);
-      setTotalPages(data.data.pagination.total_pages);
-      console.log('Total Pages:', data.data.pagination.total_pages);
+      setNext(data.data.pagination.next);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
       setLoading(false);
     }
-  }, [baseUrl, search, page, userToken, checkedCategories, priceValue]);
+  }, [baseUrl, search, cursor, userToken, checkedCategories, priceValue]);
 
   
   
@@ -97,7 +97,7 @@ const AllDishes = () => {
       const response = await fetch(
         `${baseUrl}api/food/get-all-food-categories/?search=${encodeURIComponent(
           search,
-        )}&page=${page}`,
+        )}`,
         {
           headers: {
             'Content-Type': 'application/json',
@@ -120,7 +120,7 @@ const AllDishes = () => {
     } finally {
       setLoading(false);
     }
-  }, [baseUrl, search, page, userToken, checkedCategories, priceValue]);
+  }, [baseUrl, search, userToken]);
 
   
   
@@ -131,7 +131,7 @@ const AllDishes = () => {
     fetchData();
     fetchCategories();
     console.log('Checked Categories:', checkedCategories);
-  }, [fetchData, fetchCategories, search, page, checkedCategories, priceValue]);
+  }, [fetchData, fetchCategories, search, cursor, checkedCategories, priceValue]);
 
   const handleDelete = async (itemId) => {
     const data = { dish_id: itemId };
@@ -450,12 +450,12 @@ const AllDishes = () => {
 
         <Pagination
           pagination={{
-            page_number: page,
-            total_pages: totalPages,
-            next: page < totalPages ? page + 1 : null,
-            previous: page > 1 ? page - 1 : null,
+            page_number: pageNumber,
+            next,
+            previous: pageNumber > 1,
           }}
-          setPage={setPage}
+          onNext={goNext}
+          onPrevious={goPrevious}
         />
   
         
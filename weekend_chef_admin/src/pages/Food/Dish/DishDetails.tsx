@@ -17,7 +17,6 @@ const DishDetails = () => {
   const mapRef = useRef(null);
 
   const [search, setSearch] = useState('');
-  const [page, setPage] = useState(1);
 
   const [activeTab, setActiveTab] = useState(0);
   const { dish_id } = useParams();
@@ -176,7 +175,7 @@ const DishDetails = () => {
       const response = await fetch(
         `${baseUrl}api/food/get-all-food-categories/?search=${encodeURIComponent(
           search,
-        )}&page=${page}`,
+        )}`,
         {
           headers: {
             'Content-Type': 'application/json',
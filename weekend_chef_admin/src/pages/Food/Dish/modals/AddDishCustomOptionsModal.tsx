@@ -2,13 +2,14 @@ import { useCallback, useEffect, useState } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { baseUrl, baseUrlMedia, userToken } from '../../../../constants';
 import Pagination from '../../../../components/Pagination';
+import useCursorPagination from '../../../../hooks/useCursorPagination';
 
 const AddDishCustomOptionsModal = ({ isOpen, onClose, fetchData, dish_id }) => {
   const [search, setSearch] = useState('');
-  const [page, setPage] = useState(1);
   const [customOptions, setcustomOptions] = useState([]);
-  const [totalPages, setTotalPages] = useState(1); // Default to 1 to avoid issues
   const [optionType, setOptionType] = useState('');
+  const { cursor, pageNumber, next, setNext, goNext, goPrevious } =
+    useCursorPagination(`${search}|${optionType}`);
 
   const [inputErrors, setInputErrors] = useState({});
   const [serverError, setServerError] = useState({});
@@ -36,7 +37,7 @@ const AddDishCustomOptionsModal = ({ isOpen, onClose, fetchData, dish_id }) => {
       const response = await fetch(
         `${baseUrl}api/orders/get-all-custom-options/?search=${encodeURIComponent(
           search,
-        )}&page=${page}&option_type=${optionType}`,
+        )}&cursor=${encodeURIComponent(cursor)}&option_type=${optionType}`,
         {
           headers: {
             'Content-Type': 'application/json',
@@ -51,18 +52,17 @@ const AddDishCustomOptionsModal = ({ isOpen, onClose, fetchData, dish_id }) => {
 
       const data = await response.json();
       setcustomOptions(data.data.custom_options);
-      setTotalPages(data.data.pagination.total_pages);
-      console.log('Total Pages:', data.data.pagination.total_pages);
+      setNext(data.data.pagination.next);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
       setLoading(false);
     }
-  }, [baseUrl, search, page, userToken]);
+  }, [baseUrl, search, cursor, userToken]);
 
   useEffect(() => {
     fetchInitData();
-  }, [fetchInitData, search, page]);
+  }, [fetchInitData, search, cursor]);
 
   const handleSubmit = async (e) => {
     e.preventDefault();
@@ -235,12 +235,12 @@ const AddDishCustomOptionsModal = ({ isOpen, onClose, fetchData, dish_id }) => {
 
                 <Pagination
                   pagination={{
-                    page_number: page,
-                    total_pages: totalPages,
-                    next: page < totalPages ? page + 1 : null,
-                    previous: page > 1 ? page - 1 : null,
+                    page_number: pageNumber,
+                    next,
+                    previous: pageNumber > 1,
                   }}
-                  setPage={setPage}
+                  onNext={goNext}
+                  onPrevious={goPrevious}
                 />
 
                 {inputErrors.options && (
@@ -2,13 +2,12 @@ import { useCallback, useEffect, useState } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { baseUrl, baseUrlMedia, userToken } from '../../../../constants';
 import Pagination from '../../../../components/Pagination';
+import useCursorPagination from '../../../../hooks/useCursorPagination';
 
 const AddDishRelationModal = ({ isOpen, onClose, fetchData, dish_id }) => {
   const [search, setSearch] = useState('');
-  const [page, setPage] = useState(1);
   const [dishes, setDishes] = useState([]);
   const [dishCategories, setDishCategories] = useState([]);
-  const [totalPages, setTotalPages] = useState(1); // Default to 1 to avoid issues
 
   const [inputErrors, setInputErrors] = useState({});
   const [serverError, setServerError] = useState({});
@@ -17,6 +16,8 @@ const AddDishRelationModal = ({ isOpen, onClose, fetchData, dish_id }) => {
 
   const [selectedOptions, setSelectedOptions] = useState([]);
   const [checkedCategories, setCheckedCategories] = useState({});
+  const { cursor, pageNumber, next, setNext, goNext, goPrevious } =
+    useCursorPagination(`${search}|${JSON.stringify(checkedCategories)}`);
 
   // Function to handle selection of options
   const handleOptionChange = (e, optionId) => {
@@ -37,7 +38,7 @@ const AddDishRelationModal = ({ isOpen, onClose, fetchData, dish_id }) => {
       const response = await fetch(
         `${baseUrl}api/food/get-all-dishes/?search=${encodeURIComponent(
           search,
-        )}&page=${page}&categories=${JSON.stringify(checkedCategories)}`,
+        )}&cursor=${encodeURIComponent(cursor)}&categories=${JSON.stringify(checkedCategories)}`,
         {
           headers: {
             'Content-Type': 'application/json',
@@ -52,20 +53,19 @@ const AddDishRelationModal = ({ isOpen, onClose, fetchData, dish_id }) => {
 
       const data = await response.json();
       setDishes(data.data.dishes);
-      setTotalPages(data.data.pagination.total_pages);
-      console.log('Total Pages:', data.data.pagination.total_pages);
+      setNext(data.data.pagination.next);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
       setLoading(false);
     }
-  }, [baseUrl, search, page, userToken, checkedCategories]);
+  }, [baseUrl, search, cursor, userToken, checkedCategories]);
 
   
 
   useEffect(() => {
     fetchInitData();
-  }, [fetchInitData, search, page]);
+  }, [fetchInitData, search, cursor]);
 
 
 
@@ -256,12 +256,12 @@ const AddDishRelationModal = ({ isOpen, onClose, fetchData, dish_id }) => {
      
                 <Pagination
                   pagination={{
-                    page_number: page,
-                    total_pages: totalPages,
-                    next: page < totalPages ? page + 1 : null,
-                    previous: page > 1 ? page - 1 : null,
+                    page_number: pageNumber,
+                    next,
+                    previous: pageNumber > 1,
                   }}
-                  setPage={setPage}
+                  onNext={goNext}
+                  onPrevious={goPrevious}
                 />
 
                 {inputErrors.options && (
@@ -2,6 +2,7 @@ import { useCallback, useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { baseUrl, baseUrlMedia, userToken } from '../../../constants';
 import Pagination from '../../../components/Pagination';
+import useCursorPagination from '../../../hooks/useCursorPagination';
 import Alert2 from '../../UiElements/Alert2';
 import ArchiveConfirmationModal from '../../../components/ArchiveConfirmationModal';
 import DeleteConfirmationModal from '../../../components/DeleteConfirmationModal';
@@ -10,9 +11,9 @@ import AddDishCategoryModal from './modals/AddDishCategoryModal';
 
 const AllDishCategories = () => {
   const [search, setSearch] = useState('');
-  const [page, setPage] = useState(1);
+  const { cursor, pageNumber, next, setNext, goNext, goPrevious } =
+    useCursorPagination(search);
   const [categories, setCategories] = useState([]);
-  const [totalPages, setTotalPages] = useState(1); // Default to 1 to avoid issues
   const [loading, setLoading] = useState(false);
 
   const [itemToDelete, setItemToDelete] = useState(null);
@@ -43,7 +44,7 @@ const AllDishCategories = () => {
       const response = await fetch(
         `${baseUrl}api/food/get-all-food-categories/?search=${encodeURIComponent(
           search,
-        )}&page=${page}`,
+        )}&cursor=${encodeURIComponent(cursor)}`,
         {
           headers: {
             'Content-Type': 'application/json',
@@ -58,14 +59,13 @@ const AllDishCategories = () => {
 
       const data = await response.json();
       setCategories(data.data.food_categories);
-      setTotalPages(data.data.pagination.total_pages);
-      console.log('Total Pages:', data.data.pagination.total_pages);
+      setNext(data.data.pagination.next);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
       setLoading(false);
     }
-  }, [baseUrl, search, page, userToken]);
+  }, [baseUrl, search, cursor, userToken]);
 
   useEffect(() => {
     fetchData();
@@ -348,12 +348,12 @@ const AllDishCategories = () => {
           : null}
         <Pagination
           pagination={{
-            page_number: page,
-            total_pages: totalPages,
-            next: page < totalPages ? page + 1 : null,
-            previous: page > 1 ? page - 1 : null,
+            page_number: pageNumber,
+            next,
+            previous: pageNumber > 1,
           }}
-          setPage={setPage}
+          onNext={goNext}
+          onPrevious={goPrevious}
         />
   
         
@@ -2,16 +2,17 @@ import { useCallback, useEffect, useState } from 'react';
 import { baseUrl, baseUrlMedia, userToken } from '../../constants';
 import { Link } from 'react-router-dom';
 import Pagination from '../../components/Pagination';
+import useCursorPagination from '../../hooks/useCursorPagination';
 import DeleteConfirmationModal from '../../components/DeleteConfirmationModal';
 import Alert2 from '../UiElements/Alert2';
 import AddUserModal from './add_user_modal';
 
 const AllUsers = () => {
   const [search, setSearch] = useState('');
-  const [page, setPage] = useState(1);
   const [filterYearGroup, setFilterYearGroup] = useState('');
+  const { cursor, pageNumber, next, setNext, goNext, goPrevious } =
+    useCursorPagination(`${search}|${filterYearGroup}`);
   const [users, setUsers] = useState([]);
-  const [totalPages, setTotalPages] = useState(1); // Default to 1 to avoid issues
   const [loading, setLoading] = useState(false);
 
 
@@ -38,7 +39,7 @@ const AllUsers = () => {
       const response = await fetch(
         `${baseUrl}api/accounts/admin/get-all-users/?search=${encodeURIComponent(
           search,
-        )}&page=${page}&year_group=${filterYearGroup}`,
+        )}&cursor=${encodeURIComponent(cursor)}&year_group=${filterYearGroup}`,
         {
           headers: {
             'Content-Type': 'application/json',
@@ -53,14 +54,13 @@ const AllUsers = () => {
 
       const data = await response.json();
       setUsers(data.data.users);
-      setTotalPages(data.data.pagination.total_pages);
-      console.log('Total Pages:', data.data.pagination.total_pages);
+      setNext(data.data.pagination.next);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
       setLoading(false);
     }
-  }, [baseUrl, search, page, filterYearGroup, userToken]);
+  }, [baseUrl, search, cursor, filterYearGroup, userToken]);
 
   useEffect(() => {
     fetchData();
@@ -359,12 +359,12 @@ const AllUsers = () => {
         : null}
       <Pagination
         pagination={{
-          page_number: page,
-          total_pages: totalPages,
-          next: page < totalPages ? page + 1 : null,
-          previous: page > 1 ? page - 1 : null,
+          page_number: pageNumber,
+          next,
+          previous: pageNumber > 1,
         }}
-        setPage={setPage}
+        onNext={goNext}
+        onPrevious={goPrevious}
       />
 
       